@@ -0,0 +1,182 @@
+"""
+Benchmarks for the strategy hot paths on synthetic universes.
+
+    python -m bench.hotpaths --sizes 100,1000,10000
+
+Each stage is timed (best of --repeat) with its peak traced memory, appended to a JSON history,
+and compared against the median of the previous runs; any stage slower than that by more than
+--threshold, or using more peak memory by more than --mem-threshold, fails the run (exit code 1).
+"""
+from __future__ import annotations
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import typer
+
+from src.broker.reconciliation import plan_from_targets
+from src.core.storage import ART
+from src.core.types import Target
+from src.data import polygon as poly
+from src.research.backtest import BTConfig, backtest_breakout
+from src.research.metrics import performance, performance_batch
+from src.strategy.vobreakout import atr_pct, breakout_long
+
+app = typer.Typer(add_completion=False)
+
+HISTORY = ART / "bench" / "history.json"
+N_DAYS = 252
+
+
+# --- Synthetic data ---
+
+def synthetic_universe(n_symbols: int, n_days: int = N_DAYS, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2020-01-01", periods=n_days)
+    close = rng.uniform(2, 200, size=n_symbols) * np.exp(np.cumsum(rng.normal(0, 0.03, (n_days, n_symbols)), axis=0))
+    high = close * (1 + np.abs(rng.normal(0, 0.02, close.shape)))
+    low = close * (1 - np.abs(rng.normal(0, 0.02, close.shape)))
+    vol = rng.lognormal(13, 0.7, close.shape)
+    return {
+        f"S{j:05d}": pd.DataFrame(
+            {"open": close[:, j], "high": high[:, j], "low": low[:, j], "close": close[:, j], "volume": vol[:, j]},
+            index=idx,
+        )
+        for j in range(n_symbols)
+    }
+
+
+def _polygon_payloads(bars: Dict[str, pd.DataFrame]) -> Dict[str, dict]:
+    out = {}
+    for s, df in bars.items():
+        t = (df.index.asi8 // 1_000_000).tolist()
+        out[s] = {
+            "results": [
+                {"t": ti, "o": o, "h": h, "l": lo, "c": c, "v": v}
+                for ti, o, h, lo, c, v in zip(t, *(df[f].tolist() for f in ("open", "high", "low", "close", "volume")))
+            ]
+        }
+    return out
+
+
+# --- Stages ---
+
+def stages(n: int) -> Dict[str, Callable[[], object]]:
+    bars = synthetic_universe(n)
+    payloads = _polygon_payloads(bars)
+    cfg = BTConfig()
+    rng = np.random.default_rng(1)
+    targets = [
+        Target(symbol=s, side="BUY", qty=int(rng.integers(1, 500)), entry_limit=10.0, stop_loss=9.7)
+        for s in bars
+    ]
+    last = {s: float(df["close"].iloc[-1]) for s, df in bars.items()}
+    rets = [pd.Series(rng.normal(0.0005, 0.01, N_DAYS), index=df.index) for df in bars.values()]
+    ret_matrix = np.column_stack([r.to_numpy() for r in rets])
+
+    return {
+        "breakout_long": lambda: [breakout_long(df, 0.012, 1.5) for df in bars.values()],
+        "atr_pct": lambda: [atr_pct(df) for df in bars.values()],
+        "backtest_breakout": lambda: [backtest_breakout(df, cfg) for df in bars.values()],
+        "plan_from_targets": lambda: plan_from_targets(targets, {}, last, 10, 0.7, 1e6, 0.1),
+        "polygon_normalize": lambda: [poly._normalize(js, s) for s, js in payloads.items()],
+        "performance": lambda: [performance(r) for r in rets],
+        "performance_batch": lambda: performance_batch(ret_matrix),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """Best wall time over `repeat` runs, and peak traced allocation (MB) of one extra run."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6
+
+
+# --- History / regression gate ---
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def load_history(path: Path) -> List[dict]:
+    return json.loads(path.read_text()) if path.exists() else []
+
+
+# Peak memory below this (MB) is allocator noise, not a regression
+MIN_PEAK_MB = 1.0
+
+
+def regressions(
+    history: List[dict],
+    current: Dict[str, dict],
+    threshold: float,
+    window: int = 5,
+    mem_threshold: float | None = None,
+) -> List[str]:
+    """
+    Stages whose time (or peak memory, with `mem_threshold`) exceeds the median of the last
+    `window` recorded runs by more than the threshold.
+    """
+    out = []
+    checks = [("seconds", threshold, "s")] + ([("peak_mb", mem_threshold, " MB")] if mem_threshold is not None else [])
+    for key, res in current.items():
+        for metric, limit, unit in checks:
+            prior = [h["results"][key][metric] for h in history[-window:] if metric in h["results"].get(key, {})]
+            if not prior or metric not in res:
+                continue
+            base = statistics.median(prior)
+            if metric == "peak_mb" and max(base, res[metric]) < MIN_PEAK_MB:
+                continue
+            if res[metric] > base * (1 + limit):
+                change = f"{res[metric] / base - 1:+.0%}" if base > 0 else "new"
+                out.append(f"{key}: {res[metric]:.4f}{unit} vs median {base:.4f}{unit} ({change})")
+    return out
+
+
+@app.command()
+def main(
+    sizes: str = typer.Option("100,1000", help="Comma-separated universe sizes (e.g. 100,1000,10000)"),
+    repeat: int = typer.Option(3, help="Timed runs per stage (best is kept)"),
+    threshold: float = typer.Option(0.25, help="Allowed slowdown vs. history median before failing"),
+    mem_threshold: float = typer.Option(0.25, help="Allowed peak-memory growth vs. history median before failing"),
+    history: Path = typer.Option(HISTORY, help="JSON history file"),
+    record: bool = typer.Option(True, help="Append this run to the history (passing runs only)"),
+):
+    results: Dict[str, dict] = {}
+    for n in (int(x) for x in sizes.split(",")):
+        for name, fn in stages(n).items():
+            secs, peak_mb = measure(fn, repeat)
+            key = f"{name}@{n}"
+            results[key] = {"seconds": secs, "symbols_per_s": n / secs if secs > 0 else float("inf"), "peak_mb": peak_mb}
+            typer.echo(f"{key:<28} {secs * 1e3:10.2f} ms  {n / secs:12.0f} sym/s  {peak_mb:8.1f} MB")
+
+    past = load_history(history)
+    bad = regressions(past, results, threshold, mem_threshold=mem_threshold)
+    if record and not bad:  # a regressed run must not drag the baseline along with it
+        history.parent.mkdir(parents=True, exist_ok=True)
+        past.append({"ts": datetime.now(UTC).isoformat(), "rev": _git_rev(), "results": results})
+        history.write_text(json.dumps(past, indent=1))
+    if bad:
+        typer.echo("REGRESSIONS:\n  " + "\n  ".join(bad), err=True)
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,411 @@
+"""
+Long-running EOD daemon: keeps the IB session and the pre-close state warm between runs.
+
+    python -m src.apps.daemon --mode paper --prefetch-at 15:30 --decide-at 16:00:02
+
+On XNYS sessions (times are America/New_York) the prefetch job makes sure IB is connected,
+journals fills that earlier runs' brackets received after those runs ended, builds the
+universe, loads bars through the previous session and reduces them to `CloseLevels`; FX and
+NAV are fixed at the same time. At the decide time the session's final
+bars for the whole market come from one Polygon grouped-daily request (polled until it is
+published), and what is left runs against the warm state: the signal on the final bar,
+sizing, reconciliation against IB's cached positions and bracket submission. The
+`stage.decide` span times that critical path, from final bars in hand to orders sent.
+
+With --watch-at the daemon also streams IB quotes for the universe during the session and
+checks each against a precomputed `TriggerIndex`; a symbol that clears its levels is sized at
+its trigger price and submitted through the same reconciliation path (and is not bought
+again at the close). Triggers and the close draw on one daily budget of names and gross
+exposure, net of entries already sent or open at IB.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import typer
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from src.apps.eod_rebalance import _close, _fetch_bars, _write_run_profile
+from src.broker.fx import gbp_per_usd
+from src.broker.ibkr_client import IbClient
+from src.broker.ibkr_exec import Executor, Submission, to_fill
+from src.broker.quotes import QuoteStream
+from src.broker.reconciliation import fetch_positions, plan_from_targets
+from src.core.config import load_settings
+from src.core.journal import Journal, sync_fills
+from src.core.lazy import lazy_import
+from src.core.log import logger
+from src.core.storage import ART
+from src.core.timeutils import is_session, prev_session, sessions_back
+from src.core.tracing import TRACER, count, span
+from src.core.types import Mode, RunMeta, Target
+from src.data import polygon as poly
+from src.data.panel import Panel
+from src.data.store import MARKET_TZ
+from src.data.universe import build_universe, refresh_market
+from src.strategy.pipeline import CloseLevels
+from src.strategy.triggers import TriggerIndex
+
+ib_insync = lazy_import("ib_insync")
+
+app = typer.Typer(add_completion=False)
+
+TRIGGER_DIR = ART / "triggers"
+
+
+def market_today() -> pd.Timestamp:
+    """Today's date in New York (naive, midnight)."""
+    return pd.Timestamp.now(tz=MARKET_TZ).normalize().tz_localize(None)
+
+
+@dataclass
+class WarmState:
+    """What the decide job needs for `day`, prepared from bars through the previous session."""
+
+    day: pd.Timestamp
+    levels: CloseLevels
+    index: Dict[str, int]
+    nav_usd: float
+    fx_gbp_per_usd: float
+    prepared_at: float
+    sent: Dict[str, float] = field(default_factory=dict)  # symbol -> entry notional (USD) sent on `day`
+
+
+class Daemon:
+    """
+    Prefetch / decide jobs sharing one IB connection. `prepare` and `act` are the synchronous
+    halves of the two jobs (bars in, orders out), so they can be driven without a scheduler.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: Mode = Mode.paper,
+        dry_run: bool = False,
+        nav_gbp: float = 500.0,
+        days_back: int = 60,
+        poll: float = 1.0,
+        deadline: float = 900.0,
+        client: IbClient | None = None,
+    ):
+        self.cfg = load_settings()
+        self.mode, self.dry_run = mode, dry_run
+        self.nav_gbp, self.days_back = float(nav_gbp), days_back
+        self.poll, self.deadline = poll, deadline
+        self.client = client or IbClient()
+        self.ex = Executor(self.client.ib)
+        self.warm: WarmState | None = None
+        self.triggers: TriggerIndex | None = None
+        self.stream: QuoteStream | None = None
+        self._watch_journal: Journal | None = None
+
+    # --- IB session ---
+
+    async def ensure_connected(self) -> None:
+        if not self.client.ib.isConnected():
+            with span("stage.connect"):
+                await self.client.connect()
+
+    # --- Prefetch ---
+
+    async def prefetch(self, day: pd.Timestamp | None = None) -> None:
+        """Warm everything for `day` (default: today) except its final bar."""
+        day = market_today() if day is None else pd.Timestamp(day)
+        if not is_session(day):
+            logger.info(f"{day.date()} is not a session; nothing to prefetch")
+            return
+        if self.warm is not None and self.warm.day == day:
+            logger.info(f"State for {day.date()} is already warm")
+            return
+        TRACER.reset()
+        with span("stage.prefetch"):
+            await self.ensure_connected()
+            with span("stage.fills"):
+                sync_fills([to_fill(f) for f in await self.client.ib.reqExecutionsAsync()])
+            u = self.cfg.strat.universe
+            last = prev_session(day)
+            with span("stage.universe"):
+                asof = await refresh_market(asof=last)
+                symbols = build_universe(
+                    min_price=u["min_price"],
+                    min_atr_pct=u["min_atr_pct"],
+                    min_adv_usd=u.get("min_adv_usd", 0.0),
+                    min_avg_vol=u.get("min_avg_vol", 0.0),
+                    asof=asof,
+                )
+            start = sessions_back(self.days_back - 1, last)
+            with span("stage.fetch"):
+                bars = await _fetch_bars(symbols, start.date().isoformat(), last.date().isoformat())
+            self.prepare(day, bars)
+
+    def prepare(self, day: pd.Timestamp, bars: Dict[str, pd.DataFrame]) -> WarmState:
+        """Reduce bars before `day` to `CloseLevels` and fix NAV / FX for the decision."""
+        day = pd.Timestamp(day)
+        with span("stage.levels"):
+            panel = Panel.from_frames(bars)
+            panel = panel.rows(0, int(panel.dates.searchsorted(day)))  # never a (partial) bar of `day` itself
+            levels = CloseLevels.from_panel(panel)
+        fx = gbp_per_usd()
+        index = {s: i for i, s in enumerate(levels.symbols.tolist())}
+        self.warm = WarmState(day, levels, index, self.nav_gbp / fx, fx, time.time())
+        self.triggers = None
+        count("symbols", len(levels))
+        logger.info(f"Prefetched {len(levels)} symbols for {day.date()} from {panel.shape[0]} sessions of bars")
+        return self.warm
+
+    def _state(self) -> WarmState:
+        if self.warm is None:
+            raise RuntimeError("No prefetched state; run prefetch (or prepare) first")
+        return self.warm
+
+    # --- Decide ---
+
+    async def final_bars(self, day: pd.Timestamp) -> pd.DataFrame:
+        """The session's daily bars for every symbol, polled until Polygon publishes them."""
+        date = day.strftime("%Y-%m-%d")
+        stop = time.monotonic() + self.deadline
+        while True:
+            with span("stage.close_bars"):
+                bars = await poly.grouped_daily(date)
+            if len(bars) or time.monotonic() >= stop:
+                return bars
+            await asyncio.sleep(self.poll)
+
+    async def decide(self, day: pd.Timestamp | None = None) -> List[Submission]:
+        day = market_today() if day is None else pd.Timestamp(day)
+        if not is_session(day):
+            return []
+        self.stop_watch()
+        if self.warm is None or self.warm.day != day:
+            logger.warning(f"No prefetched state for {day.date()}; prefetching now")
+            await self.prefetch(day)
+        await self.ensure_connected()
+        bars = await self.final_bars(day)
+        if bars.empty:
+            logger.error(f"No final bars for {day.date()} within {self.deadline:.0f}s; nothing decided")
+            return []
+        return self.act(bars)
+
+    def _align(self, bars: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """high, close, volume of the final bars in `CloseLevels` symbol order (NaN where missing)."""
+        bars = bars.drop_duplicates("symbol", keep="last")
+        idx = pd.Index(bars["symbol"]).get_indexer(self._state().levels.symbols)
+        hit = idx >= 0
+        out = []
+        for f in ("high", "close", "volume"):
+            col = np.full(len(idx), np.nan)
+            col[hit] = bars[f].to_numpy(float)[idx[hit]]
+            out.append(col)
+        high, close, volume = out
+        return high, close, volume
+
+    def _sizing(self) -> dict:
+        ex = self.cfg.strat.execution
+        return dict(
+            per_trade_risk=self.cfg.default.risk["per_trade_risk"],
+            stop_loss_pct=ex["stop_loss_pct"],
+            trail_start_pct=ex["trail_start_pct"],
+            trail_pct=ex["trail_pct"],
+            entry_limit_pct=ex["entry_limit_pct"],
+        )
+
+    def committed(self) -> Dict[str, float]:
+        """
+        Entry notional (USD) per symbol committed today: brackets sent by this daemon (filled
+        or not, at their sizing price) and IB's other open entry orders, e.g. from another run
+        or process (at their limit).
+        """
+        out = dict(self._state().sent)
+        for tr in self.client.ib.openTrades():
+            o = tr.order
+            if o.parentId == 0 and o.action == "BUY" and o.orderType == "LMT":
+                out.setdefault(tr.contract.symbol, float(o.totalQuantity) * o.lmtPrice)
+        return out
+
+    def _plan_and_submit(self, targets: List[Target], last_prices: Dict[str, float]) -> tuple[List[Target], List[Submission]]:
+        """
+        Reconcile against IB's cached positions and send the brackets. The risk caps are a
+        budget for the whole day: each call only gets the names and gross exposure that
+        `committed` leaves over, and names already committed are not entered again.
+        """
+        risk, warm = self.cfg.default.risk, self._state()
+        committed = self.committed()
+        targets = [t for t in targets if t.symbol not in committed]
+        child_orders = plan_from_targets(
+            targets=targets,
+            cur_positions=fetch_positions(self.client.ib),
+            last_prices=last_prices,
+            max_positions=max(0, risk["max_positions"] - len(committed)),
+            max_gross_exposure=max(0.0, risk["max_gross_exposure"] - sum(committed.values()) / warm.nav_usd),
+            nav_usd=warm.nav_usd,
+            per_name_cap=risk.get("per_name_cap", None),
+        )
+        subs: List[Submission] = []
+        if child_orders and not self.dry_run:
+            with span("stage.submit"):
+                subs = self.ex.place_brackets(child_orders)
+            sent = {s.symbol for s in subs}
+            # At the sizing price, as the gross cap measures it
+            warm.sent.update({t.symbol: abs(t.qty) * last_prices[t.symbol] for t in child_orders if t.symbol in sent})
+        return child_orders, subs
+
+    def act(self, bars: pd.DataFrame) -> List[Submission]:
+        """Signals, sizing, reconciliation and submission on the session's final bars."""
+        warm, sig, triggers = self._state(), self.cfg.strat.signal, self.triggers
+        meta = RunMeta(run_id=warm.day.strftime("%Y%m%d"), asof=datetime.now(UTC), mode=self.mode.value)
+        with Journal(meta) as journal:
+            with span("stage.decide"):
+                high, close, volume = self._align(bars)
+                batch = warm.levels.targets(
+                    high, close, volume,
+                    nav_gbp=self.nav_gbp,
+                    fx_gbp_per_usd=warm.fx_gbp_per_usd,
+                    breakout_threshold=sig["breakout_threshold"],
+                    vol_multiplier=sig["vol_multiplier"],
+                    **self._sizing(),
+                )
+                # Symbols already entered on a live trigger today are not bought again
+                done = set(triggers.triggered()) if triggers is not None else set()
+                targets = [t for t in batch.to_targets() if t.symbol not in done]
+                # The close print is the price the targets were sized at
+                last_prices = {t.symbol: float(close[warm.index[t.symbol]]) for t in targets}
+                child_orders, subs = self._plan_and_submit(targets, last_prices)
+
+            # Off the critical path: journal, acks, profile
+            journal.run(dry_run=self.dry_run, nav_usd=warm.nav_usd, fx_gbp_per_usd=warm.fx_gbp_per_usd)
+            journal.universe(warm.levels.symbols.tolist())
+            journal.signals(batch)
+            journal.targets(child_orders, last_prices)
+            count("signals", len(batch))
+            count("orders", len(subs))
+            logger.info(
+                f"{warm.day.date()}: {len(batch)} signals, {len(child_orders)} planned, {len(subs)} sent "
+                f"in {TRACER.summary()['stage.decide']['total_s'] * 1e3:.0f} ms"
+            )
+            if subs:
+                journal.orders(subs)
+                self.ex.wait_acks(subs, timeout=5.0)
+                journal.acks(subs)
+                journal.fills(self.ex.fills(subs))
+        logger.info(f"Run profile written to {_write_run_profile(meta, None)}")
+        return subs
+
+    # --- Live triggers ---
+
+    async def watch(self, day: pd.Timestamp | None = None) -> None:
+        """
+        Stream quotes for the universe against today's `TriggerIndex`; symbols that trigger are
+        sized at their trigger price and submitted straight away (see `on_trigger`). The
+        stream runs until the decide job stops it.
+        """
+        day = market_today() if day is None else pd.Timestamp(day)
+        if not is_session(day):
+            return
+        if self.warm is None or self.warm.day != day:
+            await self.prefetch(day)
+        await self.ensure_connected()
+        self.start_watch()
+
+    def start_watch(self) -> int:
+        warm, sig, triggers = self._state(), self.cfg.strat.signal, self.triggers
+        self.stop_watch()
+        if triggers is None:
+            triggers = self.triggers = TriggerIndex.from_levels(warm.levels, sig["breakout_threshold"], sig["vol_multiplier"])
+        triggers.save(TRIGGER_DIR / f"{warm.day:%Y%m%d}.npz")
+        meta = RunMeta(run_id=f"{warm.day:%Y%m%d}-watch", asof=datetime.now(UTC), mode=self.mode.value)
+        self._watch_journal = Journal(meta)
+        self._watch_journal.run(dry_run=self.dry_run, nav_usd=warm.nav_usd, fx_gbp_per_usd=warm.fx_gbp_per_usd)
+        self.stream = QuoteStream(self.client.ib, triggers, self.on_trigger)
+        return self.stream.start()
+
+    def on_trigger(self, slots: np.ndarray, px: np.ndarray) -> List[Submission]:
+        """Triggered index slots (priced at their last trade) -> brackets, through the regular targets path."""
+        warm, triggers = self.warm, self.triggers
+        if warm is None or triggers is None:
+            logger.error("Quote trigger without a prepared TriggerIndex; ignored")
+            return []
+        with span("trigger.decide"):
+            batch = triggers.targets(slots, px, self.nav_gbp, warm.fx_gbp_per_usd, **self._sizing())
+            last_prices = dict(zip(triggers.symbols[slots].tolist(), px.tolist()))
+            child_orders, subs = self._plan_and_submit(batch.to_targets(), last_prices)
+        logger.info(f"Triggered {', '.join(batch.symbols.tolist()) or '-'}: {len(subs)} brackets sent")
+        if self._watch_journal is not None:
+            self._watch_journal.signals(batch)
+            self._watch_journal.targets(child_orders, last_prices)
+            self._watch_journal.orders(subs)
+        return subs
+
+    def stop_watch(self) -> None:
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+        if self._watch_journal is not None:
+            self._watch_journal.__exit__(None, None, None)
+            self._watch_journal = None
+
+    # --- Scheduling ---
+
+    def schedule(
+        self,
+        scheduler: AsyncIOScheduler,
+        *,
+        prefetch_at: str,
+        decide_at: str,
+        watch_at: str | None = None,
+        heartbeat_min: int = 5,
+    ) -> None:
+        scheduler.add_job(self.prefetch, _cron(prefetch_at), id="prefetch", coalesce=True, misfire_grace_time=600)
+        if watch_at:
+            scheduler.add_job(self.watch, _cron(watch_at), id="watch", coalesce=True, misfire_grace_time=3600)
+        scheduler.add_job(self.decide, _cron(decide_at), id="decide", coalesce=True, misfire_grace_time=120)
+        scheduler.add_job(self.ensure_connected, "interval", minutes=heartbeat_min, id="heartbeat", coalesce=True)
+
+    def run(self, *, prefetch_at: str, decide_at: str, watch_at: str | None = None) -> None:
+        """Connect, schedule the jobs and serve forever on the IB event loop."""
+        ib_insync.util.patchAsyncio()  # blocking IB helpers (acks) are called from inside the jobs
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.ensure_connected())
+        scheduler = AsyncIOScheduler(event_loop=loop, timezone=MARKET_TZ)
+        self.schedule(scheduler, prefetch_at=prefetch_at, decide_at=decide_at, watch_at=watch_at)
+        scheduler.start()
+        for job in scheduler.get_jobs():
+            logger.info(f"Scheduled {job.id}: next run {job.next_run_time}")
+        try:
+            loop.run_forever()
+        finally:
+            scheduler.shutdown(wait=False)
+            self.stop_watch()
+            _close(self.client)
+
+
+def _cron(at: str) -> CronTrigger:
+    """Weekday trigger at 'HH:MM[:SS]' New York time (holidays are skipped inside the jobs)."""
+    h, m, *s = (int(x) for x in at.split(":"))
+    return CronTrigger(day_of_week="mon-fri", hour=h, minute=m, second=s[0] if s else 0, timezone=MARKET_TZ)
+
+
+@app.command()
+def main(
+    mode: Mode = typer.Option(Mode.paper, help="paper|live"),
+    dry_run: bool = typer.Option(False, help="Compute targets but do not submit orders"),
+    nav_gbp: float = typer.Option(500.0, help="Override NAV in GBP"),
+    days_back: int = typer.Option(60, help="Bars lookback window for signal calc (trading sessions)"),
+    prefetch_at: str = typer.Option("15:30", help="Prefetch time, New York (HH:MM[:SS])"),
+    decide_at: str = typer.Option("16:00:02", help="Decision time, New York (HH:MM[:SS])"),
+    poll: float = typer.Option(1.0, help="Seconds between polls for the session's final bars"),
+    watch_at: str = typer.Option(None, help="Also enter on live quote triggers from this time, New York (e.g. 09:30)"),
+):
+    """Run the EOD pipeline as a daemon: warm IB session, pre-close prefetch, scheduled decision."""
+    Daemon(mode=mode, dry_run=dry_run, nav_gbp=nav_gbp, days_back=days_back, poll=poll).run(
+        prefetch_at=prefetch_at, decide_at=decide_at, watch_at=watch_at
+    )
+
+
+if __name__ == "__main__":
+    app()
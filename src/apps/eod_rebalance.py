@@ -1,17 +1,27 @@
 from __future__ import annotations
 import asyncio
-from datetime import datetime, UTC, timedelta
+import cProfile
+import pstats
+from datetime import datetime, UTC
+from pathlib import Path
 from typing import Dict, List
 
 import typer
 from rich import print
 
 from src.core.config import load_settings
+from src.core.lazy import IMPORT_TIMES, import_profile
 from src.core.log import logger
-from src.core.types import Target
-from src.data.universe import build_universe
+from src.core.timeutils import sessions_back
+from src.core.journal import Journal, sync_fills
+from src.core.storage import ART
+from src.core.tracing import TRACER, count, span
+from src.core.types import Mode, RunMeta, Target
+from src.data.universe import build_universe, refresh_market
 from src.data import polygon as poly
-from src.strategy.pipeline import build_targets
+from src.data.store import BarStore
+from src.data.panel import Panel
+from src.strategy.pipeline import build_targets_batch
 from src.broker.ibkr_client import IbClient
 from src.broker.ibkr_exec import Executor
 from src.broker.reconciliation import fetch_positions, fetch_last_prices, plan_from_targets
@@ -20,26 +30,65 @@ from src.broker.fx import gbp_per_usd
 
 app = typer.Typer(add_completion=False)
 
+PROFILE_DIR = ART / "profiles"
+
 
 def _date_strs(days_back: int = 60) -> tuple[str, str]:
-    """Helper: get ISO start/end dates for Polygon fetch."""
+    """Helper: ISO start/end dates for Polygon fetch spanning the last `days_back` XNYS sessions up to today."""
     end = datetime.now(UTC).date()
-    start = end - timedelta(days=days_back)
+    start = sessions_back(days_back - 1, end).date()
     return start.isoformat(), end.isoformat()
 
 
 async def _fetch_bars(symbols: List[str], start: str, end: str):
-    """Concurrent daily OHLCV fetch for many symbols via Polygon."""
-    return await poly.agg_daily_many(symbols, start, end)
+    """Concurrent daily OHLCV fetch for many symbols via Polygon, served from the local bar store."""
+    return await poly.agg_daily_many(symbols, start, end, store=BarStore())
+
+
+def _print_startup_profile(top: int = 15) -> None:
+    """Import cost of this module (fresh interpreter), by package, plus lazy imports hit so far."""
+    total, ranked = import_profile(__spec__.name if __spec__ else "src.apps.eod_rebalance", top=top)
+    print(f"[bold]Startup import time: {total * 1e3:.0f} ms[/bold]")
+    for name, secs in ranked:
+        print(f"  {name:<36} {secs * 1e3:8.1f} ms")
+    for name, secs in IMPORT_TIMES.items():
+        print(f"  (lazy) {name:<29} {secs * 1e3:8.1f} ms")
+
+
+def _write_run_profile(meta: RunMeta, prom_textfile: Path | None) -> Path:
+    """Per-stage latency summary of this run as JSON (and optionally a Prometheus textfile)."""
+    path = TRACER.write_json(PROFILE_DIR / f"{meta.run_id}.json", run_id=meta.run_id, mode=meta.mode, asof=meta.asof)
+    stages = {k: v for k, v in TRACER.summary().items() if k.startswith("stage.")}
+    logger.info("Stages: " + " | ".join(f"{k[6:]}={v['total_s']:.2f}s" for k, v in stages.items()))
+    if prom_textfile is not None:
+        TRACER.write_prometheus(prom_textfile)
+    return path
+
+
+def _close(ibc: IbClient) -> None:
+    """Disconnect from IB and close this loop's Polygon client."""
+    ibc.ib.disconnect()
+    asyncio.get_event_loop().run_until_complete(poly.aclose())
+
+
+def _dump_cprofile(prof: cProfile.Profile, run_id: str, top: int = 25) -> Path:
+    path = PROFILE_DIR / f"{run_id}.prof"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    prof.dump_stats(str(path))
+    pstats.Stats(prof).sort_stats("cumulative").print_stats(top)
+    return path
 
 
 @app.command()
 def main(
-    mode: str = typer.Option("paper", help="paper|live"),
+    mode: Mode = typer.Option(Mode.paper, help="paper|live"),
     run_id: str = typer.Option(datetime.now(UTC).strftime("%Y%m%d")),
     dry_run: bool = typer.Option(False, help="Compute targets but do not submit orders"),
     nav_gbp: float = typer.Option(500.0, help="Override NAV in GBP (temporary until wired to IBKR)"),
-    days_back: int = typer.Option(60, help="Bars lookback window for signal calc"),
+    days_back: int = typer.Option(60, help="Bars lookback window for signal calc (trading sessions)"),
+    profile_startup: bool = typer.Option(False, help="Print an import-time breakdown of this app and exit"),
+    profile: bool = typer.Option(False, help="cProfile the run; stats go to artifacts/profiles/<run_id>.prof"),
+    prom_textfile: Path = typer.Option(None, help="Also write stage metrics as a Prometheus textfile here"),
 ):
     """
     EOD pipeline:
@@ -49,73 +98,118 @@ def main(
       4) Generate risk-sized breakout targets
       5) Reconcile vs positions and apply risk caps
       6) (Optional) Submit bracket orders to IBKR
+
+    Every run writes a span profile (count, p50/p95/max per stage and per-symbol step, bytes
+    fetched) to artifacts/profiles/<run_id>.json, also when it fails part-way.
     """
+    if profile_startup:
+        _print_startup_profile()
+        return
+
+    meta = RunMeta(run_id=run_id, asof=datetime.now(UTC), mode=mode.value)
+    TRACER.reset()
+    prof = cProfile.Profile() if profile else None
+    ibc = IbClient()
+    try:
+        with Journal(meta) as journal:
+            if prof is not None:
+                prof.enable()
+            with span("run"):
+                _rebalance(meta, journal, ibc, dry_run=dry_run, nav_gbp=nav_gbp, days_back=days_back)
+    finally:
+        _close(ibc)
+        if prof is not None:
+            prof.disable()
+            logger.info(f"cProfile stats written to {_dump_cprofile(prof, run_id)}")
+        logger.info(f"Run profile written to {_write_run_profile(meta, prom_textfile)}")
+
+
+def _rebalance(meta: RunMeta, journal: Journal, ibc: IbClient, *, dry_run: bool, nav_gbp: float, days_back: int) -> None:
+    run_id, mode = meta.run_id, meta.mode
     cfg = load_settings()
     print(f"[bold cyan]Volatility Breakout Bot[/bold cyan]  run_id={run_id}  mode={mode}")
 
     # 1) Connect to IBKR
-    ibc = IbClient()
-    asyncio.get_event_loop().run_until_complete(ibc.connect())
-    ex = Executor(ibc.ib)
+    with span("stage.connect"):
+        asyncio.get_event_loop().run_until_complete(ibc.connect())
+        ex = Executor(ibc.ib)
 
-    # NAV handling: for now we use CLI arg; later we’ll pull NetLiquidation directly from IBKR
-    nav_gbp_eff = float(nav_gbp)
-    fx_gbp_per_usd = gbp_per_usd()
-    nav_usd_eff = nav_gbp_eff / fx_gbp_per_usd
+        # NAV handling: for now we use CLI arg; later we’ll pull NetLiquidation directly from IBKR
+        nav_gbp_eff = float(nav_gbp)
+        fx_gbp_per_usd = gbp_per_usd()
+        nav_usd_eff = nav_gbp_eff / fx_gbp_per_usd
 
     logger.info(f"NAV (GBP)={nav_gbp_eff:.2f} | FX GBP/USD={fx_gbp_per_usd:.4f} | NAV (USD)={nav_usd_eff:.2f}")
+    # Fills of earlier runs' brackets that came in after those runs finished
+    with span("stage.fills"):
+        sync_fills(ex.executions())
+    journal.run(dry_run=dry_run, nav_usd=nav_usd_eff, fx_gbp_per_usd=fx_gbp_per_usd)
 
     # 2) Universe
-    symbols = build_universe(
-        min_price=cfg.strat.universe["min_price"],
-        min_atr_pct=cfg.strat.universe["min_atr_pct"],
-    )
+    with span("stage.universe"):
+        asof = asyncio.get_event_loop().run_until_complete(refresh_market())
+        symbols = build_universe(
+            min_price=cfg.strat.universe["min_price"],
+            min_atr_pct=cfg.strat.universe["min_atr_pct"],
+            min_adv_usd=cfg.strat.universe.get("min_adv_usd", 0.0),
+            min_avg_vol=cfg.strat.universe.get("min_avg_vol", 0.0),
+            asof=asof,
+        )
     if not symbols:
         print("[red]Universe is empty. Aborting.[/red]")
         raise typer.Exit(code=1)
     logger.info(f"Universe size={len(symbols)}")
+    journal.universe(symbols)
 
     # 3) Fetch bars (daily)
     start, end = _date_strs(days_back)
     logger.info(f"Fetching bars {start} → {end}")
-    bars_map = asyncio.get_event_loop().run_until_complete(_fetch_bars(symbols, start, end))
-
-    # 4) Generate targets
-    targets: List[Target] = []
-    for sym, df in bars_map.items():
-        ts = build_targets(
-            sym,
-            df,
-            nav_gbp=nav_gbp_eff,
-            fx_gbp_per_usd=fx_gbp_per_usd,
-            breakout_threshold=cfg.strat.signal["breakout_threshold"],
-            vol_multiplier=cfg.strat.signal["vol_multiplier"],
-            per_trade_risk=cfg.default.risk["per_trade_risk"],
-            stop_loss_pct=cfg.strat.execution["stop_loss_pct"],
-            trail_start_pct=cfg.strat.execution["trail_start_pct"],
-            trail_pct=cfg.strat.execution["trail_pct"],
-            entry_limit_pct=cfg.strat.execution["entry_limit_pct"],
-        )
-        if ts:
-            targets.extend(ts)
+    with span("stage.fetch"):
+        bars_map = asyncio.get_event_loop().run_until_complete(_fetch_bars(symbols, start, end))
+
+    # 4) Generate targets for the whole universe in one pass over the bar panel
+    with span("stage.targets"):
+        panel = Panel.from_frames(bars_map)
+        # Signals for every symbol come out of one vectorized pass, so they are timed as one span
+        with span("signals"):
+            batch = build_targets_batch(
+                panel,
+                nav_gbp=nav_gbp_eff,
+                fx_gbp_per_usd=fx_gbp_per_usd,
+                breakout_threshold=cfg.strat.signal["breakout_threshold"],
+                vol_multiplier=cfg.strat.signal["vol_multiplier"],
+                per_trade_risk=cfg.default.risk["per_trade_risk"],
+                stop_loss_pct=cfg.strat.execution["stop_loss_pct"],
+                trail_start_pct=cfg.strat.execution["trail_start_pct"],
+                trail_pct=cfg.strat.execution["trail_pct"],
+                entry_limit_pct=cfg.strat.execution["entry_limit_pct"],
+            )
+        targets: List[Target] = batch.to_targets()
+    count("symbols", len(bars_map))
+    count("signals", len(batch))
+    logger.info(f"Signals: {len(batch)} of {len(bars_map)} symbols")
+    journal.signals(batch)
 
     if not targets:
         print("[yellow]No signals today. Nothing to do.[/yellow]")
         return
 
     # 5) Reconciliation & risk caps
-    positions = fetch_positions(ibc.ib)                              # current holdings
-    last_prices = fetch_last_prices(ibc.ib, [t.symbol for t in targets])  # for dollar sizing
-    child_orders = plan_from_targets(
-        targets=targets,
-        cur_positions=positions,
-        last_prices=last_prices,
-        max_positions=cfg.default.risk["max_positions"],
-        max_gross_exposure=cfg.default.risk["max_gross_exposure"],
-        nav_usd=nav_usd_eff,
-        per_name_cap=cfg.default.risk.get("per_name_cap", None),
-    )
+    with span("stage.reconcile"):
+        positions = fetch_positions(ibc.ib)                              # current holdings
+        last_close = {s: float(df["close"].iloc[-1]) for s, df in bars_map.items() if df is not None and not df.empty}
+        last_prices = fetch_last_prices(ibc.ib, [t.symbol for t in targets], fallback=last_close)  # for dollar sizing
+        child_orders = plan_from_targets(
+            targets=targets,
+            cur_positions=positions,
+            last_prices=last_prices,
+            max_positions=cfg.default.risk["max_positions"],
+            max_gross_exposure=cfg.default.risk["max_gross_exposure"],
+            nav_usd=nav_usd_eff,
+            per_name_cap=cfg.default.risk.get("per_name_cap", None),
+        )
 
+    journal.targets(child_orders, last_prices)
     print(f"[yellow]Planned orders: {len(child_orders)}[/yellow]")
     for t in child_orders:
         px = last_prices.get(t.symbol, float("nan"))
@@ -125,16 +219,19 @@ def main(
         print("[green]Dry run or no orders; nothing submitted[/green]")
         return
 
-    # 6) Submit orders (entry + stop as bracket)
-    submitted = 0
-    for t in child_orders:
-        try:
-            ex.place_bracket(t)
-            submitted += 1
-        except Exception as e:
-            logger.error(f"Submit failed {t.symbol}: {e}")
-
-    print(f"[green]Run {run_id} completed. Submitted orders: {submitted}[/green]")
+    # 6) Submit orders (entry + stop as bracket), all at once; acks are collected afterwards
+    with span("stage.submit"):
+        subs = ex.place_brackets(child_orders)
+        journal.orders(subs)
+        ex.wait_acks(subs, timeout=5.0)
+    count("orders", len(subs))
+    journal.acks(subs)
+    journal.fills(ex.fills(subs))
+    lat = sorted(ms for ms in (s.latency_ms for s in subs) if ms is not None)
+    if lat:
+        logger.info(f"Acked {len(lat)}/{len(subs)} | ack latency p50={lat[len(lat) // 2]:.1f}ms max={lat[-1]:.1f}ms")
+
+    print(f"[green]Run {run_id} completed. Submitted orders: {len(subs)}[/green]")
 
 
 if __name__ == "__main__":
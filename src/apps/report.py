@@ -1,15 +1,69 @@
 from __future__ import annotations
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, UTC
+from typing import Dict
 import pandas as pd
+import typer
 from src.research.metrics import performance, cum_returns
+from src.research.bootstrap import confidence_intervals, default_block
+from src.research.attribution import attribution, daily_returns, strategy_config, update_attribution
 from src.core.config import load_settings
 from src.core.log import logger
+from src.core.timeutils import session_on_or_before, sessions_between
 
+app = typer.Typer(add_completion=False)
 
-def render_markdown(asof: str, daily_returns: pd.Series) -> str:
+
+_CI_LABELS = {
+    "ann_ret": ("Annualized Return", "{:.2%}"),
+    "sharpe": ("Sharpe", "{:.2f}"),
+    "sortino": ("Sortino", "{:.2f}"),
+    "max_dd": ("Max Drawdown", "{:.2%}"),
+    "calmar": ("Calmar", "{:.2f}"),
+}
+
+
+def _ci_table(daily_returns: pd.Series, n_resamples: int) -> str:
+    ci = confidence_intervals(daily_returns, n_resamples, method="block")
+    lines = ["| Metric | Estimate | 95% CI |", "|---|---|---|"]
+    for m, (label, fmt) in _CI_LABELS.items():
+        row = ci.loc[m]
+        lines.append(f"| {label} | {fmt.format(row.point)} | {fmt.format(row.lo)} … {fmt.format(row.hi)} |")
+    return "\n".join(lines)
+
+
+def _attr_table(df: pd.DataFrame, label: str) -> str:
+    lines = [f"| {label} | P&L | Contribution | Trades | Hit Rate | Exposure |", "|---|---|---|---|---|---|"]
+    for k, r in df.iterrows():
+        lines.append(
+            f"| {k} | {r.pnl:,.0f} | {r.contribution:.2%} | {int(r.trades)} | {r.hit_rate:.1%} | {r.exposure:.1%} |"
+        )
+    return "\n".join(lines)
+
+
+def _attribution_sections(attr: Dict[str, pd.DataFrame], top: int = 10) -> str:
+    by_sym = attr["symbol"].sort_values("pnl", ascending=False)
+    return f"""
+## Attribution — Top {top} Symbols
+{_attr_table(by_sym.head(top), "Symbol")}
+
+## Attribution — Bottom {top} Symbols
+{_attr_table(by_sym.tail(top).iloc[::-1], "Symbol")}
+
+## Attribution — Last 12 Months
+{_attr_table(attr["month"].tail(12), "Month")}
+
+## Attribution — By Year
+{_attr_table(attr["year"], "Year")}
+"""
+
+
+def render_markdown(
+    asof: str, daily_returns: pd.Series, n_resamples: int = 10_000, attr: Dict[str, pd.DataFrame] | None = None
+) -> str:
     perf = performance(daily_returns)
     cum = cum_returns(daily_returns)
+    n_days = int(daily_returns.notna().sum())
     start = daily_returns.index.min()
     end = daily_returns.index.max()
     body = f"""# Aggressive Volatility Breakout — Daily Report
@@ -26,40 +80,61 @@ def render_markdown(asof: str, daily_returns: pd.Series) -> str:
 - Win Rate: {perf.win_rate:.1%}  (n={perf.n_trades})
 - Avg Win / Avg Loss: {perf.avg_win:.2%} / {perf.avg_loss:.2%}
 
+## Confidence Intervals
+Block bootstrap of daily returns ({n_resamples:,} resamples, {default_block(n_days)}-day blocks).
+
+{_ci_table(daily_returns, n_resamples)}
+
 ## Last 10 Daily Returns
 {daily_returns.tail(10).to_string(float_format=lambda x: f"{x:.2%}")}
 
 ## Cumulative Return (table, last 10)
 {cum.tail(10).to_string(float_format=lambda x: f"{x:.2f}x")}
 """
+    if attr is not None:
+        body += _attribution_sections(attr)
     return body
 
 
+def report_path(asof: str) -> Path:
+    return Path(load_settings().default.report_dir) / asof / "report.md"
+
+
 def save_report(content: str, asof: str | None = None) -> Path:
-    cfg = load_settings().default
     asof = asof or datetime.utcnow().strftime("%Y-%m-%d")
-    out_dir = Path(cfg.report_dir) / asof
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "report.md"
+    out_path = report_path(asof)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(content)
     return out_path
 
 
-def main():
+@app.command()
+def main(
+    asof: str = typer.Option(datetime.now(UTC).strftime("%Y-%m-%d"), help="Last report date (YYYY-MM-DD)"),
+    since: str = typer.Option(None, help="Also render every session from this date (default: asof only)"),
+    nav_usd: float = typer.Option(100_000.0, help="Constant NAV the stored positions were sized with"),
+    n_resamples: int = typer.Option(10_000, help="Bootstrap resamples for the confidence intervals"),
+    force: bool = typer.Option(False, help="Re-render reports that already exist"),
+):
     """
-    Example usage: load a CSV of returns and write a report.
-    In production you’d call this from your nightly job passing the real daily PnL series.
+    Daily reports from stored positions (see `src.research.attribution`). New positions are
+    resolved into the trade cache first; sessions whose report already exists are skipped.
     """
-    # Example synthetic series for demo purposes:
-    idx = pd.date_range("2025-08-01", periods=22, freq="B")
-    import numpy as np
-    rng = np.random.default_rng(42)
-    daily = pd.Series(rng.normal(0.001, 0.01, size=len(idx)), index=idx, name="ret")
-
-    md = render_markdown(datetime.utcnow().strftime("%Y-%m-%d"), daily)
-    path = save_report(md)
-    logger.info(f"Report written to {path}")
+    cfg = strategy_config()
+    update_attribution(cfg)
+    end = session_on_or_before(asof)
+    days = sessions_between(since, end) if since else pd.DatetimeIndex([end])
+    todo = [d.strftime("%Y-%m-%d") for d in days if force or not report_path(d.strftime("%Y-%m-%d")).exists()]
+    logger.info(f"Reports: {len(todo)} to render, {len(days) - len(todo)} already rendered")
+    for d in todo:
+        daily = daily_returns(cfg, nav_usd=nav_usd, end=d)
+        if daily.empty:
+            logger.warning(f"{d}: no resolved positions; skipped")
+            continue
+        attr = {by: attribution(cfg, by=by, nav_usd=nav_usd, end=d) for by in ("symbol", "month", "year")}
+        path = save_report(render_markdown(d, daily, n_resamples, attr=attr), d)
+        logger.info(f"Report written to {path}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    app()
\ No newline at end of file
@@ -1,11 +1,13 @@
-from ib_insync import IB
 from src.core.config import load_settings
+from src.core.lazy import lazy_import
 from src.core.log import logger
 
+ib_insync = lazy_import("ib_insync")
+
 class IbClient:
     def __init__(self):
         self.cfg = load_settings().ibkr
-        self.ib = IB()
+        self.ib = ib_insync.IB()
 
     async def connect(self):
         logger.info(f"Connecting IBKR {self.cfg.host}:{self.cfg.port} cid={self.cfg.clientId}")
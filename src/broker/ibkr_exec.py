@@ -1,7 +1,52 @@
-from ib_insync import IB, Stock, LimitOrder, StopOrder
-from src.core.types import Target
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List
+
+from src.core.types import Fill, Target
 from src.core.config import load_settings
+from src.core.lazy import lazy_import
 from src.core.log import logger
+from src.core.tracing import span
+
+if TYPE_CHECKING:
+    from ib_insync import IB, Stock, LimitOrder, StopOrder, Trade
+
+ib_insync = lazy_import("ib_insync")
+
+# Statuses that mean TWS has not seen the order yet (ib_insync.OrderStatus values)
+_UNACKED = {"PendingSubmit", "ApiPending"}
+
+
+@dataclass
+class Submission:
+    """One bracket sent to IB; `acked_at` is filled in asynchronously from order status events."""
+    symbol: str
+    parent_id: int
+    stop_id: int
+    sent_at: float
+    status: str = "PendingSubmit"
+    acked_at: float | None = None
+
+    @property
+    def acked(self) -> bool:
+        return self.acked_at is not None
+
+    @property
+    def latency_ms(self) -> float | None:
+        return None if self.acked_at is None else (self.acked_at - self.sent_at) * 1e3
+
+
+def to_fill(f) -> Fill:
+    """An ib_insync fill as a `Fill` (qty < 0 for sells)."""
+    return Fill(
+        order_id=str(f.execution.orderId),
+        symbol=f.contract.symbol,
+        qty=int(f.execution.shares) * (1 if f.execution.side == "BOT" else -1),
+        avg_price=float(f.execution.price),
+        ts=f.time,
+    )
+
 
 class Executor:
     def __init__(self, ib: IB):
@@ -9,25 +54,97 @@ class Executor:
         self.venue = load_settings().ibkr
 
     def stock(self, symbol: str) -> Stock:
-        return Stock(symbol, "SMART", self.venue.currency, primaryExchange=self.venue.primaryExchange)
+        return ib_insync.Stock(symbol, "SMART", self.venue.currency, primaryExchange=self.venue.primaryExchange)
 
-    def place_bracket(self, t: Target):
-        c = self.stock(t.symbol)
-        entry = LimitOrder("BUY" if t.qty>0 else "SELL", abs(t.qty), t.entry_limit)
+    def _bracket(self, t: Target) -> tuple[LimitOrder, StopOrder]:
+        """Entry + protective stop with pre-allocated IDs; only the stop transmits the pair."""
+        entry = ib_insync.LimitOrder("BUY" if t.qty>0 else "SELL", abs(t.qty), t.entry_limit)
         entry.tif = "DAY"
         entry.account = self.venue.account
+        entry.orderId = self.ib.client.getReqId()
+        entry.transmit = False
 
-        stop = StopOrder("SELL", abs(t.qty), t.stop_loss) if t.qty>0 else StopOrder("BUY", abs(t.qty), t.stop_loss)
+        stop = ib_insync.StopOrder("SELL", abs(t.qty), t.stop_loss) if t.qty>0 else ib_insync.StopOrder("BUY", abs(t.qty), t.stop_loss)
         stop.tif = "DAY"
         stop.account = self.venue.account
+        stop.orderId = self.ib.client.getReqId()
+        stop.parentId = entry.orderId
+        stop.transmit = True
+        return entry, stop
+
+    def place_brackets(self, targets: List[Target]) -> List[Submission]:
+        """
+        Send every bracket without waiting on any of them. Acknowledgements are tracked
+        through each parent trade's status events; see `wait_acks`.
+        """
+        subs: List[Submission] = []
+        for t in targets:
+            try:
+                sub = self._send(t)
+            except Exception as e:
+                logger.error(f"Submit failed {t.symbol}: {e}")
+                continue
+            subs.append(sub)
+            logger.info(
+                f"Bracket sent {t.symbol} oid={sub.parent_id} qty={t.qty} "
+                f"limit={t.entry_limit:.2f} stop={t.stop_loss:.2f}"
+            )
+        return subs
+
+    def _send(self, t: Target) -> Submission:
+        """
+        Place one bracket. If the stop cannot be placed, the parent (held back with
+        transmit=False) is cancelled before the error propagates, so it is not left orphaned.
+        """
+        with span("submit.order"):
+            c = self.stock(t.symbol)
+            entry, stop = self._bracket(t)
+            sub = Submission(t.symbol, entry.orderId, stop.orderId, sent_at=time.perf_counter())
+            trade = self.ib.placeOrder(c, entry)
+            trade.statusEvent += self._on_status(sub)
+            try:
+                self.ib.placeOrder(c, stop)
+            except Exception:
+                self.ib.cancelOrder(entry)
+                raise
+        return sub
+
+    @staticmethod
+    def _on_status(sub: Submission):
+        def handler(trade: Trade) -> None:
+            sub.status = trade.orderStatus.status
+            if sub.acked_at is None and sub.status not in _UNACKED:
+                sub.acked_at = time.perf_counter()
+        return handler
+
+    def wait_acks(self, subs: List[Submission], timeout: float = 5.0) -> List[Submission]:
+        """Pump IB events until every submission is acknowledged or `timeout` elapses; returns the unacked."""
+        deadline = time.perf_counter() + timeout
+        pending = [s for s in subs if not s.acked]
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.ib.waitOnUpdate(timeout=remaining)
+            pending = [s for s in pending if not s.acked]
+        for s in pending:
+            logger.warning(f"No ack for {s.symbol} oid={s.parent_id} status={s.status}")
+        return pending
+
+    def fills(self, subs: List[Submission]) -> List[Fill]:
+        """Executions IB has reported this session for the given brackets (qty < 0 for sells)."""
+        ids = {s.parent_id for s in subs} | {s.stop_id for s in subs}
+        return [to_fill(f) for f in self.ib.fills() if f.execution.orderId in ids]
 
-        trade = self.ib.placeOrder(c, entry)
-        self.ib.sleep(0.1)
-        self.ib.waitOnUpdate(timeout=5)
-        oid = trade.order.orderId
-        logger.info(f"Entry submitted {t.symbol} oid={oid} qty={t.qty} limit={t.entry_limit:.2f}")
+    def executions(self) -> List[Fill]:
+        """
+        Every execution TWS still holds for the account (`reqExecutions`: today's, or as many
+        days as TWS is set to keep), including fills of brackets sent by earlier runs.
+        """
+        return [to_fill(f) for f in self.ib.reqExecutions()]
 
-        stop.parentId = oid
-        trade_sl = self.ib.placeOrder(c, stop)
-        logger.info(f"Stop submitted {t.symbol} parent={oid} stop={t.stop_loss:.2f}")
-        return oid
\ No newline at end of file
+    def place_bracket(self, t: Target) -> int:
+        """Place one bracket and return the parent order id; submission errors are raised."""
+        sub = self._send(t)
+        logger.info(f"Bracket sent {t.symbol} oid={sub.parent_id} qty={t.qty}")
+        return sub.parent_id
@@ -0,0 +1,116 @@
+from __future__ import annotations
+import asyncio
+import math
+import time
+from typing import TYPE_CHECKING, Dict, List, Mapping, Tuple
+
+from src.core.config import load_settings
+from src.core.lazy import lazy_import
+from src.core.log import logger
+
+if TYPE_CHECKING:
+    from ib_insync import IB, Ticker
+
+ib_insync = lazy_import("ib_insync")
+
+# symbol -> (price, monotonic time fetched); shared so repeated snapshots in one run reuse prices
+_CACHE: Dict[str, Tuple[float, float]] = {}
+
+
+def ticker_price(t: Ticker) -> float | None:
+    """Best available price from a snapshot: market price (mid/last), then last, then close."""
+    mp = t.marketPrice()
+    if mp and not math.isnan(mp):
+        return float(mp)
+    if t.last and t.last > 0:
+        return float(t.last)
+    if t.close and t.close > 0:
+        return float(t.close)
+    return None
+
+
+class PriceSnapshots:
+    """
+    Snapshot prices for many symbols: requests go out in chunks (at most `inflight` at once,
+    so chunk x inflight stays within the market-data line limit), everything must land by a
+    single `timeout` deadline, and prices are cached for `ttl` seconds. Symbols IB does not
+    price in time get `fallback` (e.g. the last stored close) instead.
+    """
+
+    def __init__(
+        self,
+        ib: IB,
+        *,
+        chunk: int | None = None,
+        inflight: int | None = None,
+        timeout: float | None = None,
+        ttl: float | None = None,
+        cache: Dict[str, Tuple[float, float]] | None = None,
+    ):
+        venue = load_settings().ibkr
+        self.ib = ib
+        self.venue = venue
+        self.chunk = max(1, chunk or venue.snapshot_chunk)
+        self.inflight = max(1, inflight or venue.snapshot_inflight)
+        self.timeout = venue.snapshot_timeout if timeout is None else timeout
+        self.ttl = venue.price_ttl if ttl is None else ttl
+        self.cache = _CACHE if cache is None else cache
+
+    def _cached(self, symbols: List[str]) -> Dict[str, float]:
+        now = time.monotonic()
+        return {s: self.cache[s][0] for s in symbols if s in self.cache and now - self.cache[s][1] <= self.ttl}
+
+    async def _chunk(self, sem: asyncio.Semaphore, symbols: List[str], out: Dict[str, float]) -> None:
+        contracts = [
+            ib_insync.Stock(s, "SMART", self.venue.currency, primaryExchange=self.venue.primaryExchange)
+            for s in symbols
+        ]
+        async with sem:
+            tickers = await self.ib.reqTickersAsync(*contracts)
+        now = time.monotonic()
+        for t in tickers:
+            px = ticker_price(t)
+            if px is not None and t.contract is not None:
+                out[t.contract.symbol] = px
+                self.cache[t.contract.symbol] = (px, now)
+
+    async def fetch_async(self, symbols: List[str], fallback: Mapping[str, float] | None = None) -> Dict[str, float]:
+        symbols = list(dict.fromkeys(symbols))
+        prices = self._cached(symbols)
+        todo = [s for s in symbols if s not in prices]
+        if todo:
+            sem = asyncio.Semaphore(self.inflight)
+            fresh: Dict[str, float] = {}
+            tasks = [
+                asyncio.ensure_future(self._chunk(sem, todo[i:i + self.chunk], fresh))
+                for i in range(0, len(todo), self.chunk)
+            ]
+            done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                if task.exception() is not None:
+                    logger.warning(f"Snapshot chunk failed: {task.exception()}")
+            if pending:
+                logger.warning(f"{len(pending)}/{len(tasks)} snapshot chunks missed the {self.timeout:.1f}s deadline")
+            prices.update(fresh)
+
+        missing = [s for s in symbols if s not in prices]
+        fallback = fallback or {}
+        used = [s for s in missing if fallback.get(s, 0) > 0]
+        for s in used:
+            prices[s] = float(fallback[s])
+        if used:
+            logger.info(f"Last-close fallback for {len(used)} symbols")
+        if len(used) < len(missing):
+            logger.warning(f"No price for {len(missing) - len(used)} symbols")
+        return prices
+
+    def fetch(self, symbols: List[str], fallback: Mapping[str, float] | None = None) -> Dict[str, float]:
+        """Blocking `fetch_async` for synchronous callers; code running on an event loop must await that instead."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.get_event_loop().run_until_complete(self.fetch_async(symbols, fallback))
+        raise RuntimeError("PriceSnapshots.fetch called from a running event loop; await fetch_async instead")
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import math
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+import numpy as np
+
+from src.core.config import load_settings
+from src.core.lazy import lazy_import
+from src.core.log import logger
+from src.core.tracing import count
+from src.strategy.triggers import TriggerIndex
+
+if TYPE_CHECKING:
+    from ib_insync import IB, Contract, Ticker
+
+ib_insync = lazy_import("ib_insync")
+
+
+def _session_high(t: Ticker) -> float:
+    """Day high so far, including a last print the high tick has not caught up with (NaN if neither)."""
+    hi, last = t.high, t.last
+    return last if hi != hi or last > hi else hi
+
+
+class QuoteStream:
+    """
+    Streaming IB quotes for the symbols of a `TriggerIndex`. Each pending ticker costs a dict
+    lookup and `TriggerIndex.on_quote`; slots that trigger in an update are handed to
+    `on_trigger(slots, prices)` together, priced at their last trade. Every symbol takes a
+    market-data line, so the account's line allowance caps how many can be watched.
+    """
+
+    def __init__(
+        self,
+        ib: IB,
+        index: TriggerIndex,
+        on_trigger: Callable[[np.ndarray, np.ndarray], object],
+        *,
+        volume_scale: float | None = None,
+    ):
+        venue = load_settings().ibkr
+        self.ib, self.index, self.on_trigger = ib, index, on_trigger
+        self.venue = venue
+        self.volume_scale = venue.quote_volume_scale if volume_scale is None else volume_scale
+        self.tickers: Dict[str, Ticker] = {}
+        self.contracts: Dict[str, Contract] = {}  # as subscribed, to cancel with
+
+    def start(self, symbols: List[str] | None = None) -> int:
+        """Subscribe (all indexed symbols that can still trigger, by default); returns lines used."""
+        if symbols is None:
+            live = np.isfinite(self.index.level) & ~self.index.fired
+            symbols = self.index.symbols[live].tolist()
+        for s in symbols:
+            if s in self.tickers:
+                continue
+            c = ib_insync.Stock(s, "SMART", self.venue.currency, primaryExchange=self.venue.primaryExchange)
+            self.contracts[s] = c
+            self.tickers[s] = self.ib.reqMktData(c, "", False, False)
+        self.ib.pendingTickersEvent += self.on_tickers
+        logger.info(f"Streaming quotes for {len(self.tickers)} symbols")
+        return len(self.tickers)
+
+    def stop(self) -> None:
+        self.ib.pendingTickersEvent -= self.on_tickers
+        for c in self.contracts.values():
+            self.ib.cancelMktData(c)
+        self.tickers.clear()
+        self.contracts.clear()
+
+    def on_tickers(self, tickers) -> List[int]:
+        slot, scale, index = self.index.slot, self.volume_scale, self.index
+        fired: List[int] = []
+        prices: List[float] = []
+        for t in tickers:
+            i = slot.get(t.contract.symbol)
+            if i is not None and index.on_quote(i, _session_high(t), t.volume * scale):
+                fired.append(i)
+                prices.append(t.last if not math.isnan(t.last) else _session_high(t))
+        count("quotes", len(tickers))
+        if fired:
+            count("triggers", len(fired))
+            self.on_trigger(np.asarray(fired, dtype=np.int64), np.asarray(prices))
+        return fired
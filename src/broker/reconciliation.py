@@ -1,12 +1,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
-from ib_insync import IB, Contract, Stock
+from typing import TYPE_CHECKING, Dict, List
 import math
 from src.core.types import Target
-from src.core.config import load_settings
+from src.broker.prices import PriceSnapshots
 from src.core.log import logger
 
+if TYPE_CHECKING:
+    from ib_insync import IB
+
 
 @dataclass
 class PositionSnapshot:
@@ -16,10 +18,6 @@ class PositionSnapshot:
     currency: str
 
 
-def _contract(symbol: str, currency: str = "USD", primary: str = "SMART") -> Contract:
-    return Stock(symbol, "SMART", currency, primaryExchange=primary)
-
-
 def fetch_positions(ib: IB) -> Dict[str, PositionSnapshot]:
     """
     Returns {symbol -> PositionSnapshot}. Works for both paper and live.
@@ -37,25 +35,19 @@ def fetch_positions(ib: IB) -> Dict[str, PositionSnapshot]:
     return snap
 
 
-def fetch_last_prices(ib: IB, symbols: List[str]) -> Dict[str, float]:
+def fetch_last_prices(ib: IB, symbols: List[str], fallback: Dict[str, float] | None = None) -> Dict[str, float]:
     """
-    Lightweight price fetch via reqMktData snapshot (no streaming).
+    Snapshot prices via reqTickers, chunked, deadline-bounded and cached (see PriceSnapshots);
+    symbols IB doesn't price in time use `fallback` (e.g. last stored close).
     """
-    prices: Dict[str, float] = {}
-    cfg = load_settings().ibkr
-    contracts = [_contract(s, currency=cfg.currency, primary=cfg.primaryExchange) for s in symbols]
-    tickers = ib.reqTickers(*contracts)
-    for t in tickers:
-        mid = None
-        if t.marketPrice() and not math.isnan(t.marketPrice()):
-            mid = float(t.marketPrice())
-        elif t.last and t.last > 0:
-            mid = float(t.last)
-        elif t.close and t.close > 0:
-            mid = float(t.close)
-        if mid is not None:
-            prices[t.contract.symbol] = mid
-    return prices
+    return PriceSnapshots(ib).fetch(symbols, fallback)
+
+
+async def fetch_last_prices_async(
+    ib: IB, symbols: List[str], fallback: Dict[str, float] | None = None
+) -> Dict[str, float]:
+    """`fetch_last_prices` for callers already running on the IB event loop."""
+    return await PriceSnapshots(ib).fetch_async(symbols, fallback)
 
 
 def fetch_nav_gbp(ib: IB) -> float | None:
@@ -11,6 +11,13 @@ class IBKRConfig(BaseModel):
     account: str
     primaryExchange: str = "SMART"
     currency: str = "USD"
+    # Price snapshots: symbols per reqTickers call, concurrent calls, overall deadline (s), cache TTL (s)
+    snapshot_chunk: int = 50
+    snapshot_inflight: int = 2
+    snapshot_timeout: float = 5.0
+    price_ttl: float = 60.0
+    # Streaming quotes: IB reports US stock day volume in lots of 100
+    quote_volume_scale: float = 100.0
 
 class DefaultConfig(BaseModel):
     base_ccy: str
@@ -23,10 +30,20 @@ class StratConfig(BaseModel):
     signal: dict
     execution: dict
 
+class PolygonConfig(BaseModel):
+    api_key_env: str = "POLYGON_API_KEY"
+    base_url: str = "https://api.polygon.io"
+    rate_per_sec: float = 50.0
+    burst: int = 20
+    max_concurrency: int = 16
+    min_concurrency: int = 2
+    timeout: float = 30.0
+
 class Settings(BaseModel):
     default: DefaultConfig
     ibkr: IBKRConfig
     strat: StratConfig
+    polygon: PolygonConfig = PolygonConfig()
 
 
 def load_yaml(path: str) -> dict:
@@ -34,10 +51,26 @@ def load_yaml(path: str) -> dict:
         return yaml.safe_load(f)
 
 
-def load_settings() -> Settings:
+_SETTINGS: Settings | None = None
+
+
+def load_settings(reload: bool = False) -> Settings:
+    """Parsed settings, read from disk once per process (pass reload=True to re-read)."""
+    global _SETTINGS
+    if _SETTINGS is None or reload:
+        _SETTINGS = _read_settings()
+    return _SETTINGS
+
+
+def reload_settings() -> Settings:
+    return load_settings(reload=True)
+
+
+def _read_settings() -> Settings:
     default = load_yaml("config/default.yaml")
     ibkr = load_yaml("config/venues/ibkr.yaml")
     strat = load_yaml("config/strategy/vobreakout.yaml")
+    polygon = load_yaml("config/data/polygon.yaml") or {}
     # env override
     for k in ("host", "port", "clientId", "account"):
         env = os.getenv(f"IB_{k.upper()}")
@@ -46,4 +79,9 @@ def load_settings() -> Settings:
                 ibkr[k] = int(env)
             else:
                 ibkr[k] = env
-    return Settings(default=DefaultConfig(**default), ibkr=IBKRConfig(**ibkr), strat=StratConfig(**strat))
+    return Settings(
+        default=DefaultConfig(**default),
+        ibkr=IBKRConfig(**ibkr),
+        strat=StratConfig(**strat),
+        polygon=PolygonConfig(**polygon),
+    )
@@ -0,0 +1,244 @@
+from __future__ import annotations
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core.log import logger
+from src.core.storage import ART, get_con
+from src.core.types import Fill, RunMeta, Target
+
+_TS = pa.timestamp("us", tz="UTC")
+# Fixed per-table schemas so every file of a table unions positionally (no per-file schema reads)
+SCHEMAS = {
+    "runs": pa.schema([("asof", _TS), ("mode", pa.string()), ("dry_run", pa.bool_()), ("nav_usd", pa.float64()),
+                       ("fx_gbp_per_usd", pa.float64())]),
+    "universe": pa.schema([("symbol", pa.string()), ("rank", pa.int32())]),
+    "signals": pa.schema([("symbol", pa.string()), ("qty", pa.int64())]
+                         + [(c, pa.float64()) for c in ("entry_limit", "stop_loss", "trail_start")]),
+    "targets": pa.schema([("symbol", pa.string()), ("side", pa.string()), ("qty", pa.int64())]
+                         + [(c, pa.float64()) for c in ("entry_limit", "stop_loss", "trail_start", "trail_pct")]
+                         + [("tag", pa.string()), ("ref_px", pa.float64())]),
+    "orders": pa.schema([("symbol", pa.string()), ("parent_id", pa.int64()), ("stop_id", pa.int64()), ("sent", _TS)]),
+    "acks": pa.schema([("symbol", pa.string()), ("parent_id", pa.int64()), ("status", pa.string()),
+                       ("latency_ms", pa.float64())]),
+    "fills": pa.schema([("order_id", pa.string()), ("symbol", pa.string()), ("qty", pa.int64()),
+                        ("avg_price", pa.float64()), ("ts", _TS)]),
+}
+SCHEMAS = {k: v.append(pa.field("run_id", pa.string())) for k, v in SCHEMAS.items()}
+TABLES = tuple(SCHEMAS)
+
+
+class Journal:
+    """
+    Append-only record of one run: rows are buffered in memory while the run goes and written
+    on `flush` as one Parquet file per table under artifacts/journal/{table}/month={YYYY-MM}/,
+    so recording costs a list append on the hot path. Leaving the `with` block also compacts
+    the month's files into one, which keeps DuckDB scans to a file per table per month.
+    """
+
+    def __init__(self, meta: RunMeta, root: Path | str | None = None):
+        self.meta = meta
+        self.root = Path(root) if root is not None else ART / "journal"
+        self._rows: Dict[str, List[dict]] = {t: [] for t in TABLES}
+        self._cols: Dict[str, List[dict]] = {t: [] for t in TABLES}
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.flush():
+            compact_journal(self.root, self._month())
+
+    # --- Recording ---
+
+    def record(self, table: str, rows: Iterable[dict]) -> None:
+        self._rows[table].extend(rows)
+
+    def record_columns(self, table: str, **columns) -> None:
+        """Columnar batch (equal-length arrays), e.g. straight from a TargetBatch."""
+        self._cols[table].append(columns)
+
+    def run(self, *, dry_run: bool, nav_usd: float, fx_gbp_per_usd: float) -> None:
+        self.record("runs", [{
+            "asof": self.meta.asof, "mode": self.meta.mode, "dry_run": dry_run,
+            "nav_usd": nav_usd, "fx_gbp_per_usd": fx_gbp_per_usd,
+        }])
+
+    def universe(self, symbols: List[str]) -> None:
+        self.record_columns("universe", symbol=list(symbols), rank=list(range(len(symbols))))
+
+    def signals(self, batch) -> None:
+        """Sized breakout signals (a `TargetBatch`), before reconciliation."""
+        self.record_columns(
+            "signals", symbol=batch.symbols.tolist(), qty=batch.qty, entry_limit=batch.entry_limit,
+            stop_loss=batch.stop_loss, trail_start=batch.trail_start,
+        )
+
+    def targets(self, targets: List[Target], last_prices: Dict[str, float]) -> None:
+        """Targets after reconciliation and risk caps, with the price they were sized at."""
+        self.record("targets", [{**t.model_dump(), "ref_px": last_prices.get(t.symbol)} for t in targets])
+
+    def orders(self, subs) -> None:
+        """`Submission`s as sent (wall-clock time, parent and stop order ids)."""
+        now = pd.Timestamp.now(tz="UTC")
+        self.record("orders", [{"symbol": s.symbol, "parent_id": s.parent_id, "stop_id": s.stop_id, "sent": now} for s in subs])
+
+    def acks(self, subs) -> None:
+        self.record("acks", [
+            {"symbol": s.symbol, "parent_id": s.parent_id, "status": s.status, "latency_ms": s.latency_ms} for s in subs
+        ])
+
+    def fills(self, fills: List[Fill]) -> None:
+        self.record("fills", [f.model_dump() for f in fills])
+
+    # --- Writing ---
+
+    def _table(self, name: str) -> pa.Table | None:
+        schema, run_id = SCHEMAS[name], self.meta.run_id
+        parts = [
+            pa.Table.from_pydict({**c, "run_id": [run_id] * len(next(iter(c.values())))}, schema=schema)
+            for c in self._cols[name]
+        ]
+        if self._rows[name]:
+            parts.append(pa.Table.from_pylist([{**r, "run_id": run_id} for r in self._rows[name]], schema=schema))
+        parts = [p for p in parts if p.num_rows]
+        return pa.concat_tables(parts) if parts else None
+
+    def _month(self) -> str:
+        return self.meta.asof.strftime("%Y-%m")
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns rows written."""
+        stamp = f"{self.meta.run_id}-{time.time_ns()}"
+        n = 0
+        for name in TABLES:
+            tbl = self._table(name)
+            self._rows[name], self._cols[name] = [], []
+            if tbl is None:
+                continue
+            d = self.root / name / f"month={self._month()}"
+            d.mkdir(parents=True, exist_ok=True)
+            pq.write_table(tbl, d / f"{stamp}.parquet")
+            n += tbl.num_rows
+        if n:
+            logger.debug(f"Journal: {n} rows for run {self.meta.run_id}")
+        return n
+
+
+def compact_journal(root: Path | str | None = None, month: str | None = None) -> int:
+    """
+    Merge the files of each month partition (or just `month`) into one file per table;
+    returns partitions rewritten. The merged file is renamed into place before the parts are
+    removed, so a concurrent reader can at worst see rows twice, never lose them.
+    """
+    root = Path(root) if root is not None else ART / "journal"
+    pattern = f"month={month}" if month else "month=*"
+    n = 0
+    for name in TABLES:
+        for d in (root / name).glob(pattern):
+            parts = sorted(d.glob("*.parquet"))
+            if len(parts) < 2:
+                continue
+            tbl = pa.concat_tables([pq.read_table(p, partitioning=None, schema=SCHEMAS[name]) for p in parts])
+            out = d / f"compacted-{time.time_ns()}.parquet"
+            tmp = out.with_suffix(".tmp")
+            pq.write_table(tbl, tmp)
+            os.replace(tmp, out)
+            for p in parts:
+                p.unlink()
+            n += 1
+    return n
+
+
+# --- Queries ---
+
+def register_journal(root: Path | str | None = None) -> List[str]:
+    """Expose each journal table with files as a DuckDB view `journal_{table}`; returns the views created."""
+    root = Path(root) if root is not None else ART / "journal"
+    views = []
+    for name in TABLES:
+        if not any((root / name).glob("*/*.parquet")):
+            continue
+        glob = (root / name / "*" / "*.parquet").as_posix()
+        get_con().execute(
+            f"CREATE OR REPLACE VIEW journal_{name} AS "
+            f"SELECT * FROM read_parquet('{glob}', hive_partitioning = true)"
+        )
+        views.append(f"journal_{name}")
+    return views
+
+
+def sync_fills(fills: List[Fill], root: Path | str | None = None) -> int:
+    """
+    Journal executions that arrived after their run stopped listening (entries filled late,
+    stops hit on a later day) under the run that sent the bracket: each is matched to a
+    journaled order by parent or stop order id and appended under that run_id, in the run's
+    month. Executions of unknown orders and ones already journaled are skipped, so feeding
+    the same `Executor.executions` twice is harmless. Returns fills added.
+    """
+    root = Path(root) if root is not None else ART / "journal"
+    views = set(register_journal(root))
+    if not fills or not {"journal_orders", "journal_runs"} <= views:
+        return 0
+    seen = (
+        "AND NOT EXISTS (SELECT 1 FROM journal_fills f WHERE f.run_id = m.run_id AND f.order_id = m.order_id"
+        " AND f.ts = m.ts AND f.qty = m.qty)"
+        if "journal_fills" in views else ""
+    )
+    con = get_con()
+    con.register("_sync_fills", pd.DataFrame([f.model_dump() for f in fills]))
+    try:
+        new = con.execute(
+            f"""
+            WITH ids AS (
+                SELECT parent_id AS oid, run_id, sent FROM journal_orders
+                UNION ALL SELECT stop_id, run_id, sent FROM journal_orders
+            ), m AS (
+                -- IB reuses order ids across client sessions: take the latest run that sent one
+                SELECT n.*, ids.run_id FROM _sync_fills n JOIN ids ON ids.oid = CAST(n.order_id AS BIGINT)
+                QUALIFY row_number() OVER (PARTITION BY n.order_id, n.ts, n.qty ORDER BY ids.sent DESC) = 1
+            )
+            SELECT m.*, r."asof", r."mode" FROM m
+            JOIN (SELECT run_id, min("asof") AS "asof", any_value("mode") AS "mode" FROM journal_runs GROUP BY run_id) r
+                USING (run_id)
+            WHERE true {seen}
+            """
+        ).df()
+    finally:
+        con.unregister("_sync_fills")
+    for (run_id, asof, mode), rows in new.groupby(["run_id", "asof", "mode"], sort=False):
+        with Journal(RunMeta(run_id=run_id, asof=asof, mode=mode), root) as j:
+            j.fills([Fill(**r) for r in rows[list(Fill.model_fields)].to_dict("records")])
+    if len(new):
+        logger.info(f"Journaled {len(new)} late fills for {new['run_id'].nunique()} runs")
+    return len(new)
+
+
+def slippage_by_symbol(since: str | None = None, root: Path | str | None = None) -> pd.DataFrame:
+    """
+    Share-weighted entry-fill slippage vs. the sizing price, in bps (positive = worse than
+    planned), per symbol for fills on or after `since` (default: six months back).
+    """
+    if not {"journal_fills", "journal_orders", "journal_targets"} <= set(register_journal(root)):
+        return pd.DataFrame(columns=["fills", "shares", "slippage_bps"], index=pd.Index([], name="symbol"))
+    start = pd.Timestamp(since) if since else pd.Timestamp.now() - pd.DateOffset(months=6)
+    return get_con().execute(
+        """
+        SELECT o.symbol, count(*) AS fills, sum(abs(f.qty)) AS shares,
+               sum((f.avg_price / t.ref_px - 1) * CASE t.side WHEN 'BUY' THEN 1 ELSE -1 END * abs(f.qty))
+                   / sum(abs(f.qty)) * 1e4 AS slippage_bps
+        FROM journal_fills f
+        JOIN journal_orders o ON o.run_id = f.run_id AND o.parent_id = CAST(f.order_id AS BIGINT)
+        JOIN journal_targets t ON t.run_id = o.run_id AND t.symbol = o.symbol
+        -- month partitions prune whole files before the joins
+        WHERE f.ts >= $1 AND f.month >= $2 AND o.month >= $2 AND t.month >= $2 AND t.ref_px > 0
+        GROUP BY o.symbol
+        ORDER BY slippage_bps DESC
+        """,
+        [start.to_pydatetime(), start.strftime("%Y-%m")],
+    ).df().set_index("symbol")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+import importlib
+import re
+import subprocess
+import sys
+import time
+import types
+from typing import Dict, List, Tuple
+
+# Seconds spent importing each lazily-loaded module, in load order
+IMPORT_TIMES: Dict[str, float] = {}
+
+
+class _LazyModule(types.ModuleType):
+    """Module proxy that performs the real import on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_mod"] = None
+
+    def _load(self) -> types.ModuleType:
+        mod = self.__dict__["_lazy_mod"]
+        if mod is None:
+            t0 = time.perf_counter()
+            mod = importlib.import_module(self.__name__)
+            IMPORT_TIMES.setdefault(self.__name__, time.perf_counter() - t0)
+            self.__dict__["_lazy_mod"] = mod
+        return mod
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return `name` if already imported, else a proxy that imports it on first use."""
+    mod = sys.modules.get(name)
+    return mod if mod is not None else _LazyModule(name)
+
+
+def import_profile(module: str, top: int = 15) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Import `module` in a fresh interpreter under `-X importtime` and return
+    (total seconds, [(package, seconds), ...] largest first), where each top-level package
+    (or `src.*` module) is charged the self time of everything imported under its name.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    pat = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+    per_pkg: Dict[str, float] = {}
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        m = pat.match(line)
+        if not m:
+            continue
+        self_s, cum_s, name = int(m[1]) / 1e6, int(m[2]) / 1e6, m[3]
+        if name == module:
+            total = cum_s
+        key = name if name.startswith("src.") else name.split(".")[0]
+        per_pkg[key] = per_pkg.get(key, 0.0) + self_s
+    ranked = sorted(per_pkg.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return total, ranked
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, up to `burst` banked.
+    `pause()` blocks every caller until a server-imposed cool-down (e.g. Retry-After) has passed.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight requests: +1 per window of successes, halved on an error
+    (at most once per window so a burst of failures from one wave counts once).
+    """
+
+    def __init__(self, initial: int, lo: int, hi: int):
+        self.lo, self.hi = max(1, lo), max(1, hi)
+        self.limit = float(min(max(initial, self.lo), self.hi))
+        self.inflight = 0
+        self._since_cut = int(self.limit)  # first error may cut immediately
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+
+    async def release(self, ok: bool) -> None:
+        async with self._cond:
+            self.inflight -= 1
+            if ok:
+                self._since_cut += 1
+                self.limit = min(self.hi, self.limit + 1.0 / self.limit)
+            elif self._since_cut >= int(self.limit):
+                self.limit = max(self.lo, self.limit / 2.0)
+                self._since_cut = 0
+            self._cond.notify_all()
+
+
+class Throttle:
+    """Rate (token bucket) and concurrency (AIMD) limits applied together to each request."""
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int, min_concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, max_concurrency)
+
+    async def acquire(self) -> None:
+        await self.concurrency.acquire()
+        await self.bucket.acquire()
+
+    async def release(self, ok: bool, retry_after: float | None = None) -> None:
+        if retry_after:
+            self.bucket.pause(retry_after)
+        await self.concurrency.release(ok)
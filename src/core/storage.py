@@ -1,11 +1,23 @@
 from __future__ import annotations
-import duckdb, os
+import os
+from functools import lru_cache
 from pathlib import Path
 
+from src.core.lazy import lazy_import
+
+duckdb = lazy_import("duckdb")
+
+# Created on first write by whoever needs it (not at import)
 ART = Path("artifacts")
-ART.mkdir(exist_ok=True)
 
-con = duckdb.connect(database=":memory:")
+
+@lru_cache(maxsize=1)
+def get_con():
+    """Process-wide DuckDB connection, opened on first use."""
+    con = duckdb.connect(database=":memory:")
+    con.execute("SET enable_progress_bar = false")
+    return con
+
 
 def write_text(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -1,11 +1,137 @@
 from __future__ import annotations
+from datetime import date
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
-import pandas_market_calendars as mcal
-from datetime import datetime
 
-nyse = mcal.get_calendar("XNYS")
+from src.core.lazy import lazy_import
+from src.core.storage import ART
+
+mcal = lazy_import("pandas_market_calendars")
+
+# Span of the precomputed session index; dates outside it raise ValueError
+SESSION_START = "1990-01-01"
+SESSION_END = "2035-12-31"
+CALENDAR_DIR = ART / "calendar"
+
+
+@lru_cache(maxsize=1)
+def nyse():
+    """XNYS calendar, built on first use (pandas_market_calendars is slow to import)."""
+    return mcal.get_calendar("XNYS")
+
+
+def _cache_path() -> Path:
+    try:
+        tag = version("pandas_market_calendars")
+    except PackageNotFoundError:
+        tag = "unknown"
+    return CALENDAR_DIR / f"xnys_{SESSION_START[:4]}_{SESSION_END[:4]}_{tag}.npy"
+
+
+@lru_cache(maxsize=1)
+def sessions() -> np.ndarray:
+    """
+    Sorted XNYS session dates as int32 days since 1970-01-01, SESSION_START..SESSION_END.
+    Built from the exchange calendar once, then loaded from a .npy cache keyed by the
+    pandas_market_calendars version (holiday rules change with it).
+    """
+    path = _cache_path()
+    if path.exists():
+        days = np.load(path)
+    else:
+        idx = nyse().valid_days(SESSION_START, SESSION_END)
+        days = idx.tz_localize(None).values.astype("datetime64[D]").astype(np.int32)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, days)
+        tmp.replace(path)
+    days.setflags(write=False)
+    return days
+
+
+def _day(d) -> int:
+    """Calendar date (any date-like; tz-aware values use their local date) as days since epoch."""
+    ts = pd.Timestamp(d)
+    day = int(ts.tz_localize(None).normalize().value // 86_400_000_000_000)
+    s = sessions()
+    if not s[0] - 7 <= day <= s[-1] + 7:
+        raise ValueError(f"{ts.date()} is outside the session index ({SESSION_START}..{SESSION_END})")
+    return day
+
+
+def _ts(day: int) -> pd.Timestamp:
+    return pd.Timestamp(np.datetime64(int(day), "D"))
+
+
+def to_dates(days: np.ndarray) -> pd.DatetimeIndex:
+    """int32 epoch days -> naive DatetimeIndex."""
+    return pd.DatetimeIndex(np.asarray(days, dtype="int64").astype("datetime64[D]").astype("datetime64[ns]"))
+
+
+def is_session(d) -> bool:
+    s = sessions()
+    day = _day(d)
+    i = np.searchsorted(s, day)
+    return bool(i < len(s) and s[i] == day)
+
+
+def _session_at(i: int, d) -> pd.Timestamp:
+    """Session at index `i`; raises instead of wrapping around either end of the index."""
+    s = sessions()
+    if not 0 <= i < len(s):
+        side = "before" if i < 0 else "after"
+        raise ValueError(f"No session {side} {d} in the session index ({SESSION_START}..{SESSION_END})")
+    return _ts(int(s[i]))
+
+
+def session_on_or_before(d) -> pd.Timestamp:
+    """Latest session <= d."""
+    return _session_at(int(np.searchsorted(sessions(), _day(d), side="right")) - 1, d)
+
+
+def prev_session(d) -> pd.Timestamp:
+    """Latest session strictly before d."""
+    return _session_at(int(np.searchsorted(sessions(), _day(d), side="left")) - 1, d)
+
+
+def next_session(d) -> pd.Timestamp:
+    """Earliest session strictly after d."""
+    return _session_at(int(np.searchsorted(sessions(), _day(d), side="right")), d)
+
+
+def sessions_back(n: int, asof=None) -> pd.Timestamp:
+    """The session `n` sessions before the last session on or before `asof` (default: today)."""
+    s = sessions()
+    i = int(np.searchsorted(s, _day(asof if asof is not None else date.today()), side="right")) - 1 - n
+    if i < 0:
+        raise ValueError(f"{n} sessions back from {asof} is before {SESSION_START}")
+    return _ts(int(s[i]))
+
+
+def sessions_between(start, end) -> pd.DatetimeIndex:
+    """Sessions in [start, end]."""
+    s = sessions()
+    lo = np.searchsorted(s, _day(start), side="left")
+    hi = np.searchsorted(s, _day(end), side="right")
+    return to_dates(s[lo:hi])
+
+
+def session_mask(dates: Iterable) -> np.ndarray:
+    """Boolean mask over `dates` (e.g. a bar panel's rows): True where the date is an XNYS session."""
+    idx = pd.DatetimeIndex(dates)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    days = idx.normalize().values.astype("datetime64[D]").astype(np.int64)
+    s = sessions()
+    pos = np.searchsorted(s, days).clip(max=len(s) - 1)
+    return s[pos] == days
+
 
 def last_trading_day(ts: pd.Timestamp | None = None) -> pd.Timestamp:
     ts = pd.Timestamp.utcnow().normalize() if ts is None else pd.Timestamp(ts)
-    sched = nyse.schedule(start_date=ts - pd.Timedelta(days=10), end_date=ts)
-    return sched.index[-1]
+    return session_on_or_before(ts)
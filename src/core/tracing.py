@@ -0,0 +1,87 @@
+from __future__ import annotations
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+class Tracer:
+    """
+    In-process span timings and counters for one run. `span` records wall time per name
+    (awaits inside a span count, so async fetches report their latency as seen by the run).
+    """
+
+    def __init__(self):
+        self.spans: Dict[str, List[float]] = defaultdict(list)
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.started = time.time()
+
+    def reset(self) -> None:
+        self.spans.clear()
+        self.counters.clear()
+        self.started = time.time()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name].append(time.perf_counter() - t0)
+
+    def count(self, name: str, n: float = 1) -> None:
+        self.counters[name] += n
+
+    def summary(self) -> Dict[str, dict]:
+        """Per span name: count, total seconds and p50 / p95 / max in milliseconds."""
+        out = {}
+        for name, xs in self.spans.items():
+            a = np.asarray(xs) * 1e3
+            p50, p95 = np.percentile(a, [50, 95])
+            out[name] = {
+                "count": len(a), "total_s": float(a.sum() / 1e3),
+                "p50_ms": float(p50), "p95_ms": float(p95), "max_ms": float(a.max()),
+            }
+        return out
+
+    def profile(self, **meta) -> dict:
+        return {**meta, "started": self.started, "spans": self.summary(), "counters": dict(self.counters)}
+
+    def write_json(self, path: Path, **meta) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.profile(**meta), indent=2, default=str))
+        return path
+
+    def write_prometheus(self, path: Path, prefix: str = "vbb_eod") -> Path:
+        """
+        Node-exporter textfile: a summary per span (quantiles 0.5 / 0.95 / 1 = max, in seconds)
+        plus one gauge per counter. Written to a temp file and renamed, as the collector expects.
+        """
+        lines = [
+            f"# HELP {prefix}_span_seconds Span latency in the last run.",
+            f"# TYPE {prefix}_span_seconds summary",
+        ]
+        for name, s in sorted(self.summary().items()):
+            for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("1", "max_ms")):
+                lines.append(f'{prefix}_span_seconds{{span="{name}",quantile="{q}"}} {s[key] / 1e3:.6f}')
+            lines.append(f'{prefix}_span_seconds_sum{{span="{name}"}} {s["total_s"]:.6f}')
+            lines.append(f'{prefix}_span_seconds_count{{span="{name}"}} {s["count"]}')
+        for name, v in sorted(self.counters.items()):
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {v:g}"]
+        lines += [f"# TYPE {prefix}_last_run_timestamp_seconds gauge", f"{prefix}_last_run_timestamp_seconds {self.started:.0f}"]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+        return path
+
+
+# Process-wide tracer; instrumented modules record into it, the EOD job resets and exports it
+TRACER = Tracer()
+span = TRACER.span
+count = TRACER.count
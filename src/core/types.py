@@ -2,6 +2,7 @@ from __future__ import annotations
 from pydantic import BaseModel
 from typing import Literal, Dict
 from datetime import datetime
+from enum import Enum
 
 Side = Literal["BUY", "SELL"]
 
@@ -22,6 +23,11 @@ class Fill(BaseModel):
     avg_price: float
     ts: datetime
 
+class Mode(str, Enum):
+    """--mode choice of the apps; `RunMeta.mode` holds its value."""
+    paper = "paper"
+    live = "live"
+
 class RunMeta(BaseModel):
     run_id: str
     asof: datetime
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core.log import logger
+from src.core.storage import ART
+from src.strategy.vobreakout import atr_pct_arr, rolling_mean_arr, shift_arr
+
+FEATURE_COLS = ("prev_high", "vol_mean", "atr_pct")
+_FINGERPRINT_KEY = b"vbb.fingerprint"
+SCHEMA = pa.schema([("timestamp", pa.int64())] + [(c, pa.float64()) for c in FEATURE_COLS])
+
+
+def compute_features(df: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """Derived columns behind `breakout_long` and `atr_pct` for one symbol, aligned with `df`."""
+    h, lo, c, v = (df[f].to_numpy(dtype=float) for f in ("high", "low", "close", "volume"))
+    return pd.DataFrame(
+        {"prev_high": shift_arr(h), "vol_mean": rolling_mean_arr(v, n), "atr_pct": atr_pct_arr(h, lo, c, n)},
+        index=df.index,
+    )
+
+
+def _stamps(df: pd.DataFrame) -> np.ndarray:
+    if "timestamp" in df.columns:
+        return pd.DatetimeIndex(df["timestamp"]).asi8
+    return pd.DatetimeIndex(df.index).asi8
+
+
+def _digest(ts: np.ndarray, df: pd.DataFrame, rows: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(ts[:rows]).tobytes())
+    for f in ("high", "low", "close", "volume"):
+        h.update(np.ascontiguousarray(df[f].to_numpy(dtype=float)[:rows]).tobytes())
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """
+    Derived feature columns per symbol and lookback under artifacts/features/n{N}/{SYMBOL}.parquet,
+    keyed by a fingerprint of the source bars kept in the file's schema metadata: the row count
+    plus digests of all rows and of every row but the last (a partial bar revised on the next
+    fetch).
+
+    When the bars only grew (or their last bar was revised), just the tail is recomputed from
+    the last `n` bars of context and appended; any other change rebuilds the entry. Recently
+    used frames are also held in memory; both tiers are bounded with least-recently-used
+    eviction (disk recency starts from the file mtime, refreshed when a file is read).
+    """
+
+    def __init__(self, root: Path | str | None = None, *, max_bytes: int = 512 << 20, max_memory: int = 512):
+        self.root = Path(root) if root is not None else ART / "features"
+        self.max_bytes = max_bytes
+        self.max_memory = max_memory
+        self._mem: OrderedDict[Tuple[str, int], Tuple[dict, pd.DataFrame]] = OrderedDict()
+        self._disk: Dict[Path, Tuple[int, float]] | None = None  # path -> (bytes, last use)
+
+    def path(self, symbol: str, n: int = 20) -> Path:
+        return self.root / f"n{n}" / f"{symbol}.parquet"
+
+    # --- Read / write ---
+
+    def _load(self, symbol: str, n: int) -> Tuple[dict, pd.DataFrame] | None:
+        key = (symbol, n)
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            return self._mem[key]
+        p = self.path(symbol, n)
+        if not p.exists():
+            return None
+        table = pq.read_table(p, columns=list(FEATURE_COLS))
+        fp = json.loads((table.schema.metadata or {}).get(_FINGERPRINT_KEY, b"{}"))
+        os.utime(p)
+        return fp, table.to_pandas()
+
+    def _store(self, symbol: str, n: int, fp: dict, feats: pd.DataFrame, ts: np.ndarray) -> None:
+        key = (symbol, n)
+        self._mem[key] = (fp, feats)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_memory:
+            self._mem.popitem(last=False)
+
+        p = self.path(symbol, n)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(feats.assign(timestamp=ts)[list(SCHEMA.names)], schema=SCHEMA, preserve_index=False)
+        table = table.replace_schema_metadata({_FINGERPRINT_KEY: json.dumps(fp).encode()})
+        tmp = p.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, p)
+        self._track(p)
+        self.evict()
+
+    def get(self, symbol: str, bars: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+        """
+        Feature frame (FEATURE_COLS) aligned with `bars`, served from the cache where it is
+        still valid. Hits share memory with the cache; treat the frame as read-only.
+        """
+        if bars is None or bars.empty:
+            return pd.DataFrame(columns=list(FEATURE_COLS), dtype=float)
+        ts = _stamps(bars)
+        full = _digest(ts, bars, len(bars))
+        hit = self._load(symbol, n)
+        if hit is not None and hit[0].get("full") == full:
+            self._touch(symbol, n, hit)
+            return hit[1].set_axis(bars.index, copy=False)
+
+        keep = 0
+        if hit is not None:
+            k = hit[0].get("rows", 0)
+            # Old bars still a prefix: keep their settled rows, recompute from the last one on
+            if 0 < k <= len(bars) and _digest(ts, bars, k - 1) == hit[0].get("settled"):
+                keep = k - 1
+        lo = max(0, keep - n)
+        tail = compute_features(bars.iloc[lo:], n).iloc[keep - lo:]
+        if keep:
+            feats = pd.concat([hit[1].iloc[:keep], tail.reset_index(drop=True)], ignore_index=True)
+        else:
+            feats = tail.reset_index(drop=True)
+        logger.debug(f"{symbol}: features n={n} recomputed for {len(bars) - keep}/{len(bars)} bars")
+        fp = {"rows": len(bars), "full": full, "settled": _digest(ts, bars, max(len(bars) - 1, 0))}
+        self._store(symbol, n, fp, feats, ts)
+        return feats.set_axis(bars.index)
+
+    def get_many(self, bars: Mapping[str, pd.DataFrame], n: int = 20) -> Dict[str, pd.DataFrame]:
+        return {s: self.get(s, df, n) for s, df in bars.items()}
+
+    # --- Eviction ---
+
+    def _index(self) -> Dict[Path, Tuple[int, float]]:
+        if self._disk is None:
+            self._disk = {}
+            for p in self.root.glob("n*/*.parquet"):
+                st = p.stat()
+                self._disk[p] = (st.st_size, st.st_mtime)
+        return self._disk
+
+    def _track(self, p: Path) -> None:
+        st = p.stat()
+        self._index()[p] = (st.st_size, st.st_mtime)
+
+    def _touch(self, symbol: str, n: int, hit: Tuple[dict, pd.DataFrame]) -> None:
+        key = (symbol, n)
+        self._mem[key] = hit
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_memory:
+            self._mem.popitem(last=False)
+        p = self.path(symbol, n)
+        if p in self._index():
+            self._disk[p] = (self._disk[p][0], time.time())
+
+    def disk_bytes(self) -> int:
+        return sum(size for size, _ in self._index().values())
+
+    def evict(self) -> int:
+        """Delete least-recently-used files until the cache fits in `max_bytes`; returns files removed."""
+        idx = self._index()
+        total = sum(size for size, _ in idx.values())
+        removed = 0
+        for p, (size, _) in sorted(idx.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            del idx[p]
+            self._mem.pop((p.stem, int(p.parent.name[1:])), None)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.core.storage import ART
+from src.data.store import MARKET_TZ
+
+MINUTE_FIELDS = ("open", "high", "low", "close", "volume")
+# Uncompressed Arrow IPC so files can be memory-mapped and viewed as numpy without copying
+MINUTE_SCHEMA = pa.schema(
+    [("timestamp", pa.timestamp("ns", tz="UTC"))] + [(f, pa.float64()) for f in MINUTE_FIELDS]
+)
+NS_PER_MIN = 60 * 1_000_000_000
+RTH_OPEN, RTH_CLOSE = 570, 960  # regular session in New York minutes-of-day: [09:30, 16:00)
+
+
+def local_minutes(ts_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """UTC epoch-ns bar stamps -> (New York calendar day as epoch days, minute of that day)."""
+    local = pd.DatetimeIndex(ts_ns.view("datetime64[ns]"), tz="UTC").tz_convert(MARKET_TZ).tz_localize(None)
+    mins = local.asi8 // NS_PER_MIN
+    return mins // 1440, (mins % 1440).astype(np.int16)
+
+
+class MinuteStore:
+    """
+    Minute bars on disk: one Arrow IPC file per symbol and (New York) year under
+    artifacts/bars/minute/{SYMBOL}/{YEAR}.arrow, sorted by timestamp. Reads memory-map the
+    file, so a symbol-year is scanned straight from the page cache instead of into RAM.
+    """
+
+    def __init__(self, root: Path | str | None = None):
+        self.root = Path(root) if root is not None else ART / "bars" / "minute"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, symbol: str, year: int) -> Path:
+        return self.root / symbol / f"{year}.arrow"
+
+    def symbols(self) -> List[str]:
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def years(self, symbol: str) -> List[int]:
+        d = self.root / symbol
+        return sorted(int(p.stem) for p in d.glob("*.arrow")) if d.exists() else []
+
+    def open(self, symbol: str, year: int) -> pa.Table:
+        """Memory-mapped table for one symbol-year (empty table if absent)."""
+        p = self.path(symbol, year)
+        if not p.exists():
+            return MINUTE_SCHEMA.empty_table()
+        with pa.ipc.open_file(pa.memory_map(str(p), "r")) as reader:
+            return reader.read_all()
+
+    def columns(self, symbol: str, year: int) -> Dict[str, np.ndarray]:
+        """Zero-copy numpy views of one symbol-year: int64 `timestamp` (UTC ns) plus OHLCV."""
+        tbl = self.open(symbol, year).combine_chunks()
+        out = {"timestamp": tbl.column("timestamp").to_numpy().view(np.int64)}
+        for f in MINUTE_FIELDS:
+            out[f] = tbl.column(f).to_numpy()
+        return out
+
+    def write(self, symbol: str, df: pd.DataFrame) -> None:
+        """Upsert minute bars (`timestamp` column, UTC) for one symbol; newer rows win on duplicates."""
+        if df.empty:
+            return
+        years = pd.DatetimeIndex(df["timestamp"]).tz_convert(MARKET_TZ).year
+        for year, part in df.groupby(np.asarray(years)):
+            cur = self.open(symbol, int(year)).to_pandas()
+            merged = pd.concat([cur, part[list(MINUTE_SCHEMA.names)]], ignore_index=True) if len(cur) else part
+            merged = merged.drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+            table = pa.Table.from_pandas(merged, schema=MINUTE_SCHEMA, preserve_index=False).combine_chunks()
+            p = self.path(symbol, int(year))
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix(".arrow.tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, MINUTE_SCHEMA) as writer:
+                writer.write_table(table, max_chunksize=len(table) or None)
+            os.replace(tmp, p)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.core.timeutils import session_mask, sessions_between
+from src.data.store import BarStore, session_dates
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def bar_dates(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """Session dates of a bar frame: from the Polygon `timestamp` column, else the index."""
+    if "timestamp" in df.columns:
+        return pd.DatetimeIndex(pd.to_datetime(session_dates(df["timestamp"])))
+    return pd.DatetimeIndex(df.index).normalize()
+
+
+@dataclass
+class Panel:
+    """
+    Date x symbol OHLCV panel. Every field is a (T, N) float array aligned on `dates`
+    (rows) and `symbols` (columns); missing bars are NaN.
+    """
+
+    dates: pd.DatetimeIndex
+    symbols: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.dates), len(self.symbols)
+
+    @classmethod
+    def from_frames(cls, bars: Mapping[str, pd.DataFrame], dtype=np.float64, calendar: bool = False) -> Panel:
+        """
+        Align per-symbol OHLCV frames on the union of their dates. With `calendar`, rows are
+        instead every XNYS session spanning the data: bars stamped on non-sessions are dropped
+        and sessions no symbol traded stay as NaN rows, so "next row" is always the next session.
+        """
+        frames = {s: df for s, df in bars.items() if df is not None and not df.empty}
+        keys = {s: bar_dates(df) for s, df in frames.items()}
+        if not keys:
+            dates = pd.DatetimeIndex([])
+        elif calendar:
+            dates = sessions_between(min(k.min() for k in keys.values()), max(k.max() for k in keys.values()))
+        else:
+            dates = pd.DatetimeIndex(sorted(set().union(*keys.values())))
+        symbols = list(frames)
+        arrs = {f: np.full((len(dates), len(symbols)), np.nan, dtype=dtype) for f in FIELDS}
+        for j, s in enumerate(symbols):
+            rows = dates.get_indexer(keys[s])
+            mask = session_mask(keys[s]) if calendar else None
+            if mask is not None:
+                rows = rows[mask]
+            for f in FIELDS:
+                vals = frames[s][f].to_numpy(dtype=dtype)
+                arrs[f][rows, j] = vals if mask is None else vals[mask]
+        return cls(dates=dates, symbols=symbols, **arrs)
+
+    @classmethod
+    def from_store(
+        cls,
+        store: BarStore,
+        symbols: Iterable[str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        dtype=np.float64,
+        calendar: bool = True,
+    ) -> Panel:
+        syms = list(symbols) if symbols is not None else store.symbols()
+        return cls.from_frames(store.read_many(syms, start, end), dtype=dtype, calendar=calendar)
+
+    def rows(self, lo: int, hi: int) -> Panel:
+        """Row (date) slice [lo, hi) sharing memory with this panel."""
+        return Panel(
+            dates=self.dates[lo:hi],
+            symbols=self.symbols,
+            **{f: getattr(self, f)[lo:hi] for f in FIELDS},
+        )
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """One symbol's bars as a regular OHLCV frame (NaN rows dropped)."""
+        j = self.symbols.index(symbol)
+        df = pd.DataFrame({f: getattr(self, f)[:, j] for f in FIELDS}, index=self.dates)
+        return df.dropna(subset=["close"])
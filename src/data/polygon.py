@@ -3,14 +3,90 @@ from __future__ import annotations
 
 import os
 import asyncio
-from typing import Dict, List, Optional
+import importlib.util
+import weakref
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import httpx
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+from src.core.config import load_settings
+from src.core.lazy import lazy_import
+from src.core.ratelimit import Throttle
+from src.core.tracing import count, span
+from src.data.store import MARKET_TZ, BarStore
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient, Response
+
+httpx = lazy_import("httpx")
 
 
 API_KEY = os.getenv("POLYGON_API_KEY", "")
 BASE = "https://api.polygon.io"
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); checked without importing it
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+# --- Shared client ---
+
+@dataclass
+class _Session:
+    client: AsyncClient
+    throttle: Throttle
+
+
+# One pooled client + throttle per event loop (httpx/asyncio objects are loop-bound)
+_SESSIONS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Session]" = weakref.WeakKeyDictionary()
+
+
+def _session() -> _Session:
+    loop = asyncio.get_running_loop()
+    sess = _SESSIONS.get(loop)
+    if sess is None or sess.client.is_closed:
+        cfg = load_settings().polygon
+        sess = _Session(
+            client=httpx.AsyncClient(
+                http2=_HTTP2,
+                timeout=cfg.timeout,
+                limits=httpx.Limits(
+                    max_connections=cfg.max_concurrency,
+                    max_keepalive_connections=cfg.max_concurrency,
+                ),
+            ),
+            throttle=Throttle(cfg.rate_per_sec, cfg.burst, cfg.max_concurrency, cfg.min_concurrency),
+        )
+        _SESSIONS[loop] = sess
+    return sess
+
+
+async def aclose() -> None:
+    """Close the current loop's shared client (e.g. at the end of a job)."""
+    sess = _SESSIONS.pop(asyncio.get_running_loop(), None)
+    if sess is not None:
+        await sess.client.aclose()
+
+
+def _retry_after(resp: Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), if present."""
+    raw = resp.headers.get("Retry-After")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(raw) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
 
 
 def _empty_df(symbol: Optional[str] = None) -> pd.DataFrame:
@@ -21,48 +97,95 @@ def _empty_df(symbol: Optional[str] = None) -> pd.DataFrame:
     return df
 
 
+# polygon keys: t (ms), o,h,l,c,v
+_AGG_FIELDS = (
+    ("t", "timestamp", np.int64),
+    ("o", "open", np.float64),
+    ("h", "high", np.float64),
+    ("l", "low", np.float64),
+    ("c", "close", np.float64),
+    ("v", "volume", np.float64),
+)
+AGG_SCHEMA = pa.schema(
+    [(name, pa.from_numpy_dtype(dt)) for _, name, dt in _AGG_FIELDS]
+    + [("symbol", pa.dictionary(pa.int32(), pa.string()))]
+)
+
+
+def _column(rows: list, key: str, dtype) -> np.ndarray:
+    try:
+        return np.fromiter(map(itemgetter(key), rows), dtype=dtype, count=len(rows))
+    except (KeyError, TypeError):
+        # Sparse/null fields: only floats can carry a gap
+        return np.fromiter(
+            (np.nan if r.get(key) is None else r[key] for r in rows), dtype=np.float64, count=len(rows)
+        )
+
+
+def decode_aggs(js: dict, symbol: str) -> pa.RecordBatch:
+    """
+    Decode an aggregates response into one Arrow record batch: int64 epoch-ms timestamps,
+    float64 OHLCV and a dictionary-encoded symbol. Each column is filled in one typed pass
+    over `results`; the Arrow arrays wrap those NumPy buffers without copying.
+    """
+    rows = js.get("results") or []
+    cols = [pa.array(_column(rows, key, dt)) for key, _, dt in _AGG_FIELDS]
+    sym = pa.DictionaryArray.from_arrays(pa.array(np.zeros(len(rows), np.int32)), pa.array([symbol], pa.string()))
+    return pa.RecordBatch.from_arrays(cols + [sym], schema=AGG_SCHEMA)
+
+
+def aggs_to_pandas(batch: pa.RecordBatch) -> pd.DataFrame:
+    """pandas view of `decode_aggs` output (UTC timestamps, categorical symbol), without consolidating copies."""
+    ts = batch.column(0).view(pa.timestamp("ms", tz="UTC"))
+    batch = pa.RecordBatch.from_arrays([ts, *batch.columns[1:]], names=batch.schema.names)
+    return batch.to_pandas(split_blocks=True)
+
+
 def _normalize(js: dict, symbol: str) -> pd.DataFrame:
-    rows = js.get("results", [])
-    if not rows:
+    if not js.get("results"):
         return _empty_df(symbol)
-    df = pd.DataFrame(rows)
-    # polygon keys: t (ms), o,h,l,c,v
-    df["t"] = pd.to_datetime(df["t"], unit="ms", utc=True)
-    df = df.rename(
-        columns={
-            "t": "timestamp",
-            "o": "open",
-            "h": "high",
-            "l": "low",
-            "c": "close",
-            "v": "volume",
-        }
-    )
-    df["symbol"] = symbol
-    return df[["timestamp", "open", "high", "low", "close", "volume", "symbol"]]
+    return aggs_to_pandas(decode_aggs(js, symbol))
 
 
 async def _get_with_retries(
-    client: httpx.AsyncClient, url: str, *, retries: int = 3, backoff: float = 0.8
+    client: AsyncClient,
+    url: str,
+    *,
+    retries: int = 3,
+    backoff: float = 0.8,
+    throttle: Optional[Throttle] = None,
 ) -> Optional[dict]:
     """
     Small retry helper. Returns parsed JSON dict or None on failure.
-    Backoff is exponential: backoff * (2 ** attempt).
+    429/5xx wait for the server's Retry-After when given, else back off exponentially:
+    backoff * (2 ** attempt). With a `throttle`, every attempt takes a rate token and a
+    concurrency slot, and outcomes feed its AIMD limit.
     """
     for i in range(retries + 1):
+        wait: Optional[float] = None
+        if throttle is not None:
+            await throttle.acquire()
         try:
             resp = await client.get(url)
-            # Handle 429 (rate limit) and 5xx with retries
-            if resp.status_code in (429, 500, 502, 503, 504):
-                raise httpx.HTTPStatusError(
-                    f"status={resp.status_code}", request=resp.request, response=resp
-                )
-            resp.raise_for_status()
-            return resp.json()
-        except (httpx.TimeoutException, httpx.HTTPError):
-            if i == retries:
+            if resp.status_code in RETRY_STATUS:
+                wait = _retry_after(resp)
+            elif resp.status_code < 400:
+                if throttle is not None:
+                    await throttle.release(True)
+                count("bytes_fetched", len(resp.content))
+                return resp.json()
+            else:
+                # Other 4xx (bad symbol, auth): retrying will not help
+                if throttle is not None:
+                    await throttle.release(True)
                 return None
-            await asyncio.sleep(backoff * (2**i))
+        except (httpx.TimeoutException, httpx.HTTPError):
+            pass
+        if throttle is not None:
+            await throttle.release(False, retry_after=wait)
+        if i == retries:
+            return None
+        await asyncio.sleep(wait if wait is not None else backoff * (2**i))
     return None
 
 
@@ -79,46 +202,105 @@ async def agg_daily(symbol: str, start: str, end: str) -> pd.DataFrame:
         f"{BASE}/v2/aggs/ticker/{symbol}/range/1/day/"
         f"{start}/{end}?adjusted=true&sort=asc&limit=50000&apiKey={API_KEY}"
     )
-    async with httpx.AsyncClient(timeout=30) as client:
-        js = await _get_with_retries(client, url)
+    sess = _session()
+    js = await _get_with_retries(sess.client, url, throttle=sess.throttle)
     if js is None:
         return _empty_df(symbol)
     return _normalize(js, symbol)
 
 
+def decode_grouped(js: dict) -> pd.DataFrame:
+    """
+    Grouped daily response -> one row per ticker: symbol, UTC timestamp and OHLCV. Grouped
+    bars are stamped at the session close; they are restamped to 00:00 New York time like the
+    per-ticker aggs, so both identify a session by the same timestamp.
+    """
+    rows = js.get("results") or []
+    if not rows:
+        return _empty_df()
+    out = {name: _column(rows, key, dt) for key, name, dt in _AGG_FIELDS}
+    ts = pd.to_datetime(out["timestamp"], unit="ms", utc=True)
+    out["timestamp"] = ts.tz_convert(MARKET_TZ).normalize().tz_convert("UTC")
+    out["symbol"] = np.fromiter(map(itemgetter("T"), rows), dtype=object, count=len(rows))
+    return pd.DataFrame(out)
+
+
+async def grouped_daily(date: str) -> pd.DataFrame:
+    """
+    Daily bars of every US stock for one session ('YYYY-MM-DD') in a single request.
+    Empty until Polygon has published the session (and without an API key).
+    """
+    if not API_KEY:
+        return _empty_df()
+    url = f"{BASE}/v2/aggs/grouped/locale/us/market/stocks/{date}?adjusted=true&apiKey={API_KEY}"
+    sess = _session()
+    js = await _get_with_retries(sess.client, url, throttle=sess.throttle)
+    if js is None:
+        return _empty_df()
+    return decode_grouped(js)
+
+
 async def agg_daily_many(
     symbols: List[str],
     start: str,
     end: str,
     *,
-    concurrency: int = 8,
+    store: Optional[BarStore] = None,
 ) -> Dict[str, pd.DataFrame]:
     """
     Concurrently fetch daily OHLCV bars for many symbols.
     Returns: {symbol: DataFrame}. Missing/failed lookups map to empty DataFrames.
+
+    With a `store`, bars are served from local disk and only the uncovered tail of
+    [start, end] is requested from Polygon; fetched bars are written back to the store.
+    Bars are split/dividend adjusted: when the refetched overlap no longer matches the stored
+    bars, the vendor has restated the history, and the symbol's stored window is refetched
+    in full.
     """
     if not API_KEY:
-        # Produce empty frames for all; upstream will handle as "no data"
+        # Produce empty frames (or whatever is on disk) for all; upstream will handle as "no data"
+        if store is not None:
+            return store.read_many(symbols, start, end)
         return {s: _empty_df(s) for s in symbols}
 
-    sem = asyncio.Semaphore(max(1, concurrency))
-
-    async with httpx.AsyncClient(timeout=30) as client:
-
-        async def _one(sym: str) -> tuple[str, pd.DataFrame]:
-            url = (
-                f"{BASE}/v2/aggs/ticker/{sym}/range/1/day/"
-                f"{start}/{end}?adjusted=true&sort=asc&limit=50000&apiKey={API_KEY}"
-            )
-            async with sem:
-                js = await _get_with_retries(client, url)
-            if js is None:
-                return sym, _empty_df(sym)
-            try:
-                return sym, _normalize(js, sym)
-            except Exception:
-                # If JSON format changed or unexpected, fail safe
-                return sym, _empty_df(sym)
-
-        pairs = await asyncio.gather(*[_one(s) for s in symbols])
-        return {sym: df for sym, df in pairs}
\ No newline at end of file
+    sess = _session()
+
+    async def _get(sym: str, lo: str, hi: str) -> tuple[pd.DataFrame, bool]:
+        url = (
+            f"{BASE}/v2/aggs/ticker/{sym}/range/1/day/"
+            f"{lo}/{hi}?adjusted=true&sort=asc&limit=50000&apiKey={API_KEY}"
+        )
+        js = await _get_with_retries(sess.client, url, throttle=sess.throttle)
+        if js is None:
+            return _empty_df(sym), False
+        try:
+            return _normalize(js, sym), True
+        except Exception:
+            # If JSON format changed or unexpected, fail safe
+            return _empty_df(sym), False
+
+    async def _fetch_one(sym: str) -> tuple[str, pd.DataFrame]:
+        if store is None:
+            return sym, (await _get(sym, start, end))[0]
+        window = store.missing(sym, start, end)
+        if window is None:
+            return sym, store.read(sym, start, end)
+        lo, hi = window
+        df, ok = await _get(sym, lo, hi)
+        if ok and store.restated(sym, df):
+            cov = store.coverage(sym)
+            lo, hi = (min(start, cov[0].isoformat()), max(end, cov[1].isoformat())) if cov else (start, end)
+            count("restated", 1)
+            df, ok = await _get(sym, lo, hi)
+            if ok:
+                store.invalidate(sym)  # only once the restated history is in hand
+        if ok:
+            store.write(sym, df, fetched=(lo, hi))
+        return sym, store.read(sym, start, end)
+
+    async def _one(sym: str) -> tuple[str, pd.DataFrame]:
+        with span("fetch.symbol"):
+            return await _fetch_one(sym)
+
+    pairs = await asyncio.gather(*[_one(s) for s in symbols])
+    return {sym: df for sym, df in pairs}
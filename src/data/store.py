@@ -0,0 +1,177 @@
+from __future__ import annotations
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core.storage import ART, get_con
+from src.core.timeutils import prev_session
+
+BAR_COLS = ["timestamp", "open", "high", "low", "close", "volume", "symbol"]
+MARKET_TZ = "America/New_York"
+_COVERAGE_KEY = b"vbb.coverage"
+_PRICES = ["open", "high", "low", "close"]
+# Fixed on-disk schema so every file unions cleanly in DuckDB (even empty ones)
+SCHEMA = pa.schema(
+    [("timestamp", pa.timestamp("ns", tz="UTC"))]
+    + [(c, pa.float64()) for c in BAR_COLS[1:-1]]
+    + [("symbol", pa.string())]
+)
+
+
+def session_dates(ts: pd.Series) -> pd.Series:
+    """Polygon daily bars are stamped at 00:00 New York time; map them back to session dates."""
+    return ts.dt.tz_convert(MARKET_TZ).dt.date
+
+
+class BarStore:
+    """
+    Persistent daily bar store: one Parquet file per symbol under artifacts/bars/daily.
+    Each file also records the date range already fetched from the vendor, so empty
+    windows (holidays, pre-IPO) are not re-requested.
+    """
+
+    def __init__(self, root: Path | str | None = None):
+        self.root = Path(root) if root is not None else ART / "bars" / "daily"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.parquet"
+
+    def symbols(self) -> List[str]:
+        return sorted(p.stem for p in self.root.glob("*.parquet"))
+
+    # --- Coverage ---
+
+    def coverage(self, symbol: str) -> Optional[Tuple[date, date]]:
+        p = self.path(symbol)
+        if not p.exists():
+            return None
+        meta = pq.read_schema(p).metadata or {}
+        raw = meta.get(_COVERAGE_KEY)
+        if not raw:
+            return None
+        lo, hi = json.loads(raw)
+        return date.fromisoformat(lo), date.fromisoformat(hi)
+
+    def missing(self, symbol: str, start: str, end: str) -> Optional[Tuple[str, str]]:
+        """
+        Return the (start, end) window still to fetch for [start, end], or None if covered.
+        The last covered day is always re-fetched because it may have been a partial bar, and
+        so is the session before it, so the response overlaps a settled stored bar (see
+        `restated`). Coverage is one contiguous range, so a window that does not touch it is
+        widened to reach it (otherwise `write` would record the gap in between as fetched).
+        """
+        lo, hi = date.fromisoformat(start), date.fromisoformat(end)
+        cov = self.coverage(symbol)
+        if cov is None:
+            return start, end
+        if cov[0] > lo:
+            return start, max(hi, cov[0]).isoformat()
+        if cov[1] >= hi and cov[1] < date.today():
+            return None
+        return prev_session(cov[1]).date().isoformat(), end
+
+    def restated(self, symbol: str, df: pd.DataFrame) -> bool:
+        """
+        True if `df` prices a session differently from a settled stored bar: the vendor has
+        re-adjusted the history (split, dividend), so the stored bars are on an old price
+        scale. The last stored bar is not compared, as it may have been partial.
+        """
+        cur = self.read(symbol).iloc[:-1]
+        if cur.empty or df.empty:
+            return False
+        old = cur.set_index(session_dates(cur["timestamp"]))[_PRICES]
+        new = df.set_index(session_dates(df["timestamp"]))[_PRICES]
+        both = old.index.intersection(new.index)
+        return not np.allclose(old.loc[both].to_numpy(float), new.loc[both].to_numpy(float), rtol=1e-6, equal_nan=True)
+
+    def invalidate(self, symbol: str) -> None:
+        """Forget a symbol's bars and coverage, e.g. before re-fetching restated history."""
+        self.path(symbol).unlink(missing_ok=True)
+
+    # --- Read / write ---
+
+    def read(self, symbol: str, start: str | None = None, end: str | None = None) -> pd.DataFrame:
+        p = self.path(symbol)
+        if not p.exists():
+            return pd.DataFrame(columns=BAR_COLS)
+        df = pq.read_table(p).to_pandas()
+        if start is None and end is None:
+            return df
+        d = session_dates(df["timestamp"])
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= d >= date.fromisoformat(start)
+        if end is not None:
+            mask &= d <= date.fromisoformat(end)
+        return df.loc[mask].reset_index(drop=True)
+
+    def read_many(
+        self, symbols: Iterable[str], start: str | None = None, end: str | None = None
+    ) -> Dict[str, pd.DataFrame]:
+        return {s: self.read(s, start, end) for s in symbols}
+
+    def write(self, symbol: str, df: pd.DataFrame, fetched: Tuple[str, str] | None = None) -> None:
+        """
+        Upsert bars for one symbol (newer rows win on duplicate sessions) and widen the
+        recorded coverage by the `fetched` window. Rows are matched by session date, not raw
+        timestamp: the same session may arrive stamped at midnight or at the close.
+        """
+        p = self.path(symbol)
+        cur = self.read(symbol)
+        new = df[BAR_COLS] if not df.empty else df
+        if cur.empty:
+            merged = new
+        elif new.empty:
+            merged = cur
+        else:
+            merged = pd.concat([cur, new], ignore_index=True)
+        if not merged.empty:
+            merged = (
+                merged.loc[~session_dates(merged["timestamp"]).duplicated(keep="last")]
+                .sort_values("timestamp")
+                .reset_index(drop=True)
+            )
+            merged["symbol"] = symbol
+        else:
+            merged = SCHEMA.empty_table().to_pandas()
+
+        cov = self.coverage(symbol)
+        if fetched is not None:
+            lo = date.fromisoformat(fetched[0])
+            hi = min(date.fromisoformat(fetched[1]), date.today())
+            if cov is not None:
+                lo, hi = min(lo, cov[0]), max(hi, cov[1])
+            cov = (lo, hi)
+
+        table = pa.Table.from_pandas(merged[BAR_COLS], schema=SCHEMA, preserve_index=False)
+        if cov is not None:
+            meta = dict(table.schema.metadata or {})
+            meta[_COVERAGE_KEY] = json.dumps([cov[0].isoformat(), cov[1].isoformat()]).encode()
+            table = table.replace_schema_metadata(meta)
+        tmp = p.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, p)
+
+    # --- DuckDB ---
+
+    def register(self, view: str = "bars_daily") -> bool:
+        """
+        Expose every stored file as one DuckDB view on the shared connection.
+        Returns False when the store is empty (DuckDB cannot glob zero files).
+        """
+        if not any(self.root.glob("*.parquet")):
+            return False
+        glob = (self.root / "*.parquet").as_posix()
+        get_con().execute(
+            f"CREATE OR REPLACE VIEW {view} AS "
+            f"SELECT * FROM read_parquet('{glob}')"
+        )
+        return True
@@ -1,12 +1,177 @@
 from __future__ import annotations
+import asyncio
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.core.log import logger
+from src.core.storage import get_con
+from src.core.timeutils import prev_session, sessions_back, sessions_between
+from src.data import polygon as poly
+from src.data.store import BAR_COLS, MARKET_TZ, SCHEMA, BarStore
+from src.strategy.vobreakout import atr_pct_arr
 
-# Placeholder universe; in practice, build from Polygon/IBKR scanners
+# Fallback universe when no local history is available yet
 DEFAULT_UNIVERSE = [
     "NVAX","GME","PLTR","MRNA","BYND","AMC","RIOT","CRSP","HOOD","DNA",
     "SOFI","COIN","AFRM","LCID","ROKU","CVNA","BILI","BMBL","UPST","RBLX"
 ]
 
-def build_universe(min_price: float = 2.0, min_atr_pct: float = 0.03) -> list[str]:
-    # TODO: pull ATR%, ADV from data source and filter; using placeholder list for now
-    return DEFAULT_UNIVERSE
+
+# --- Market-wide bars ---
+
+def market_dir(store: BarStore) -> Path:
+    """Market-wide daily bars beside the store's per-symbol files: one Parquet file per session."""
+    return store.root / "_market"
+
+
+async def refresh_market(store: BarStore | None = None, *, sessions: int = 21, asof=None) -> str | None:
+    """
+    Load every US stock's daily bars for the last `sessions` sessions through `asof`
+    (default: the session before today): one Polygon grouped-daily request per session not
+    loaded before, sent together, each written as its own file under `market_dir`. This is
+    what lets the screen see names it has never selected, without rewriting the history file
+    of every listed symbol for one new row. Returns the last session loaded (None if nothing
+    is available).
+    """
+    store = store or BarStore()
+    end = prev_session(pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None)) if asof is None else pd.Timestamp(asof)
+    days = sessions_between(sessions_back(sessions - 1, end), end).strftime("%Y-%m-%d").tolist()
+    root = market_dir(store)
+    todo = [d for d in days if not (root / f"{d}.parquet").exists()]
+    frames = await asyncio.gather(*(poly.grouped_daily(d) for d in todo))  # the client throttles
+    got = [(d, f) for d, f in zip(todo, frames) if len(f)]
+    if got:
+        root.mkdir(parents=True, exist_ok=True)
+        for d, f in got:
+            tmp = root / f"{d}.parquet.tmp"
+            pq.write_table(pa.Table.from_pandas(f[BAR_COLS], schema=SCHEMA, preserve_index=False), tmp)
+            os.replace(tmp, root / f"{d}.parquet")
+        logger.info(f"Market bars: {len(got)} sessions, {sum(len(f) for _, f in got)} bars loaded")
+    have = [d for d in days if (root / f"{d}.parquet").exists()]
+    return have[-1] if have else None
+
+
+def _tail_bars(store: BarStore, n: int, asof: str | None) -> pd.DataFrame:
+    """
+    Last n bars per symbol on or before `asof` (default: latest date on disk), straight from
+    the per-symbol and market-wide Parquet files via DuckDB.
+    """
+    globs = [g for g in (store.root / "*.parquet", market_dir(store) / "*.parquet") if any(g.parent.glob(g.name))]
+    if not globs:
+        return pd.DataFrame(columns=["symbol", "rn", "timestamp", "high", "low", "close", "volume"])
+    bars = " UNION ALL ".join(
+        f"SELECT symbol, timestamp, high, low, close, volume, {i} AS src FROM read_parquet('{g.as_posix()}')"
+        for i, g in enumerate(globs)
+    )
+    con = get_con()
+    if asof is None:
+        latest = con.execute(f"SELECT max(timestamp) FROM ({bars})").fetchone()[0]
+        asof = pd.Timestamp(latest).tz_convert(MARKET_TZ).strftime("%Y-%m-%d")
+    hi = pd.Timestamp(asof, tz=MARKET_TZ) + pd.Timedelta(days=1)
+    # Exactly the last n sessions; lets DuckDB skip every other row before the window sort
+    lo = sessions_back(n - 1, asof).tz_localize(MARKET_TZ)
+    return con.execute(
+        f"""
+        SELECT symbol, rn, timestamp, high, low, close, volume FROM (
+            SELECT *, row_number() OVER (PARTITION BY symbol ORDER BY timestamp DESC) AS rn FROM (
+                SELECT * FROM ({bars}) WHERE timestamp >= ? AND timestamp < ?
+                -- a session may be in both the symbol's history and the market files
+                QUALIFY row_number() OVER (
+                    PARTITION BY symbol, CAST(timezone('{MARKET_TZ}', timestamp) AS DATE) ORDER BY src
+                ) = 1
+            )
+        ) WHERE rn <= ?
+        """,
+        [lo.to_pydatetime(), hi.to_pydatetime(), n],
+    ).df()
+
+
+def screen_universe(
+    store: BarStore | None = None,
+    *,
+    min_price: float = 2.0,
+    min_atr_pct: float = 0.03,
+    min_adv_usd: float = 0.0,
+    min_avg_vol: float = 0.0,
+    lookback: int = 20,
+    asof: str | None = None,
+    symbols: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Screen every symbol in the bar store (and the market-wide bars of `refresh_market`) on
+    its last `lookback` sessions.
+
+    Columns: price (last close), atr_pct, adv_usd (mean close x volume), avg_vol, last_date.
+    Only symbols with a bar on the latest session in the store pass. Survivors are ranked by
+    ATR% (most volatile first), then by dollar volume. One DuckDB query over the window serves
+    every symbol, so this does not go through the per-symbol `FeatureCache`.
+    """
+    store = store or BarStore()
+    long = _tail_bars(store, lookback + 1, asof)
+    cols = ["price", "atr_pct", "adv_usd", "avg_vol", "last_date"]
+    if symbols is not None:
+        long = long[long["symbol"].isin(set(symbols))]
+    if long.empty:
+        return pd.DataFrame(columns=cols, index=pd.Index([], name="symbol"))
+
+    # Wide (row = bars back, column = symbol) arrays, oldest row first
+    wide = long.pivot(index="rn", columns="symbol").sort_index(ascending=False)
+    syms = wide.columns.get_level_values(1).unique()
+    high, low, close, volume = (wide[f].reindex(columns=syms).to_numpy(float) for f in ("high", "low", "close", "volume"))
+    last_ts = wide["timestamp"].reindex(columns=syms).iloc[-1]
+
+    win = slice(-lookback, None)
+    out = pd.DataFrame(
+        {
+            "price": close[-1],
+            "atr_pct": atr_pct_arr(high, low, close, lookback)[-1],
+            "adv_usd": np.nanmean(close[win] * volume[win], axis=0),
+            "avg_vol": np.nanmean(volume[win], axis=0),
+            "last_date": pd.to_datetime(last_ts.to_numpy()),
+        },
+        index=pd.Index(syms, name="symbol"),
+    )
+    keep = (
+        (out["last_date"] == out["last_date"].max())
+        & (out["price"] >= min_price)
+        & (out["atr_pct"] >= min_atr_pct)
+        & (out["adv_usd"] >= min_adv_usd)
+        & (out["avg_vol"] >= min_avg_vol)
+    )
+    return out[keep].sort_values(["atr_pct", "adv_usd"], ascending=False)[cols]
+
+
+def build_universe(
+    min_price: float = 2.0,
+    min_atr_pct: float = 0.03,
+    min_adv_usd: float = 0.0,
+    min_avg_vol: float = 0.0,
+    *,
+    store: BarStore | None = None,
+    max_names: int | None = None,
+    asof: str | None = None,
+) -> list[str]:
+    """
+    Screened, ranked symbols from local history as of `asof` (e.g. the last session from
+    `refresh_market`); falls back to DEFAULT_UNIVERSE if the store is empty.
+    """
+    store = store or BarStore()
+    if not store.symbols() and not any(market_dir(store).glob("*.parquet")):
+        logger.warning("Bar store is empty; using the default universe")
+        return DEFAULT_UNIVERSE
+    ranked = screen_universe(
+        store,
+        min_price=min_price,
+        min_atr_pct=min_atr_pct,
+        min_adv_usd=min_adv_usd,
+        min_avg_vol=min_avg_vol,
+        asof=asof,
+    )
+    names = ranked.index.tolist()
+    return names[:max_names] if max_names else names
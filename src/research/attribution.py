@@ -0,0 +1,294 @@
+"""
+P&L attribution over stored positions and daily bars, computed in DuckDB.
+
+Positions (shares held from close(T) to the next bar, as `backtest_panel` produces them) live
+in artifacts/positions/year=YYYY/. Each position is resolved against its entry and exit bars
+with the `simulate_day` rule in SQL and cached per BTConfig under artifacts/attribution/;
+an update only resolves positions newer than the cache, reading just the bar files of the
+symbols traded, unless the positions it already resolved were rewritten (e.g. by a backtest
+with other signal settings), which rebuilds it. Reports then aggregate the (small) trade cache.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import typer
+
+from src.core.config import load_settings
+from src.core.log import logger
+from src.core.storage import ART, get_con
+from src.core.timeutils import next_session, sessions_between
+from src.data.panel import Panel
+from src.data.store import MARKET_TZ, BarStore
+from src.research.backtest import BTConfig
+from src.research.panel_backtest import PanelResult, backtest_panel
+
+app = typer.Typer(add_completion=False)
+
+POSITIONS_DIR = ART / "positions"
+ATTR_DIR = ART / "attribution"
+POSITIONS_SCHEMA = pa.schema([
+    ("date", pa.date32()), ("exit_date", pa.date32()), ("symbol", pa.string()), ("qty", pa.int64()),
+])
+
+
+# --- Positions ---
+
+def save_positions(result: PanelResult, panel: Panel, root: Path | str | None = None) -> int:
+    """
+    Store the non-zero positions of a panel backtest in long form, one file per year (years
+    present in `result` are replaced). Returns rows written.
+    """
+    root = Path(root) if root is not None else POSITIONS_DIR
+    pos = result.positions
+    n = len(pos)
+    exits = panel.dates[1:n + 1]
+    if len(exits) < n:  # last row resolves on a bar the panel does not have yet
+        exits = exits.append(pd.DatetimeIndex([next_session(pos.index[-1])]))
+    q = pos.to_numpy()
+    rows, cols = np.nonzero(q)
+    long = pd.DataFrame({
+        "date": pos.index[rows].date,
+        "exit_date": exits[rows].date,
+        "symbol": np.asarray(pos.columns, dtype=object)[cols],
+        "qty": q[rows, cols].astype(np.int64),
+    })
+    years = pd.DatetimeIndex(pos.index).year
+    for y in np.unique(years):
+        part = long[pd.DatetimeIndex(long["date"]).year == y] if len(long) else long
+        d = root / f"year={y}"
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = d / "positions.parquet.tmp"
+        pq.write_table(pa.Table.from_pandas(part, schema=POSITIONS_SCHEMA, preserve_index=False), tmp)
+        os.replace(tmp, d / "positions.parquet")
+    return len(long)
+
+
+def _glob(root: Path, pattern: str) -> str | None:
+    return (root / pattern).as_posix() if any(root.glob(pattern)) else None
+
+
+def strategy_config() -> BTConfig:
+    """BTConfig of the configured live strategy (signal and exit parameters from settings)."""
+    cfg = load_settings().strat
+    return BTConfig(
+        breakout_threshold=cfg.signal["breakout_threshold"],
+        vol_multiplier=cfg.signal["vol_multiplier"],
+        stop_loss_pct=cfg.execution["stop_loss_pct"],
+        trail_start_pct=cfg.execution["trail_start_pct"],
+        trail_pct=cfg.execution["trail_pct"],
+    )
+
+
+# --- Trade cache ---
+
+def config_key(cfg: BTConfig) -> str:
+    """
+    Cache directory name for the exit rule parameters. Signal parameters only change which
+    positions exist, which `update_attribution` checks against the positions digest.
+    """
+    keep = {k: v for k, v in asdict(cfg).items() if k in ("stop_loss_pct", "trail_start_pct", "trail_pct", "cost_bps")}
+    return hashlib.blake2b(json.dumps(keep, sort_keys=True).encode(), digest_size=6).hexdigest()
+
+
+def _positions_digest(positions: str, through) -> str:
+    """Order-independent digest of the stored positions dated on or before `through`."""
+    h = get_con().execute(
+        f"SELECT bit_xor(hash(date, exit_date, symbol, qty)) FROM read_parquet('{positions}', hive_partitioning = false)"
+        " WHERE date <= ?",
+        [through],
+    ).fetchone()[0]
+    return f"{h or 0:016x}"
+
+
+_RESOLVE_SQL = """
+WITH p AS (
+    SELECT * FROM read_parquet('{positions}', hive_partitioning = false) WHERE date > ?
+),
+b AS (
+    SELECT symbol, CAST(timezone('{tz}', timestamp) AS DATE) AS d, high, low, close
+    FROM read_parquet({bars}) WHERE timestamp >= ?
+),
+t AS (
+    SELECT p.date, p.symbol, p.qty, e.close AS entry,
+           CASE
+               WHEN (e.close - x.low) / e.close >= {stop} THEN -{stop}
+               WHEN (x.high - e.close) / e.close >= {trail_start}
+                   THEN greatest({trail_start} - {trail}, x.close / e.close - 1)
+               ELSE x.close / e.close - 1
+           END - {cost} AS ret
+    FROM p
+    JOIN b e ON e.symbol = p.symbol AND e.d = p.date
+    LEFT JOIN b x ON x.symbol = p.symbol AND x.d = p.exit_date
+    WHERE p.exit_date <= ?
+)
+SELECT date, symbol, qty, entry, ret, coalesce(qty * entry * ret, 0.0) AS pnl, qty * entry AS notional FROM t
+"""
+
+
+def update_attribution(
+    cfg: BTConfig,
+    *,
+    store: BarStore | None = None,
+    positions_root: Path | str | None = None,
+    root: Path | str | None = None,
+) -> int:
+    """
+    Resolve positions newer than the trade cache whose exit bar is in the store and append
+    them as one Parquet part. The cache is dropped first if the positions it covers no longer
+    match the digest recorded in its manifest. Returns trades added.
+    """
+    store = store or BarStore()
+    positions_root = Path(positions_root) if positions_root is not None else POSITIONS_DIR
+    cache = Path(root) if root is not None else ATTR_DIR
+    cache = cache / config_key(cfg)
+    positions = _glob(positions_root, "year=*/*.parquet")
+    if positions is None:
+        return 0
+    con = get_con()
+    manifest = cache / "manifest.json"
+    parts = _glob(cache, "*.parquet")
+    done = con.execute(f"SELECT max(date) FROM read_parquet('{parts}')").fetchone()[0] if parts else None
+    if done is not None:
+        seen = json.loads(manifest.read_text()).get("digest") if manifest.exists() else None
+        if seen != _positions_digest(positions, done):
+            logger.info(f"Attribution: positions through {done} were rewritten; rebuilding cache {cache.name}")
+            for p in cache.glob("*.parquet"):
+                p.unlink()
+            manifest.unlink(missing_ok=True)
+            done = None
+    done = done or pd.Timestamp("1900-01-01").date()
+
+    syms, first = con.execute(
+        f"SELECT list(DISTINCT symbol), min(date) FROM read_parquet('{positions}', hive_partitioning = false) WHERE date > ?",
+        [done],
+    ).fetchone()
+    files = [store.path(s).as_posix() for s in (syms or []) if store.path(s).exists()]
+    if not files:
+        return 0
+    lo = pd.Timestamp(first, tz=MARKET_TZ).tz_convert("UTC").to_pydatetime()
+    last_bar = con.execute(f"SELECT max(timestamp) FROM read_parquet({files!r})").fetchone()[0]
+    asof = pd.Timestamp(last_bar).tz_convert(MARKET_TZ).date()
+
+    sql = _RESOLVE_SQL.format(
+        positions=positions, bars=repr(files), tz=MARKET_TZ, stop=cfg.stop_loss_pct,
+        trail_start=cfg.trail_start_pct, trail=cfg.trail_pct, cost=cfg.cost_bps / 1e4,
+    )
+    cache.mkdir(parents=True, exist_ok=True)
+    out = cache / f"trades-{pd.Timestamp(first):%Y%m%d}-{asof:%Y%m%d}.parquet"
+    tmp = out.with_suffix(".tmp")
+    con.execute(f"COPY ({sql}) TO '{tmp.as_posix()}' (FORMAT parquet)", [done, lo, asof])
+    n = pq.read_metadata(tmp).num_rows
+    if n:
+        os.replace(tmp, out)
+        through = con.execute(f"SELECT max(date) FROM read_parquet('{_glob(cache, '*.parquet')}')").fetchone()[0]
+        manifest.write_text(json.dumps({"through": str(through), "digest": _positions_digest(positions, through)}))
+    else:
+        tmp.unlink()
+    logger.info(f"Attribution: {n} trades resolved through {asof} (cache {cache.name})")
+    return n
+
+
+# --- Aggregations ---
+
+def _trades(cfg: BTConfig, root: Path | str | None) -> str | None:
+    cache = (Path(root) if root is not None else ATTR_DIR) / config_key(cfg)
+    return _glob(cache, "*.parquet")
+
+
+_PERIODS = {"day": "date", "month": "strftime(date, '%Y-%m')", "year": "CAST(year(date) AS VARCHAR)"}
+
+
+def attribution(
+    cfg: BTConfig,
+    *,
+    by: str = "symbol",
+    nav_usd: float,
+    start: str | None = None,
+    end: str | None = None,
+    root: Path | str | None = None,
+) -> pd.DataFrame:
+    """
+    P&L attribution from the trade cache, grouped `by` "symbol" or a period ("day", "month",
+    "year"): pnl (USD), contribution (pnl / NAV), trades, hit_rate, and exposure (gross
+    notional / NAV averaged over the group's days with positions; for symbols, over every
+    such day in the window).
+    """
+    glob = _trades(cfg, root)
+    cols = ["pnl", "contribution", "trades", "hit_rate", "exposure"]
+    if glob is None:
+        return pd.DataFrame(columns=cols, index=pd.Index([], name=by))
+    nav = repr(float(nav_usd))
+    if by == "symbol":
+        key, days = "symbol", "(SELECT count(DISTINCT date) FROM t)"
+    else:
+        key, days = _PERIODS[by], "count(DISTINCT date)"
+    df = get_con().execute(
+        f"""
+        WITH t AS (
+            SELECT * FROM read_parquet('{glob}')
+            WHERE date >= coalesce(CAST(? AS DATE), DATE '1900-01-01')
+              AND date <= coalesce(CAST(? AS DATE), DATE '2999-12-31')
+        )
+        SELECT {key} AS "{by}", sum(pnl) AS pnl, sum(pnl) / {nav} AS contribution, count(*) AS trades,
+               avg(CAST(ret > 0 AS DOUBLE)) AS hit_rate, sum(notional) / {days} / {nav} AS exposure
+        FROM t GROUP BY 1 ORDER BY 1
+        """,
+        [start, end],
+    ).df()
+    return df.set_index(by)[cols]
+
+
+def daily_returns(
+    cfg: BTConfig, *, nav_usd: float, end: str | None = None, root: Path | str | None = None
+) -> pd.Series:
+    """Portfolio return per session (pnl / NAV) through `end`, zero on sessions without positions."""
+    glob = _trades(cfg, root)
+    if glob is None:
+        return pd.Series([], index=pd.DatetimeIndex([], name="date"), dtype=float, name="ret")
+    df = get_con().execute(
+        f"""
+        SELECT date, sum(pnl) / {float(nav_usd)!r} AS ret FROM read_parquet('{glob}')
+        WHERE date <= coalesce(CAST(? AS DATE), DATE '2999-12-31') GROUP BY date ORDER BY date
+        """,
+        [end],
+    ).df()
+    if df.empty:
+        return pd.Series([], index=pd.DatetimeIndex([], name="date"), dtype=float, name="ret")
+    s = df.set_index(pd.DatetimeIndex(df["date"], name="date"))["ret"]
+    days = sessions_between(s.index[0], end or s.index[-1]).rename("date")
+    return s.reindex(days, fill_value=0.0)
+
+
+@app.command()
+def main(
+    start: str = typer.Option("2015-01-01", help="First bar date (YYYY-MM-DD)"),
+    end: str = typer.Option(pd.Timestamp.today().strftime("%Y-%m-%d"), help="Last bar date"),
+    nav_usd: float = typer.Option(100_000.0, help="Constant NAV used for sizing"),
+):
+    """Backtest the configured strategy over the bar store and store its positions for reporting."""
+    cfg = load_settings()
+    panel = Panel.from_store(BarStore(), start=start, end=end)
+    if not panel.symbols:
+        logger.error("Bar store is empty; fetch history first")
+        raise typer.Exit(code=1)
+    res = backtest_panel(
+        panel, strategy_config(), nav_usd=nav_usd,
+        per_trade_risk=cfg.default.risk["per_trade_risk"],
+        max_positions=cfg.default.risk["max_positions"],
+        max_gross_exposure=cfg.default.risk["max_gross_exposure"],
+        per_name_cap=cfg.default.risk.get("per_name_cap", None),
+    )
+    n = save_positions(res, panel)
+    logger.info(f"Stored {n} positions over {len(res.positions)} sessions")
+
+
+if __name__ == "__main__":
+    app()
@@ -2,7 +2,7 @@ from __future__ import annotations
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
-from src.strategy.vobreakout import breakout_long
+from src.strategy.vobreakout import breakout_from_levels, breakout_long, breakout_long_arr
 
 
 @dataclass
@@ -32,11 +32,55 @@ def simulate_day(entry: float, next_high: float, next_low: float, next_close: fl
     return (next_close / entry) - 1.0
 
 
-def backtest_breakout(df: pd.DataFrame, cfg: BTConfig) -> pd.Series:
+def simulate_days(
+    entry: np.ndarray, next_high: np.ndarray, next_low: np.ndarray, next_close: np.ndarray, cfg: BTConfig
+) -> np.ndarray:
     """
-    Vectorized-ish daily loop: when breakout triggers on day T, assume entry at close(T),
+    Array version of `simulate_day`: same stop -> trail -> close-to-close priority,
+    evaluated element-wise. NaN inputs propagate like the scalar path.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c2c = next_close / entry - 1.0
+        stopped = (entry - next_low) / entry >= cfg.stop_loss_pct
+        trailed = (next_high - entry) / entry >= cfg.trail_start_pct
+    # fmax mirrors the builtin max() used by simulate_day when c2c is NaN
+    locked = np.fmax(cfg.trail_start_pct - cfg.trail_pct, c2c)
+    return np.where(stopped, -cfg.stop_loss_pct, np.where(trailed, locked, c2c))
+
+
+def backtest_breakout(df: pd.DataFrame, cfg: BTConfig, features: pd.DataFrame | None = None) -> pd.Series:
+    """
+    Vectorized daily backtest: when breakout triggers on day T, assume entry at close(T),
     outcome materializes on day T+1 using next-day OHLC.
     Returns daily return series (net of modeled costs).
+    `features` (e.g. from `FeatureCache.get`) supplies prior highs and volume means instead
+    of recomputing the rolling windows.
+    """
+    assert {"open", "high", "low", "close", "volume"}.issubset(df.columns), "OHLCV columns missing"
+    n = len(df) - 1
+    if n <= 0:
+        return pd.Series([], index=pd.Index([], name="date"), dtype=float)
+    c = df["close"].to_numpy(dtype=float)
+    h = df["high"].to_numpy(dtype=float)
+    lo = df["low"].to_numpy(dtype=float)
+    v = df["volume"].to_numpy(dtype=float)
+    if features is not None:
+        sig = breakout_from_levels(
+            h, v, features["prev_high"].to_numpy(float), features["vol_mean"].to_numpy(float),
+            cfg.breakout_threshold, cfg.vol_multiplier,
+        )[:n]
+    else:
+        sig = breakout_long_arr(h, v, cfg.breakout_threshold, cfg.vol_multiplier)[:n]
+
+    r = simulate_days(c[:n], h[1:], lo[1:], c[1:], cfg) - (cfg.cost_bps / 1e4)
+    r = np.where(sig, r, 0.0)
+    r[np.isnan(r)] = 0.0
+    return pd.Series(r, index=pd.Index(df.index[:n], name="date"))
+
+
+def backtest_breakout_loop(df: pd.DataFrame, cfg: BTConfig) -> pd.Series:
+    """
+    Reference per-row implementation of `backtest_breakout`, kept for parity tests.
     """
     assert {"open", "high", "low", "close", "volume"}.issubset(df.columns), "OHLCV columns missing"
     sig = breakout_long(df, cfg.breakout_threshold, cfg.vol_multiplier).astype(bool)
@@ -60,4 +104,4 @@ def backtest_breakout(df: pd.DataFrame, cfg: BTConfig) -> pd.Series:
         r -= (cfg.cost_bps / 1e4)
         rets.append(r)
         idx.append(df.index[i])
-    return pd.Series(rets, index=pd.Index(idx, name="date")).fillna(0.0)
\ No newline at end of file
+    return pd.Series(rets, index=pd.Index(idx, name="date")).fillna(0.0)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.research.metrics import PerfBatch, performance, performance_rows
+
+CI_METRICS = ("ann_ret", "sharpe", "sortino", "max_dd", "calmar")
+
+
+def default_block(n: int) -> int:
+    """Block length ~ n^(1/3), the usual rate for block bootstraps of a mean-like statistic."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def block_indices(n: int, n_resamples: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """Circular moving-block resamples: (n_resamples x n) day indices built from random block starts."""
+    k = -(-n // block)
+    starts = rng.integers(0, n, size=(n_resamples, k, 1), dtype=np.int64)
+    return ((starts + np.arange(block)) % n).reshape(n_resamples, k * block)[:, :n]
+
+
+def iid_indices(n: int, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """Monte-Carlo resamples: days drawn independently with replacement."""
+    return rng.integers(0, n, size=(n_resamples, n), dtype=np.int64)
+
+
+def _chunk(r: np.ndarray, size: int, method: str, block: int, seed: np.random.SeedSequence) -> PerfBatch:
+    rng = np.random.default_rng(seed)
+    n = len(r)
+    idx = block_indices(n, size, block, rng) if method == "block" else iid_indices(n, size, rng)
+    return performance_rows(r[idx])
+
+
+def resample_performance(
+    returns: pd.Series | np.ndarray,
+    n_resamples: int = 10_000,
+    *,
+    method: str = "block",
+    block: int | None = None,
+    seed: int = 0,
+    chunk: int = 500,
+    n_jobs: int | None = None,
+) -> PerfBatch:
+    """
+    Metrics of `n_resamples` resampled copies of a daily return series ("block" bootstrap or
+    "iid" Monte-Carlo). Each chunk builds its index matrix, gathers a (resamples x days)
+    block and scores it in one `performance_rows` call; chunks run on a thread pool (numpy
+    releases the GIL in the heavy kernels). Chunk seeds are spawned from `seed`, so results
+    do not depend on `n_jobs`.
+    """
+    if method not in ("block", "iid"):
+        raise ValueError(f"unknown resampling method {method!r}")
+    r = pd.Series(returns).dropna().to_numpy(dtype=float)
+    block = block or default_block(len(r))
+    sizes = [min(chunk, n_resamples - i) for i in range(0, n_resamples, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if len(r) == 0 or not sizes:
+        return performance_rows(np.empty((0, 0)))
+    if n_jobs == 1 or len(sizes) == 1:
+        parts = [_chunk(r, k, method, block, s) for k, s in zip(sizes, seeds)]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(lambda a: _chunk(r, *a), [(k, method, block, s) for k, s in zip(sizes, seeds)]))
+    return PerfBatch(**{f: np.concatenate([getattr(p, f) for p in parts]) for f in vars(parts[0])})
+
+
+def confidence_intervals(
+    returns: pd.Series,
+    n_resamples: int = 10_000,
+    *,
+    level: float = 0.95,
+    metrics: Iterable[str] = CI_METRICS,
+    **kw,
+) -> pd.DataFrame:
+    """Point estimate and percentile interval per metric: columns point, lo, hi (rows = metrics)."""
+    dist = resample_performance(returns, n_resamples, **kw)
+    point = performance(returns)
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    rows = {}
+    for m in metrics:
+        vals = getattr(dist, m)
+        vals = vals[np.isfinite(vals)]
+        lo, hi = np.percentile(vals, q) if len(vals) else (np.nan, np.nan)
+        rows[m] = {"point": getattr(point, m), "lo": lo, "hi": hi}
+    return pd.DataFrame.from_dict(rows, orient="index")
@@ -1,7 +1,10 @@
 from __future__ import annotations
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from dataclasses import dataclass
 
 
 ANN_DAYS = 252
@@ -68,3 +71,195 @@ def performance(returns: pd.Series) -> Perf:
         avg_loss=float(avg_loss),
         n_trades=int(len(nz)),
     )
+
+
+# --- Batched metrics: many return series at once ---
+
+@dataclass
+class PerfBatch:
+    """`Perf` fields as arrays, one entry per column of the scored returns matrix."""
+    ann_ret: np.ndarray
+    ann_vol: np.ndarray
+    sharpe: np.ndarray
+    sortino: np.ndarray
+    max_dd: np.ndarray
+    calmar: np.ndarray
+    win_rate: np.ndarray
+    avg_win: np.ndarray
+    avg_loss: np.ndarray
+    n_trades: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.sharpe)
+
+    def __getitem__(self, k: int) -> Perf:
+        return Perf(**{f: (int if f == "n_trades" else float)(v[k]) for f, v in vars(self).items()})
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        return pd.DataFrame(vars(self), index=index)
+
+
+def _mean_std(x0: np.ndarray, n: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Column mean and ddof=1 std of the `n` counted entries of `x0`, where every other entry
+    is exactly 0 (each contributes mean^2 to the centered sum, which is taken back out).
+    """
+    mean = x0.sum(axis=1) / np.maximum(n, 1)
+    ss = ((x0 - mean[:, None]) ** 2).sum(axis=1) - (x0.shape[1] - n) * mean ** 2
+    std = np.sqrt(np.maximum(ss, 0.0) / np.where(n > 1, n - 1, np.nan))
+    return mean, std
+
+
+def _perf_block(r: np.ndarray) -> dict:
+    """Metrics for a (series x days) block; rows are contiguous so every scan is along axis 1."""
+    missing = np.isnan(r)
+    r0 = np.where(missing, 0.0, r)
+    n = r.shape[1] - missing.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean, std = _mean_std(r0, n)
+        mu = mean * ANN_DAYS
+        vol = std * np.sqrt(ANN_DAYS)
+        sharpe = np.where(vol > 0, mu / vol, np.nan)
+
+        loss = np.minimum(r0, 0.0)
+        nl = np.count_nonzero(loss, axis=1)
+        loss_mean, loss_std = _mean_std(loss, nl)
+        downside = loss_std * np.sqrt(ANN_DAYS)
+        sortino = np.where(downside > 0, mu / downside, np.nan)
+
+        gain = np.maximum(r0, 0.0)
+        nw = np.count_nonzero(gain, axis=1)
+        nz = nw + nl
+        win_rate = np.where(nz > 0, nw / nz, 0.0)
+        avg_win = np.where(nw > 0, gain.sum(axis=1) / nw, 0.0)
+        avg_loss = np.where(nl > 0, loss_mean, 0.0)
+
+        # Missing days compound as flat, which is what dropping them does
+        cum = np.cumprod(r0 + 1.0, axis=1)
+        dd = cum / np.maximum.accumulate(cum, axis=1)
+        mdd = dd.min(axis=1, initial=1.0) - 1.0
+        calmar = np.where(mdd < 0, mu / np.abs(mdd), np.nan)
+
+    empty = n == 0
+    return dict(
+        ann_ret=np.where(empty, 0.0, mu),
+        ann_vol=np.where(empty, 0.0, vol),
+        sharpe=sharpe,
+        sortino=sortino,
+        max_dd=mdd,
+        calmar=calmar,
+        win_rate=win_rate,
+        avg_win=avg_win,
+        avg_loss=avg_loss,
+        n_trades=nz.astype(np.int64),
+    )
+
+
+def performance_batch(returns: np.ndarray | pd.DataFrame, chunk: int = 64) -> PerfBatch:
+    """
+    `performance` for every column of a (days x series) returns matrix in a few vectorized
+    reductions; NaN marks a missing day. Columns are scored `chunk` at a time to bound the
+    temporaries (cumprod/peak) on very wide sweeps.
+    """
+    r = np.asarray(returns, dtype=float)
+    if r.ndim == 1:
+        r = r[:, None]
+    # Series-major copy per chunk: cumulative scans run ~3x faster along contiguous rows
+    parts = [
+        _perf_block(np.ascontiguousarray(r[:, i:i + chunk].T)) for i in range(0, r.shape[1], chunk)
+    ] or [_perf_block(r.T)]
+    return PerfBatch(**{k: np.concatenate([p[k] for p in parts]) for k in parts[0]})
+
+
+def performance_rows(r: np.ndarray) -> PerfBatch:
+    """`performance_batch` for a series-major (series x days) matrix, e.g. bootstrap resamples."""
+    return PerfBatch(**_perf_block(np.asarray(r, dtype=float)))
+
+
+# --- Incremental metrics: one day at a time ---
+
+@dataclass
+class PerfAccumulator:
+    """
+    Running `performance` inputs updated in O(1) per day: Welford mean/variance of all days
+    and of losing days, compounded equity with its running peak and worst drawdown, and
+    win/loss tallies. Serializable with the run (`to_dict` / `save`).
+    """
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    neg_n: int = 0
+    neg_mean: float = 0.0
+    neg_m2: float = 0.0
+    cum: float = 1.0
+    peak: float = 0.0
+    max_dd: float = 0.0
+    wins: int = 0
+    win_sum: float = 0.0
+    losses: int = 0
+    loss_sum: float = 0.0
+
+    def update(self, r: float) -> None:
+        if r is None or np.isnan(r):
+            return
+        self.n += 1
+        d = r - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (r - self.mean)
+
+        self.cum *= 1.0 + r
+        self.peak = self.cum if self.n == 1 else max(self.peak, self.cum)
+        self.max_dd = min(self.max_dd, self.cum / self.peak - 1.0)
+
+        if r > 0:
+            self.wins += 1
+            self.win_sum += r
+        elif r < 0:
+            self.losses += 1
+            self.loss_sum += r
+            self.neg_n += 1
+            d = r - self.neg_mean
+            self.neg_mean += d / self.neg_n
+            self.neg_m2 += d * (r - self.neg_mean)
+
+    def update_many(self, returns) -> None:
+        for r in np.asarray(returns, dtype=float):
+            self.update(float(r))
+
+    def perf(self) -> Perf:
+        if self.n == 0:
+            return Perf(0, 0, np.nan, np.nan, 0, np.nan, 0, 0, 0, 0)
+        mu = self.mean * ANN_DAYS
+        vol = np.sqrt(self.m2 / (self.n - 1)) * np.sqrt(ANN_DAYS) if self.n > 1 else np.nan
+        downside = np.sqrt(self.neg_m2 / (self.neg_n - 1)) * np.sqrt(ANN_DAYS) if self.neg_n > 1 else np.nan
+        nz = self.wins + self.losses
+        return Perf(
+            ann_ret=float(mu),
+            ann_vol=float(vol),
+            sharpe=float(mu / vol) if vol > 0 else np.nan,
+            sortino=float(mu / downside) if downside > 0 else np.nan,
+            max_dd=float(self.max_dd),
+            calmar=float(mu / abs(self.max_dd)) if self.max_dd < 0 else np.nan,
+            win_rate=self.wins / nz if nz else 0.0,
+            avg_win=self.win_sum / self.wins if self.wins else 0.0,
+            avg_loss=self.loss_sum / self.losses if self.losses else 0.0,
+            n_trades=nz,
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> PerfAccumulator:
+        return cls(**d)
+
+    def save(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict()))
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> PerfAccumulator:
+        return cls.from_dict(json.loads(path.read_text())) if path.exists() else cls()
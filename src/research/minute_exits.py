@@ -0,0 +1,152 @@
+"""
+Path-accurate exits for the daily breakout backtest.
+
+`simulate_day` only sees the next day's OHLC, so it has to assume an order of events (stop
+first, then a fixed trail lock-in). Here the next session's minute path decides instead:
+for every trade the first minute through the stop, the first minute through the trail-start
+level and the first minute through the (ratcheting) trailing stop are found with vectorized
+first-crossing searches over a (trades x minutes) block gathered from the memory-mapped
+minute file; only the rows of the exit sessions are ever read.
+"""
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.log import logger
+from src.data.minute import NS_PER_MIN, RTH_CLOSE, RTH_OPEN, MinuteStore, local_minutes
+from src.data.panel import bar_dates
+from src.research.backtest import BTConfig, simulate_days
+from src.strategy.vobreakout import breakout_long_arr
+
+EXIT_CLOSE, EXIT_STOP, EXIT_TRAIL, EXIT_NO_DATA = 0, 1, 2, -1
+SESSION_MINUTES = RTH_CLOSE - RTH_OPEN
+
+
+def first_true(mask: np.ndarray) -> np.ndarray:
+    """Column index of the first True in each row of a 2-D mask, or -1 if none."""
+    i = mask.argmax(axis=1)
+    return np.where(mask[np.arange(len(mask)), i], i, -1)
+
+
+def resolve_exits(
+    entry: np.ndarray,
+    o: np.ndarray,
+    h: np.ndarray,
+    lo: np.ndarray,
+    c: np.ndarray,
+    n_bars: np.ndarray,
+    cfg: BTConfig,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Exit return, exit reason and exit bar for each trade, given (trades x minutes) paths of
+    its exit session (rows right-padded with NaN past `n_bars`).
+
+    Rules, matching the intraday engine: a bar first tests the stop in force before it
+    (hard stop, or once armed max(hard stop, peak high x (1 - trail_pct))), gaps fill at the
+    open; the trail arms on the first bar whose high reaches entry x (1 + trail_start_pct);
+    otherwise the trade exits at the session close.
+    """
+    e = entry[:, None]
+    stop = e * (1 - cfg.stop_loss_pct)
+    with np.errstate(invalid="ignore"):
+        i_stop = first_true(lo <= stop)
+        i_arm = first_true(h >= e * (1 + cfg.trail_start_pct))
+
+        # Trailing level in force at bar j: from the running peak up to bar j-1 (after arming)
+        peak = np.fmax.accumulate(np.where(np.arange(h.shape[1]) >= np.maximum(i_arm, 0)[:, None], h, np.nan), axis=1)
+        level = np.fmax(stop, np.concatenate([np.full((len(h), 1), np.nan), peak[:, :-1]], axis=1) * (1 - cfg.trail_pct))
+        armed_after = np.arange(h.shape[1]) > i_arm[:, None]
+        i_trail = first_true((lo <= level) & armed_after & (i_arm[:, None] >= 0))
+
+    rows = np.arange(len(entry))
+    last = np.maximum(n_bars - 1, 0)
+    ret = c[rows, last] / entry - 1.0
+    reason = np.full(len(entry), EXIT_CLOSE)
+    bar = last.copy()
+
+    # Hard stop before (or on) the arming bar
+    hard = (i_stop >= 0) & ((i_arm < 0) | (i_stop <= i_arm))
+    fill = np.fmin(o[rows, i_stop], stop[:, 0])
+    ret = np.where(hard, fill / entry - 1.0, ret)
+    reason[hard], bar[hard] = EXIT_STOP, i_stop[hard]
+
+    trail = ~hard & (i_trail >= 0)
+    it = np.maximum(i_trail, 0)
+    fill = np.fmin(o[rows, it], level[rows, it])
+    ret = np.where(trail, fill / entry - 1.0, ret)
+    reason[trail], bar[trail] = EXIT_TRAIL, i_trail[trail]
+    return ret, reason, bar
+
+
+def _session_blocks(cols: dict, key: np.ndarray, days: np.ndarray):
+    """Gather the RTH minutes of each epoch day in `days` into (len(days) x 390) blocks."""
+    lo = np.searchsorted(key, days * 1440 + RTH_OPEN)
+    hi = np.searchsorted(key, days * 1440 + RTH_CLOSE)
+    n_bars = hi - lo
+    offs = np.arange(SESSION_MINUTES)
+    valid = offs[None, :] < n_bars[:, None]
+    rows = np.where(valid, lo[:, None] + offs[None, :], 0)
+    blocks = {}
+    for f in ("open", "high", "low", "close"):
+        arr = cols[f]
+        blocks[f] = np.where(valid, arr[rows] if len(arr) else np.nan, np.nan)
+    return blocks, n_bars
+
+
+def path_exits(
+    store: MinuteStore, symbol: str, entry: np.ndarray, exit_dates: pd.DatetimeIndex, cfg: BTConfig
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Path-resolved (return, reason) for trades entered at `entry` and exiting on the session
+    `exit_dates`. Trades without minute bars for their exit session get NaN / EXIT_NO_DATA.
+    """
+    ret = np.full(len(entry), np.nan)
+    reason = np.full(len(entry), EXIT_NO_DATA)
+    days = pd.DatetimeIndex(exit_dates).normalize().asi8 // (1440 * NS_PER_MIN)
+    years = pd.DatetimeIndex(exit_dates).year
+    have = set(store.years(symbol))
+    for y in np.unique(years):
+        if y not in have:
+            continue
+        sel = np.flatnonzero(years == y)
+        cols = store.columns(symbol, int(y))
+        day, mod = local_minutes(cols["timestamp"])
+        blocks, n_bars = _session_blocks(cols, day * 1440 + mod, days[sel])
+        ok = n_bars > 0
+        if not ok.any():
+            continue
+        r, why, _ = resolve_exits(
+            entry[sel][ok], *(blocks[f][ok] for f in ("open", "high", "low", "close")), n_bars[ok], cfg
+        )
+        ret[sel[ok]], reason[sel[ok]] = r, why
+    return ret, reason
+
+
+def backtest_breakout_minute(df: pd.DataFrame, cfg: BTConfig, store: MinuteStore, symbol: str) -> pd.Series:
+    """
+    `backtest_breakout` with each trade's T+1 outcome resolved on the minute path. Sessions
+    without stored minute bars fall back to the daily `simulate_days` approximation.
+    """
+    n = len(df) - 1
+    if n <= 0:
+        return pd.Series([], index=pd.Index([], name="date"), dtype=float)
+    c = df["close"].to_numpy(dtype=float)
+    h = df["high"].to_numpy(dtype=float)
+    lo = df["low"].to_numpy(dtype=float)
+    v = df["volume"].to_numpy(dtype=float)
+    sig = breakout_long_arr(h, v, cfg.breakout_threshold, cfg.vol_multiplier)[:n] & ~np.isnan(c[:n])
+
+    r = simulate_days(c[:n], h[1:], lo[1:], c[1:], cfg)
+    trades = np.flatnonzero(sig)
+    if len(trades):
+        exit_dates = bar_dates(df)[trades + 1]
+        path_r, why = path_exits(store, symbol, c[trades], exit_dates, cfg)
+        got = why != EXIT_NO_DATA
+        r[trades[got]] = path_r[got]
+        if (~got).any():
+            logger.debug(f"{symbol}: {int((~got).sum())}/{len(trades)} trades without minute bars; daily approximation used")
+    r = np.where(sig, r - cfg.cost_bps / 1e4, 0.0)
+    r[np.isnan(r)] = 0.0
+    return pd.Series(r, index=pd.Index(df.index[:n], name="date"))
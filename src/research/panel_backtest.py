@@ -0,0 +1,154 @@
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.data.panel import Panel
+from src.research.backtest import BTConfig, simulate_days
+from src.strategy.vobreakout import breakout_from_levels, breakout_long_arr, rolling_mean_arr, shift_arr
+
+LOOKBACK = 20      # bars needed before the signal window (20-day volume mean + prior high)
+MIN_HISTORY = 25   # build_targets skips symbols with fewer bars
+
+
+@dataclass
+class PanelFeatures:
+    """
+    Parameter-free inputs of the breakout rule over a whole panel, computed once and sliced
+    by row for every fold / trial: prior high, 20-bar volume mean, bars seen so far.
+    """
+
+    prev_high: np.ndarray
+    vol_mean: np.ndarray
+    hist: np.ndarray
+
+    @classmethod
+    def from_panel(cls, panel: Panel) -> PanelFeatures:
+        return cls(
+            prev_high=shift_arr(panel.high),
+            vol_mean=rolling_mean_arr(panel.volume, LOOKBACK),
+            hist=np.cumsum(np.isfinite(panel.close), axis=0),
+        )
+
+    def rows(self, lo: int, hi: int) -> PanelFeatures:
+        return PanelFeatures(**{k: v[lo:hi] for k, v in vars(self).items()})
+
+    def signal(self, high: np.ndarray, volume: np.ndarray, lo: int, hi: int, cfg: BTConfig) -> np.ndarray:
+        """`breakout_long_arr` for rows [lo, hi) from the cached windows."""
+        return breakout_from_levels(
+            high, volume, self.prev_high[lo:hi], self.vol_mean[lo:hi], cfg.breakout_threshold, cfg.vol_multiplier
+        )
+
+
+@dataclass
+class PanelResult:
+    returns: pd.Series       # portfolio return per signal date, as a fraction of NAV
+    positions: pd.DataFrame  # shares held from close(T) to T+1, date x symbol
+
+
+def size_and_cap(
+    sig: np.ndarray,
+    px: np.ndarray,
+    *,
+    nav_usd: float,
+    per_trade_risk: float,
+    stop_loss_pct: float,
+    max_positions: int,
+    max_gross_exposure: float,
+    per_name_cap: float | None = None,
+) -> np.ndarray:
+    """
+    Row-wise (one row per date) equivalent of build_targets sizing followed by
+    plan_from_targets caps, with last prices = px. Returns int64 share quantities.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        risk_per_share = px * stop_loss_pct
+        ok = sig & (risk_per_share > 0)
+        qty = np.where(ok, np.floor_divide(nav_usd * per_trade_risk, np.where(ok, risk_per_share, 1.0)), 0.0)
+        qty = np.maximum(qty, 0.0)
+
+        # Enforce max_positions: keep the largest dollar intents, ties in symbol order
+        dollars = np.where(qty > 0, qty * px, -np.inf)
+        order = np.argsort(-dollars, axis=1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(order.shape[1])[None, :], axis=1)
+        qty = np.where(rank < max_positions, qty, 0.0)
+
+        if per_name_cap:
+            max_dollars = per_name_cap * nav_usd
+            capped = np.floor_divide(max_dollars, np.where(px > 0, px, 1.0))
+            qty = np.where(qty * px > max_dollars, capped, qty)
+
+        intended = np.nansum(np.where(qty > 0, qty * px, 0.0), axis=1, keepdims=True)
+        max_total = max_gross_exposure * nav_usd
+        scale = np.where(intended > max_total, max_total / np.where(intended > 0, intended, 1.0), 1.0)
+        qty = np.where(scale < 1.0, np.floor(qty * scale), qty)
+    return np.maximum(qty, 0.0).astype(np.int64)
+
+
+def backtest_panel(
+    panel: Panel,
+    cfg: BTConfig,
+    *,
+    nav_usd: float,
+    per_trade_risk: float,
+    max_positions: int,
+    max_gross_exposure: float,
+    per_name_cap: float | None = None,
+    chunk: int = 256,
+    features: PanelFeatures | None = None,
+) -> PanelResult:
+    """
+    Cross-sectional breakout backtest over a date x symbol panel.
+
+    Each date T: signals from `breakout_long`, sizing from `risk_sized_qty` at close(T), then the
+    `plan_from_targets` caps; positions are entered at close(T) and resolved on T+1 with the
+    `simulate_day` rule. Sizing is against a constant NAV (as the EOD job does on any one day),
+    so dates are independent and the panel is processed in row chunks to bound memory.
+
+    With `features` (row-aligned with `panel`, e.g. a slice of features over the full history)
+    signals come from the cached windows and history counts carry over from before the slice.
+    """
+    T, N = panel.shape
+    n = max(T - 1, 0)
+    rets = np.zeros(n)
+    pos = np.zeros((n, N), dtype=np.int32)
+    valid = np.isfinite(panel.close)
+    seen = np.zeros(N, dtype=np.int64)  # bars seen before the current chunk
+
+    for a in range(0, n, chunk):
+        b = min(a + chunk, n)
+        if features is not None:
+            sig = features.signal(panel.high[a:b], panel.volume[a:b], a, b, cfg)
+            hist = features.hist[a:b]
+        else:
+            lo = max(0, a - LOOKBACK)
+            h = panel.high[lo:b]
+            v = panel.volume[lo:b]
+            sig = breakout_long_arr(h, v, cfg.breakout_threshold, cfg.vol_multiplier)[a - lo:]
+            hist = seen + np.cumsum(valid[a:b], axis=0)
+            seen = hist[-1]
+        px = panel.close[a:b]
+
+        qty = size_and_cap(
+            sig & (hist >= MIN_HISTORY),
+            px,
+            nav_usd=nav_usd,
+            per_trade_risk=per_trade_risk,
+            stop_loss_pct=cfg.stop_loss_pct,
+            max_positions=max_positions,
+            max_gross_exposure=max_gross_exposure,
+            per_name_cap=per_name_cap,
+        )
+        r = simulate_days(px, panel.high[a + 1:b + 1], panel.low[a + 1:b + 1], panel.close[a + 1:b + 1], cfg)
+        pnl = qty * px * (r - cfg.cost_bps / 1e4)
+        pnl[qty == 0] = 0.0
+        rets[a:b] = np.nan_to_num(pnl).sum(axis=1) / nav_usd
+        pos[a:b] = qty
+
+    idx = pd.Index(panel.dates[:n], name="date")
+    return PanelResult(
+        returns=pd.Series(rets, index=idx, name="ret"),
+        positions=pd.DataFrame(pos, index=idx, columns=panel.symbols),
+    )
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import json
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import optuna
+import pandas as pd
+import typer
+
+from src.core.config import load_settings
+from src.core.log import logger
+from src.core.storage import ART
+from src.data.panel import FIELDS, Panel
+from src.data.store import BarStore
+from src.research.backtest import BTConfig
+from src.research.metrics import performance
+from src.research.panel_backtest import MIN_HISTORY, backtest_panel
+
+app = typer.Typer(add_completion=False)
+
+TUNE_DIR = ART / "optuna"
+
+
+# --- Shared read-only data ---
+
+def share_panel(panel: Panel, root: Path) -> Path:
+    """Dump a panel to .npy files that worker processes memory-map instead of unpickling."""
+    root.mkdir(parents=True, exist_ok=True)
+    for f in FIELDS:
+        np.save(root / f"{f}.npy", np.ascontiguousarray(getattr(panel, f)))
+    np.save(root / "dates.npy", panel.dates.asi8)
+    (root / "symbols.json").write_text(json.dumps(panel.symbols))
+    return root
+
+
+def load_shared_panel(root: Path) -> Panel:
+    """Open a panel written by `share_panel`; the OS page cache is shared by every process."""
+    return Panel(
+        dates=pd.DatetimeIndex(np.load(root / "dates.npy")),
+        symbols=json.loads((root / "symbols.json").read_text()),
+        **{f: np.load(root / f"{f}.npy", mmap_mode="r") for f in FIELDS},
+    )
+
+
+# --- Objective ---
+
+def suggest_config(trial: optuna.Trial) -> BTConfig:
+    return BTConfig(
+        breakout_threshold=trial.suggest_float("breakout_threshold", 0.0, 0.05),
+        vol_multiplier=trial.suggest_float("vol_multiplier", 0.0, 3.0),
+        stop_loss_pct=trial.suggest_float("stop_loss_pct", 0.01, 0.10),
+        trail_start_pct=trial.suggest_float("trail_start_pct", 0.01, 0.15),
+        trail_pct=trial.suggest_float("trail_pct", 0.005, 0.10),
+    )
+
+
+def _sharpe(rets: list[pd.Series]) -> float:
+    s = performance(pd.concat(rets)).sharpe
+    return float(s) if np.isfinite(s) else 0.0
+
+
+def objective(trial: optuna.Trial, panel: Panel, risk: dict) -> float:
+    """
+    Walk the panel one calendar year at a time and report the running Sharpe after each,
+    so the pruner can stop losing trials before the full history is simulated.
+    """
+    cfg = suggest_config(trial)
+    years = panel.dates.year.to_numpy()
+    bounds = np.flatnonzero(np.diff(years)) + 1
+    starts = np.r_[0, bounds]
+    ends = np.r_[bounds, len(years)]
+    rets: list[pd.Series] = []
+    for step, (a, b) in enumerate(zip(starts, ends)):
+        # Warm up on the preceding bars; the last row of a year resolves on the next year's first bar
+        lo = max(0, a - MIN_HISTORY)
+        res = backtest_panel(panel.rows(lo, min(b + 1, len(years))), cfg, **risk)
+        rets.append(res.returns.iloc[a - lo:])
+        trial.report(_sharpe(rets), step)
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+    return _sharpe(rets)
+
+
+def _worker(study_name: str, storage: str, shared: str, n_trials: int, risk: dict) -> int:
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    panel = load_shared_panel(Path(shared))
+    study = optuna.load_study(study_name=study_name, storage=storage)
+    study.optimize(lambda t: objective(t, panel, risk), n_trials=n_trials)
+    return n_trials
+
+
+def tune(
+    panel: Panel,
+    *,
+    study_name: str,
+    n_trials: int,
+    n_jobs: int,
+    risk: dict,
+    root: Path = TUNE_DIR,
+) -> optuna.Study:
+    """
+    Run `n_trials` across `n_jobs` processes against one memory-mapped copy of `panel`.
+    The study lives in SQLite under `root`, so re-running with the same name resumes it.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    storage = f"sqlite:///{(root / f'{study_name}.db').as_posix()}"
+    # Create (or open) the study once here so the workers only ever load it
+    optuna.create_study(
+        study_name=study_name,
+        storage=storage,
+        direction="maximize",
+        load_if_exists=True,
+        pruner=optuna.pruners.MedianPruner(n_startup_trials=10, n_warmup_steps=1),
+    )
+    shared = share_panel(panel, root / f"{study_name}_panel")
+    n_jobs = max(1, min(n_jobs, n_trials))
+    per_job = [n_trials // n_jobs + (1 if k < n_trials % n_jobs else 0) for k in range(n_jobs)]
+    if n_jobs == 1:
+        _worker(study_name, storage, str(shared), n_trials, risk)
+    else:
+        # spawn: the parent holds logger/DB threads that fork() would copy mid-state
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context("spawn")) as pool:
+            futs = [pool.submit(_worker, study_name, storage, str(shared), k, risk) for k in per_job]
+            for f in futs:
+                f.result()
+    return optuna.load_study(study_name=study_name, storage=storage)
+
+
+@app.command()
+def main(
+    study: str = typer.Option("vobreakout", help="Study name (resumes if it exists)"),
+    n_trials: int = typer.Option(200, help="Trials to add in this run"),
+    n_jobs: int = typer.Option(4, help="Worker processes"),
+    start: str = typer.Option("2015-01-01", help="First bar date (YYYY-MM-DD)"),
+    end: str = typer.Option(pd.Timestamp.today().strftime("%Y-%m-%d"), help="Last bar date"),
+    nav_usd: float = typer.Option(100_000.0, help="Constant NAV used for sizing"),
+):
+    """Tune BTConfig on the local bar store with parallel, pruned Optuna trials."""
+    cfg = load_settings()
+    panel = Panel.from_store(BarStore(), start=start, end=end)
+    if not panel.symbols:
+        logger.error("Bar store is empty; fetch history first")
+        raise typer.Exit(code=1)
+    risk = dict(
+        nav_usd=nav_usd,
+        per_trade_risk=cfg.default.risk["per_trade_risk"],
+        max_positions=cfg.default.risk["max_positions"],
+        max_gross_exposure=cfg.default.risk["max_gross_exposure"],
+        per_name_cap=cfg.default.risk.get("per_name_cap", None),
+    )
+    logger.info(f"Tuning on panel {panel.shape[0]} days x {panel.shape[1]} symbols")
+    st = tune(panel, study_name=study, n_trials=n_trials, n_jobs=n_jobs, risk=risk)
+    best = {**asdict(BTConfig()), **st.best_params}
+    logger.info(f"Best Sharpe={st.best_value:.3f} params={best}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,194 @@
+"""
+Walk-forward optimization of BTConfig over the bar store.
+
+    python -m src.research.walkforward --train 756 --test 63 --n-trials 100 --n-jobs 8
+
+Each fold tunes on its train window (Optuna, Sharpe objective) and trades the best config
+on the following test window; the out-of-sample returns of consecutive folds are stitched
+into one series. The panel and its parameter-free features (prior high, volume mean, bar
+counts, ATR%) are computed once and memory-mapped by every fold worker, so overlapping
+train windows only slice them.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import optuna
+import pandas as pd
+import typer
+
+from src.core.config import load_settings
+from src.core.log import logger
+from src.core.storage import ART
+from src.data.panel import Panel
+from src.data.store import BarStore
+from src.research.backtest import BTConfig
+from src.research.metrics import performance
+from src.research.panel_backtest import MIN_HISTORY, PanelFeatures, backtest_panel
+from src.research.tune import load_shared_panel, share_panel, suggest_config
+
+app = typer.Typer(add_completion=False)
+
+WF_DIR = ART / "walkforward"
+
+
+@dataclass
+class Fold:
+    """Row ranges [lo, hi) of one fold's train and test windows."""
+    k: int
+    train_lo: int
+    train_hi: int
+    test_lo: int
+    test_hi: int
+
+
+@dataclass
+class WalkForwardResult:
+    returns: pd.Series    # stitched out-of-sample returns
+    folds: pd.DataFrame   # per fold: windows, fitted params, in/out-of-sample Sharpe
+
+
+def make_folds(n_rows: int, *, train: int, test: int, anchored: bool = False, start: int = MIN_HISTORY) -> List[Fold]:
+    """
+    Consecutive test windows of `test` rows, each preceded by `train` rows (rolling) or by
+    everything since `start` (anchored). The last row is kept back: a test row's trade
+    resolves on the next bar.
+    """
+    folds: List[Fold] = []
+    lo = start + train
+    while lo + test <= n_rows - 1:
+        folds.append(Fold(len(folds), start if anchored else lo - train, lo, lo, lo + test))
+        lo += test
+    return folds
+
+
+# --- Shared read-only data ---
+
+def share_features(features: PanelFeatures, root: Path) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    for k, v in vars(features).items():
+        np.save(root / f"feat_{k}.npy", np.ascontiguousarray(v))
+    return root
+
+
+def load_shared_features(root: Path) -> PanelFeatures:
+    return PanelFeatures(**{k: np.load(root / f"feat_{k}.npy", mmap_mode="r") for k in PanelFeatures.__dataclass_fields__})
+
+
+# --- One fold ---
+
+def _sharpe(r: pd.Series) -> float:
+    s = performance(r).sharpe
+    return float(s) if np.isfinite(s) else 0.0
+
+
+def _run(panel: Panel, feats: PanelFeatures, lo: int, hi: int, cfg: BTConfig, risk: dict) -> pd.Series:
+    """Returns of signals on rows [lo, hi), each resolved on the following bar."""
+    hi = min(hi + 1, panel.shape[0])
+    return backtest_panel(panel.rows(lo, hi), cfg, features=feats.rows(lo, hi), **risk).returns
+
+
+def fit_fold(panel: Panel, feats: PanelFeatures, fold: Fold, *, n_trials: int, risk: dict, seed: int = 0) -> dict:
+    """Tune on the train window, trade the best config out of sample."""
+    study = optuna.create_study(direction="maximize", sampler=optuna.samplers.TPESampler(seed=seed + fold.k))
+    # The train window's last bar only resolves trades; it is the test window's first signal day
+    study.optimize(
+        lambda t: _sharpe(_run(panel, feats, fold.train_lo, fold.train_hi - 1, suggest_config(t), risk)),
+        n_trials=n_trials,
+    )
+    cfg = BTConfig(**{**asdict(BTConfig()), **study.best_params})
+    oos = _run(panel, feats, fold.test_lo, fold.test_hi, cfg, risk)
+    return {"fold": fold, "params": study.best_params, "is_sharpe": study.best_value, "oos": oos}
+
+
+def _fold_worker(shared: str, fold: Fold, n_trials: int, risk: dict, seed: int) -> dict:
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    root = Path(shared)
+    return fit_fold(load_shared_panel(root), load_shared_features(root), fold, n_trials=n_trials, risk=risk, seed=seed)
+
+
+# --- Runner ---
+
+def walk_forward(
+    panel: Panel,
+    *,
+    train: int,
+    test: int,
+    n_trials: int,
+    risk: dict,
+    anchored: bool = False,
+    n_jobs: int = 1,
+    seed: int = 0,
+    root: Path = WF_DIR,
+) -> WalkForwardResult:
+    """
+    Fit every fold (in `n_jobs` spawned processes sharing one memory-mapped copy of the panel
+    and its features) and stitch the out-of-sample returns in date order.
+    """
+    folds = make_folds(panel.shape[0], train=train, test=test, anchored=anchored)
+    if not folds:
+        raise ValueError(f"{panel.shape[0]} rows is too short for train={train}, test={test}")
+    feats = PanelFeatures.from_panel(panel)
+    logger.info(f"Walk-forward: {len(folds)} folds, {n_trials} trials each, {n_jobs} workers")
+
+    if n_jobs <= 1:
+        out = [fit_fold(panel, feats, f, n_trials=n_trials, risk=risk, seed=seed) for f in folds]
+    else:
+        shared = share_features(feats, share_panel(panel, root / "panel"))
+        # spawn: the parent holds logger threads that fork() would copy mid-state
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context("spawn")) as pool:
+            futs = [pool.submit(_fold_worker, str(shared), f, n_trials, risk, seed) for f in folds]
+            out = [f.result() for f in futs]
+
+    rows = []
+    for o in out:
+        f = o["fold"]
+        rows.append({
+            "fold": f.k,
+            "train_start": panel.dates[f.train_lo], "train_end": panel.dates[f.train_hi - 1],
+            "test_start": panel.dates[f.test_lo], "test_end": panel.dates[f.test_hi - 1],
+            "is_sharpe": o["is_sharpe"], "oos_sharpe": _sharpe(o["oos"]),
+            **o["params"],
+        })
+    returns = pd.concat([o["oos"] for o in out]).rename("ret")
+    return WalkForwardResult(returns=returns, folds=pd.DataFrame(rows).set_index("fold"))
+
+
+@app.command()
+def main(
+    train: int = typer.Option(756, help="Train window in sessions (756 = 3 years)"),
+    test: int = typer.Option(63, help="Test window in sessions (63 = one quarter)"),
+    anchored: bool = typer.Option(False, help="Expanding train window from the first usable bar"),
+    n_trials: int = typer.Option(100, help="Optuna trials per fold"),
+    n_jobs: int = typer.Option(4, help="Folds fitted in parallel"),
+    start: str = typer.Option("2010-01-01", help="First bar date (YYYY-MM-DD)"),
+    end: str = typer.Option(pd.Timestamp.today().strftime("%Y-%m-%d"), help="Last bar date"),
+    nav_usd: float = typer.Option(100_000.0, help="Constant NAV used for sizing"),
+):
+    """Walk-forward BTConfig over the local bar store and save the stitched out-of-sample returns."""
+    cfg = load_settings()
+    panel = Panel.from_store(BarStore(), start=start, end=end)
+    if not panel.symbols:
+        logger.error("Bar store is empty; fetch history first")
+        raise typer.Exit(code=1)
+    risk = dict(
+        nav_usd=nav_usd,
+        per_trade_risk=cfg.default.risk["per_trade_risk"],
+        max_positions=cfg.default.risk["max_positions"],
+        max_gross_exposure=cfg.default.risk["max_gross_exposure"],
+        per_name_cap=cfg.default.risk.get("per_name_cap", None),
+    )
+    res = walk_forward(panel, train=train, test=test, n_trials=n_trials, risk=risk, anchored=anchored, n_jobs=n_jobs)
+    WF_DIR.mkdir(parents=True, exist_ok=True)
+    res.returns.to_frame().to_parquet(WF_DIR / "oos_returns.parquet")
+    res.folds.to_csv(WF_DIR / "folds.csv")
+    perf = performance(res.returns)
+    logger.info(f"OOS Sharpe={perf.sharpe:.2f} ann_ret={perf.ann_ret:.2%} max_dd={perf.max_dd:.2%} over {len(res.folds)} folds")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.core.timeutils import next_session
+from src.data.panel import bar_dates
+
+# --- Per-symbol state ---
+
+
+@dataclass
+class IndicatorState:
+    """
+    Rolling state behind `breakout_long` and `atr_pct` for one symbol, updated one bar at a time.
+    Ring buffers hold the last `n` volumes and true ranges; sums are maintained incrementally
+    and re-synced from the buffer once per wrap so they never drift.
+    """
+
+    n: int = 20
+    vols: List[float] = field(default_factory=list)
+    trs: List[float] = field(default_factory=list)
+    head: int = 0
+    vol_sum: float = 0.0
+    tr_sum: float = 0.0
+    count: int = 0
+    high: float = math.nan
+    prev_high: float = math.nan
+    close: float = math.nan
+    volume: float = math.nan
+    prior_close: float = math.nan  # close before the latest bar (its true range depends on it)
+    last_date: str | None = None
+
+    def update(self, high: float, low: float, close: float, volume: float, date: str | None = None) -> bool:
+        """
+        Append one bar. A bar dated `last_date` replaces the latest bar (a partial bar
+        re-fetched after it settled); older bars are ignored (returns False), so replaying an
+        overlapping history window is harmless.
+        """
+        if date is not None and self.last_date is not None:
+            if date < self.last_date:
+                return False
+            if date == self.last_date:
+                self._replace_last(high, low, close, volume)
+                return True
+        tr = self._true_range(high, low, self.close)
+
+        if len(self.vols) < self.n:
+            self.vols.append(volume)
+            self.trs.append(tr)
+            self.vol_sum += volume
+            self.tr_sum += tr
+        else:
+            self.vol_sum += volume - self.vols[self.head]
+            self.tr_sum += tr - self.trs[self.head]
+            self.vols[self.head] = volume
+            self.trs[self.head] = tr
+            self.head = (self.head + 1) % self.n
+            if self.head == 0:
+                self.vol_sum = math.fsum(self.vols)
+                self.tr_sum = math.fsum(self.trs)
+
+        self.prev_high, self.high = self.high, high
+        self.prior_close, self.close = self.close, close
+        self.volume = volume
+        self.count += 1
+        if date is not None:
+            self.last_date = date
+        return True
+
+    @staticmethod
+    def _true_range(high: float, low: float, prev_close: float) -> float:
+        if math.isnan(prev_close):
+            return high - low
+        return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+    def _replace_last(self, high: float, low: float, close: float, volume: float) -> None:
+        """Overwrite the latest bar in place: its ring slot is the one written last."""
+        slot = (self.head - 1) % len(self.vols)
+        tr = self._true_range(high, low, self.prior_close)
+        self.vol_sum += volume - self.vols[slot]
+        self.tr_sum += tr - self.trs[slot]
+        self.vols[slot], self.trs[slot] = volume, tr
+        self.high, self.close, self.volume = high, close, volume
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.n
+
+    def avg_volume(self) -> float:
+        return self.vol_sum / self.n if self.ready else math.nan
+
+    def atr_pct(self) -> float:
+        """Latest value of `atr_pct(df, n)` (0.0 until n bars are available)."""
+        if not self.ready or not self.close:
+            return 0.0
+        return (self.tr_sum / self.n) / self.close
+
+    def breakout_long(self, theta: float, vol_mult: float) -> bool:
+        """Latest value of `breakout_long(df, theta, vol_mult)`."""
+        if math.isnan(self.prev_high) or not self.high > self.prev_high * (1 + float(theta)):
+            return False
+        if vol_mult is None or float(vol_mult) <= 0:
+            return True
+        return self.ready and self.volume > float(vol_mult) * self.avg_volume()
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> IndicatorState:
+        return cls(**d)
+
+
+# --- Universe-wide book ---
+
+
+class IndicatorBook:
+    """{symbol -> IndicatorState}, persisted as JSON between runs."""
+
+    def __init__(self, states: Dict[str, IndicatorState] | None = None, n: int = 20):
+        self.states: Dict[str, IndicatorState] = states or {}
+        self.n = n
+
+    def __getitem__(self, symbol: str) -> IndicatorState:
+        if symbol not in self.states:
+            self.states[symbol] = IndicatorState(n=self.n)
+        return self.states[symbol]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.states
+
+    def sync(self, symbol: str, df: pd.DataFrame) -> IndicatorState:
+        """
+        Feed the bars of `df` from the state's last seen date on (that bar is replaced, in
+        case it was partial). `df` may start at the next session; if it leaves a gap of
+        unseen sessions, the state is rebuilt from `df` instead.
+        """
+        st = self[symbol]
+        if df is None or df.empty:
+            return st
+        dates = bar_dates(df).strftime("%Y-%m-%d").to_numpy()
+        if st.last_date is not None and dates[0] > next_session(st.last_date).strftime("%Y-%m-%d"):
+            st = self.states[symbol] = IndicatorState(n=self.n)
+        new = dates >= st.last_date if st.last_date is not None else np.ones(len(dates), dtype=bool)
+        sub = df.loc[new]
+        for d, h, lo, c, v in zip(
+            dates[new],
+            sub["high"].to_numpy(float),
+            sub["low"].to_numpy(float),
+            sub["close"].to_numpy(float),
+            sub["volume"].to_numpy(float),
+        ):
+            st.update(h, lo, c, v, date=d)
+        return st
+
+    def save(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"n": self.n, "states": {s: st.to_dict() for s, st in self.states.items()}}))
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path, n: int = 20) -> IndicatorBook:
+        if not path.exists():
+            return cls(n=n)
+        raw = json.loads(path.read_text())
+        return cls({s: IndicatorState.from_dict(d) for s, d in raw["states"].items()}, n=raw.get("n", n))
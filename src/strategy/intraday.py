@@ -0,0 +1,340 @@
+"""
+Event-driven intraday version of the breakout strategy on minute bars.
+
+    python -m src.strategy.intraday --start 2024-01-02 --end 2024-12-31 --speed 0
+
+The daily rule (`breakout_long`: high > prev_high x (1+theta) and volume > vol_mult x the
+20-session mean volume, today included) is evaluated as each minute arrives using the day's
+running high and cumulative volume, so it fires on the first bar at which the daily bar would
+already qualify. Open positions follow `simulate_day`'s rules bar by bar: hard stop, then a
+trailing stop once the trail-start level has traded, else exit at the next session's close.
+"""
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+import typer
+
+from src.core.config import load_settings
+from src.core.log import logger
+from src.core.timeutils import sessions_between
+from src.core.types import Target
+from src.data.minute import NS_PER_MIN, RTH_CLOSE, RTH_OPEN, MinuteStore, local_minutes
+from src.data.store import MARKET_TZ
+from src.research.backtest import BTConfig
+
+LOOKBACK = 20  # volume window of the daily rule
+NS_PER_DAY = 1440 * NS_PER_MIN
+EXIT_TAG = "VOBREAKOUT_EXIT"
+
+app = typer.Typer(add_completion=False)
+
+
+@dataclass
+class IntradayParams:
+    nav_usd: float
+    per_trade_risk: float
+    entry_limit_pct: float = 0.005
+    max_hold_sessions: int = 1  # full sessions held after the entry day before the time exit
+
+
+class IntradayEngine:
+    """
+    Per-symbol state lives in flat arrays indexed by symbol position, with a ring buffer of
+    the last LOOKBACK-1 completed daily volumes, so each minute is one vectorized update over
+    the symbols that printed. Feed bars with `on_bars` (any subset of symbols, one timestamp)
+    and close each session with `end_session`; both return the Targets they emit.
+    """
+
+    def __init__(self, symbols: List[str], cfg: BTConfig, params: IntradayParams):
+        n = len(symbols)
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.cfg, self.params = cfg, params
+        self.vol_ring = np.zeros((n, LOOKBACK - 1))
+        self.ring_pos = np.zeros(n, dtype=np.int64)  # next slot to overwrite (the oldest volume)
+        self.days_seen = np.zeros(n, dtype=np.int64)
+        self.prev_high = np.full(n, np.nan)
+        self._reset_day(n)
+        self.qty = np.zeros(n, dtype=np.int64)
+        self.entry = np.full(n, np.nan)
+        self.stop = np.full(n, np.nan)
+        self.trail_start = np.full(n, np.nan)
+        self.trailing = np.zeros(n, dtype=bool)
+        self.peak = np.full(n, np.nan)
+        self.held = np.zeros(n, dtype=np.int64)
+        self.day: int | None = None  # current New York epoch day
+        self._day_end_ns = -1
+
+    def _reset_day(self, n: int) -> None:
+        self.day_high = np.full(n, np.nan)
+        self.day_vol = np.zeros(n)
+        self.day_close = np.full(n, np.nan)
+        self.fired = np.zeros(n, dtype=bool)
+
+    # --- Warm-up ---
+
+    def seed(self, daily: Mapping[str, pd.DataFrame]) -> None:
+        """Prime the daily state (previous high, recent volumes) from completed daily bars."""
+        k = LOOKBACK - 1
+        for s, df in daily.items():
+            i = self.index.get(s)
+            if i is None or df is None or df.empty:
+                continue
+            vols = df["volume"].to_numpy(dtype=float)[-k:]
+            self.vol_ring[i] = 0.0
+            self.vol_ring[i, : len(vols)] = vols
+            self.ring_pos[i] = len(vols) % k
+            self.prev_high[i] = float(df["high"].iloc[-1])
+            self.days_seen[i] = len(df)
+
+    # --- Events ---
+
+    def _new_day(self, ts_ns: int) -> int:
+        local = pd.Timestamp(ts_ns, tz="UTC").tz_convert(MARKET_TZ).tz_localize(None)
+        day = local.value // NS_PER_DAY
+        # UTC instant where this New York day ends (DST-safe)
+        self._day_end_ns = pd.Timestamp((day + 1) * NS_PER_DAY).tz_localize(MARKET_TZ).value
+        return int(day)
+
+    def on_bars(
+        self,
+        ts_ns: int,
+        idx: np.ndarray,
+        o: np.ndarray,
+        h: np.ndarray,
+        lo: np.ndarray,
+        c: np.ndarray,
+        v: np.ndarray,
+    ) -> List[Target]:
+        """One minute for the symbols at positions `idx` (bar start stamp `ts_ns`, UTC epoch ns)."""
+        out: List[Target] = []
+        if self.day is None or ts_ns >= self._day_end_ns:
+            day = self._new_day(ts_ns)
+            if self.day is not None and day != self.day:
+                out += self.end_session()
+            self.day = day
+
+        self.day_high[idx] = np.fmax(self.day_high[idx], h)
+        self.day_vol[idx] += np.nan_to_num(v)
+        self.day_close[idx] = c
+
+        out += self._exits(idx, o, h, lo)
+        out += self._entries(idx, h, c)
+        return out
+
+    def on_bar(self, symbol: str, ts_ns: int, o: float, h: float, lo: float, c: float, v: float) -> List[Target]:
+        i = np.array([self.index[symbol]])
+        return self.on_bars(ts_ns, i, *(np.array([x], dtype=float) for x in (o, h, lo, c, v)))
+
+    def _exits(self, idx: np.ndarray, o: np.ndarray, h: np.ndarray, lo: np.ndarray) -> List[Target]:
+        cfg = self.cfg
+        live = self.qty[idx] > 0
+        if not live.any():
+            return []
+        idx, o, h, lo = idx[live], o[live], h[live], lo[live]
+        # Stop first (as in simulate_day), against the level in force before this bar's high
+        hit = lo <= self.stop[idx]
+        fill = np.fmin(o, self.stop[idx])  # gap through the stop fills at the open
+        out = [self._exit(i, px) for i, px in zip(idx[hit], fill[hit])]
+        # Survivors: arm / ratchet the trailing stop
+        keep = idx[~hit]
+        hk = h[~hit]
+        self.trailing[keep] |= hk >= self.trail_start[keep]
+        self.peak[keep] = np.fmax(self.peak[keep], hk)
+        tr = keep[self.trailing[keep]]
+        self.stop[tr] = np.fmax(self.stop[tr], self.peak[tr] * (1 - cfg.trail_pct))
+        return out
+
+    def _entries(self, idx: np.ndarray, h: np.ndarray, c: np.ndarray) -> List[Target]:
+        cfg, p = self.cfg, self.params
+        ok = (~self.fired[idx]) & (self.qty[idx] == 0) & (self.days_seen[idx] >= LOOKBACK - 1)
+        with np.errstate(invalid="ignore"):
+            ok &= self.day_high[idx] > self.prev_high[idx] * (1 + cfg.breakout_threshold)
+            if cfg.vol_multiplier and cfg.vol_multiplier > 0:
+                mean20 = (self.vol_ring[idx].sum(axis=1) + self.day_vol[idx]) / LOOKBACK
+                ok &= self.day_vol[idx] > cfg.vol_multiplier * mean20
+        if not ok.any():
+            return []
+        sel, px = idx[ok], c[ok]
+        self.fired[sel] = True
+        risk_per_share = px * cfg.stop_loss_pct
+        with np.errstate(divide="ignore", invalid="ignore"):
+            qty = np.where(risk_per_share > 0, (p.nav_usd * p.per_trade_risk) // risk_per_share, 0)
+        qty = np.nan_to_num(qty).astype(np.int64)
+        out: List[Target] = []
+        for i, q, x in zip(sel, qty, px):
+            if q <= 0:
+                continue
+            self.qty[i], self.entry[i], self.held[i] = q, x, 0
+            self.stop[i] = x * (1 - cfg.stop_loss_pct)
+            self.trail_start[i] = x * (1 + cfg.trail_start_pct)
+            self.trailing[i], self.peak[i] = False, x
+            out.append(
+                Target(
+                    symbol=self.symbols[i],
+                    side="BUY",
+                    qty=int(q),
+                    entry_limit=float(x * (1 + p.entry_limit_pct)),
+                    stop_loss=float(self.stop[i]),
+                    trail_start=float(self.trail_start[i]),
+                    trail_pct=cfg.trail_pct,
+                )
+            )
+        return out
+
+    def _exit(self, i: int, px: float) -> Target:
+        q = int(self.qty[i])
+        self.qty[i] = 0
+        self.trailing[i] = False
+        return Target(symbol=self.symbols[i], side="SELL", qty=-q, entry_limit=float(px), tag=EXIT_TAG)
+
+    def end_session(self) -> List[Target]:
+        """Close the day: time exits at the close, then roll today's bar into the daily state."""
+        out: List[Target] = []
+        live = np.flatnonzero(self.qty > 0)
+        due = live[self.held[live] >= self.params.max_hold_sessions]
+        for i in due:
+            out.append(self._exit(i, float(self.day_close[i])))
+        self.held[live] += 1
+
+        # Only symbols that printed get a daily bar (as in the daily store); others keep their ring
+        traded = np.flatnonzero(~np.isnan(self.day_close))
+        self.vol_ring[traded, self.ring_pos[traded]] = self.day_vol[traded]
+        self.ring_pos[traded] = (self.ring_pos[traded] + 1) % (LOOKBACK - 1)
+        self.prev_high[traded] = self.day_high[traded]
+        self.days_seen[traded] += 1
+        self._reset_day(len(self.symbols))
+        self.day, self._day_end_ns = None, -1
+        return out
+
+
+# --- Replay ---
+
+def minute_frames(
+    store: MinuteStore, symbols: List[str], start: str, end: str, rth_only: bool = True
+) -> Iterator[Tuple[int, np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Stored minute bars for `symbols` as one (minutes x symbols) block per session:
+    yields (session epoch day, minute-of-day per row, {field: 2-D array, NaN where no bar}).
+    Files are memory-mapped; only one session's block is materialized at a time.
+    """
+    days = sessions_between(start, end).asi8 // NS_PER_DAY
+    if not len(days):
+        return
+    years = sorted({pd.Timestamp(d * NS_PER_DAY).year for d in (days[0], days[-1])})
+    years = list(range(years[0], years[-1] + 1))
+    cols: List[Dict[str, np.ndarray] | None] = []
+    keys: List[Tuple[np.ndarray, np.ndarray, np.ndarray] | None] = []
+    for s in symbols:
+        parts = [store.columns(s, y) for y in years if y in store.years(s)]
+        if not parts:
+            cols.append(None)
+            keys.append(None)
+            continue
+        col = parts[0] if len(parts) == 1 else {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+        day, mod = local_minutes(col["timestamp"])
+        cols.append(col)
+        # Row range [a, b) of every replayed session in this symbol's file
+        keys.append((np.searchsorted(day, days), np.searchsorted(day, days, side="right"), mod))
+
+    lo_min, hi_min = (RTH_OPEN, RTH_CLOSE) if rth_only else (0, 1440)
+    grid = np.arange(lo_min, hi_min)
+    n = len(symbols)
+    for k, d in enumerate(days):
+        block = {f: np.full((len(grid), n), np.nan) for f in ("open", "high", "low", "close", "volume")}
+        any_bar = False
+        for j, (sym_col, key) in enumerate(zip(cols, keys)):
+            if sym_col is None or key is None:
+                continue
+            starts, ends, mod = key
+            a, b = starts[k], ends[k]
+            if a == b:
+                continue
+            m = mod[a:b].astype(np.int64)
+            keep = (m >= lo_min) & (m < hi_min)
+            rows = m[keep] - lo_min
+            for f in block:
+                block[f][rows, j] = sym_col[f][a:b][keep]
+            any_bar = True
+        if any_bar:
+            yield int(d), grid, block
+
+
+def replay(
+    engine: IntradayEngine,
+    store: MinuteStore,
+    start: str,
+    end: str,
+    *,
+    speed: float = 0.0,
+    rth_only: bool = True,
+) -> List[Tuple[pd.Timestamp, Target]]:
+    """
+    Stream stored minute bars through `engine` in time order and collect emitted Targets.
+    `speed` is the multiple of realtime to pace at (e.g. 1000 = 1000x); 0 runs flat out.
+    """
+    emitted: List[Tuple[pd.Timestamp, Target]] = []
+    t0 = time.perf_counter()
+    first_ns = None
+    n_bars = 0
+    for day, grid, block in minute_frames(store, engine.symbols, start, end, rth_only):
+        # Minute-of-day (New York) -> UTC ns for this session
+        base = pd.Timestamp(day * NS_PER_DAY).tz_localize(MARKET_TZ).value
+        has = ~np.isnan(block["close"])
+        for r in np.flatnonzero(has.any(axis=1)):
+            ts = base + int(grid[r]) * NS_PER_MIN
+            if first_ns is None:
+                first_ns = ts
+            if speed > 0:
+                wait = (ts - first_ns) / 1e9 / speed - (time.perf_counter() - t0)
+                if wait > 0:
+                    time.sleep(wait)
+            idx = np.flatnonzero(has[r])
+            n_bars += len(idx)
+            row = [block[f][r, idx] for f in ("open", "high", "low", "close", "volume")]
+            stamp = None
+            for t in engine.on_bars(ts, idx, *row):
+                stamp = stamp or pd.Timestamp(ts, tz="UTC")
+                emitted.append((stamp, t))
+        close_ts = pd.Timestamp(base + RTH_CLOSE * NS_PER_MIN, tz="UTC")
+        emitted += [(close_ts, t) for t in engine.end_session()]
+    wall = time.perf_counter() - t0
+    logger.info(f"Replayed {n_bars} minute bars in {wall:.1f}s ({n_bars / max(wall, 1e-9):,.0f} bars/s)")
+    return emitted
+
+
+@app.command()
+def main(
+    start: str = typer.Option(..., help="First session (YYYY-MM-DD)"),
+    end: str = typer.Option(..., help="Last session (YYYY-MM-DD)"),
+    symbols: str = typer.Option("", help="Comma-separated symbols (default: every symbol in the minute store)"),
+    speed: float = typer.Option(0.0, help="Multiple of realtime (0 = as fast as possible)"),
+    nav_usd: float = typer.Option(100_000.0, help="NAV used for sizing"),
+):
+    """Replay stored minute bars through the intraday engine and log the targets it emits."""
+    cfg = load_settings()
+    store = MinuteStore()
+    syms = [s for s in symbols.split(",") if s] or store.symbols()
+    bt = BTConfig(
+        breakout_threshold=cfg.strat.signal["breakout_threshold"],
+        vol_multiplier=cfg.strat.signal["vol_multiplier"],
+        stop_loss_pct=cfg.strat.execution["stop_loss_pct"],
+        trail_start_pct=cfg.strat.execution["trail_start_pct"],
+        trail_pct=cfg.strat.execution["trail_pct"],
+    )
+    params = IntradayParams(
+        nav_usd=nav_usd,
+        per_trade_risk=cfg.default.risk["per_trade_risk"],
+        entry_limit_pct=cfg.strat.execution["entry_limit_pct"],
+    )
+    out = replay(IntradayEngine(syms, bt, params), store, start, end, speed=speed)
+    for ts, t in out:
+        logger.info(f"{ts:%Y-%m-%d %H:%M} {t.side} {t.symbol} qty={t.qty} px={t.entry_limit:.2f}")
+
+
+if __name__ == "__main__":
+    app()
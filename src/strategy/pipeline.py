@@ -1,7 +1,12 @@
 from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 
-from src.strategy.vobreakout import breakout_long, risk_sized_qty
+from src.data.panel import Panel
+from src.strategy.vobreakout import breakout_from_levels, breakout_long, breakout_long_arr, risk_sized_qty
+from src.strategy.incremental import IndicatorState
 from src.core.types import Target
 
 
@@ -18,18 +23,32 @@ def build_targets(
     trail_start_pct: float,
     trail_pct: float,
     entry_limit_pct: float,
+    state: IndicatorState | None = None,
+    features: pd.DataFrame | None = None,
 ) -> list[Target]:
     """
     Build a list of trade Targets for a single symbol based on the breakout rule.
     Expects daily OHLCV in df with columns: open, high, low, close, volume.
+    If `state` is given (already synced with df), the signal is read from it instead of
+    recomputing the rolling windows over the whole frame; likewise `features` (aligned with
+    df, e.g. from `FeatureCache.get`) supplies the last bar's prior high and volume mean.
     """
     # Need enough history for rolling averages (e.g., 20-day volume)
     if df is None or df.empty or len(df) < 25:
         return []
 
     # Signal: breakout above yesterday's high with volume confirmation
-    sig_series = breakout_long(df, breakout_threshold, vol_multiplier)
-    sig = bool(sig_series.iloc[-1])
+    if state is not None:
+        sig = state.breakout_long(breakout_threshold, vol_multiplier)
+    elif features is not None:
+        last = features.iloc[-1:]
+        sig = bool(breakout_from_levels(
+            df["high"].to_numpy(float)[-1:], df["volume"].to_numpy(float)[-1:],
+            last["prev_high"].to_numpy(float), last["vol_mean"].to_numpy(float),
+            breakout_threshold, vol_multiplier,
+        )[0])
+    else:
+        sig = bool(breakout_long(df, breakout_threshold, vol_multiplier).iloc[-1])
     if not sig:
         return []
 
@@ -62,3 +81,187 @@ def build_targets(
             tag="VOBREAKOUT",
         )
     ]
+
+
+# --- Batched path ---
+
+MIN_BARS = 25
+MIN_VOL_WINDOW = 20
+
+
+@dataclass
+class TargetBatch:
+    """Column-oriented targets for many symbols; converted to `Target` objects only at the broker edge."""
+
+    symbols: np.ndarray
+    qty: np.ndarray
+    entry_limit: np.ndarray
+    stop_loss: np.ndarray
+    trail_start: np.ndarray
+    trail_pct: float
+    tag: str = "VOBREAKOUT"
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def to_targets(self) -> list[Target]:
+        return [
+            Target(
+                symbol=str(s),
+                side="BUY",
+                qty=int(q),
+                entry_limit=float(e),
+                stop_loss=float(sl),
+                trail_start=float(ts),
+                trail_pct=self.trail_pct,
+                tag=self.tag,
+            )
+            for s, q, e, sl, ts in zip(self.symbols, self.qty, self.entry_limit, self.stop_loss, self.trail_start)
+        ]
+
+
+def build_targets_batch(
+    panel: Panel,
+    nav_gbp: float,
+    fx_gbp_per_usd: float,
+    *,
+    breakout_threshold: float,
+    vol_multiplier: float,
+    per_trade_risk: float,
+    stop_loss_pct: float,
+    trail_start_pct: float,
+    trail_pct: float,
+    entry_limit_pct: float,
+) -> TargetBatch:
+    """
+    `build_targets` for every symbol of a panel at once, evaluated on the panel's last date.
+    Symbols without a bar on that date, or with fewer than 25 bars, produce no target. Like
+    the per-symbol frames, the rule looks back over each symbol's own bars, so a gap in the
+    union of dates (a halt, a late listing) does not blank its levels.
+    """
+    if panel.shape[0] == 0:
+        empty = np.zeros(0)
+        return TargetBatch(np.zeros(0, dtype=object), empty.astype(np.int64), empty, empty, empty, trail_pct)
+
+    enough = np.count_nonzero(np.isfinite(panel.close), axis=0) >= MIN_BARS
+    high, volume = last_bars(panel, MIN_VOL_WINDOW + 1)  # prior high + 20-day volume mean
+    sig = breakout_long_arr(high, volume, breakout_threshold, vol_multiplier)[-1] & np.isfinite(panel.close[-1])
+    return size_batch(
+        np.asarray(panel.symbols, dtype=object), sig & enough, panel.close[-1], nav_gbp, fx_gbp_per_usd,
+        per_trade_risk=per_trade_risk, stop_loss_pct=stop_loss_pct, trail_start_pct=trail_start_pct,
+        trail_pct=trail_pct, entry_limit_pct=entry_limit_pct,
+    )
+
+
+def last_bars(panel: Panel, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    high and volume of each symbol's last `n` bars (rows with a close), oldest first; NaN
+    above them where a symbol has fewer. Only columns with a gap in the last `n` rows are
+    compacted, so a gap-free panel costs a slice.
+    """
+    tail = slice(max(0, panel.shape[0] - n), None)
+    high, volume = panel.high[tail].copy(), panel.volume[tail].copy()
+    gappy = np.flatnonzero(~np.isfinite(panel.close[tail]).all(axis=0))
+    if len(gappy):
+        # Stable sort on "has a bar" moves missing rows up and keeps the bars in date order
+        order = np.argsort(np.isfinite(panel.close[:, gappy]), axis=0, kind="stable")[-n:]
+        high[:, gappy] = np.take_along_axis(panel.high[:, gappy], order, axis=0)[-len(high):]
+        volume[:, gappy] = np.take_along_axis(panel.volume[:, gappy], order, axis=0)[-len(volume):]
+    return high, volume
+
+
+def size_batch(
+    symbols: np.ndarray,
+    sig: np.ndarray,
+    px: np.ndarray,
+    nav_gbp: float,
+    fx_gbp_per_usd: float,
+    *,
+    per_trade_risk: float,
+    stop_loss_pct: float,
+    trail_start_pct: float,
+    trail_pct: float,
+    entry_limit_pct: float,
+) -> TargetBatch:
+    """Risk-sized brackets for the symbols where `sig` is set, entered at `px` (the last close)."""
+    fx = fx_gbp_per_usd if fx_gbp_per_usd and fx_gbp_per_usd > 0 else 0.78
+    nav_usd = float(nav_gbp) / fx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        risk_per_share = px * stop_loss_pct
+        ok = sig & (risk_per_share > 0)
+        qty = np.floor_divide(nav_usd * per_trade_risk, np.where(ok, risk_per_share, 1.0))
+    keep = ok & (qty > 0)
+    px = px[keep]
+    return TargetBatch(
+        symbols=symbols[keep],
+        qty=qty[keep].astype(np.int64),
+        entry_limit=px * (1 + entry_limit_pct),
+        stop_loss=px * (1 - stop_loss_pct),
+        trail_start=px * (1 + trail_start_pct),
+        trail_pct=trail_pct,
+    )
+
+
+# --- Pre-close levels ---
+
+
+@dataclass
+class CloseLevels:
+    """
+    Everything `build_targets_batch` needs from the bars before the session being decided:
+    per symbol the prior high, the sum of the last 19 volumes (the 20-day mean is completed
+    by the session's own volume) and the number of bars seen. Built ahead of the close, so
+    the decision on the final bar is a handful of vector ops.
+    """
+
+    symbols: np.ndarray
+    prev_high: np.ndarray
+    vol_sum: np.ndarray
+    n_bars: np.ndarray
+
+    @classmethod
+    def from_panel(cls, panel: Panel) -> CloseLevels:
+        """Levels for the session after the panel's last date."""
+        k = MIN_VOL_WINDOW - 1
+        n_sym = len(panel.symbols)
+        high, volume = last_bars(panel, k)  # each symbol's own last bars, across gaps in the dates
+        prev_high = high[-1] if panel.shape[0] else np.full(n_sym, np.nan)
+        vol_sum = volume.sum(axis=0) if panel.shape[0] >= k else np.full(n_sym, np.nan)
+        return cls(
+            symbols=np.asarray(panel.symbols, dtype=object),
+            prev_high=prev_high,
+            vol_sum=vol_sum,
+            n_bars=np.count_nonzero(np.isfinite(panel.close), axis=0),
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def targets(
+        self,
+        high: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        nav_gbp: float,
+        fx_gbp_per_usd: float,
+        *,
+        breakout_threshold: float,
+        vol_multiplier: float,
+        per_trade_risk: float,
+        stop_loss_pct: float,
+        trail_start_pct: float,
+        trail_pct: float,
+        entry_limit_pct: float,
+    ) -> TargetBatch:
+        """
+        `build_targets_batch` on the history these levels came from plus one final bar
+        (arrays aligned with `symbols`, NaN where a symbol has no bar).
+        """
+        enough = self.n_bars + np.isfinite(close) >= MIN_BARS
+        vol_mean = (self.vol_sum + volume) / MIN_VOL_WINDOW
+        sig = breakout_from_levels(high, volume, self.prev_high, vol_mean, breakout_threshold, vol_multiplier)
+        return size_batch(
+            self.symbols, sig & enough, close, nav_gbp, fx_gbp_per_usd,
+            per_trade_risk=per_trade_risk, stop_loss_pct=stop_loss_pct, trail_start_pct=trail_start_pct,
+            trail_pct=trail_pct, entry_limit_pct=entry_limit_pct,
+        )
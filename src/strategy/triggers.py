@@ -0,0 +1,99 @@
+"""
+Trigger levels for screening live quotes against the daily breakout rule.
+
+`breakout_long` on today's bar is high > prev_high x (1+theta) and volume > vol_mult x the
+20-session mean volume, today included. With S the sum of the previous 19 volumes the volume
+leg is v > m (S + v) / 20, i.e. v > m S / (20 - m): both thresholds are known before the
+open. `TriggerIndex` holds them per symbol, so a quote only has to update the day's running
+high and compare two floats.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from src.strategy.pipeline import MIN_BARS, MIN_VOL_WINDOW, CloseLevels, TargetBatch, size_batch
+
+
+@dataclass
+class TriggerIndex:
+    """
+    Sorted symbols with aligned price and cumulative-volume trigger levels (inf where the rule
+    cannot fire today), plus the intraday state: running high and which slots already fired.
+    """
+
+    symbols: np.ndarray
+    level: np.ndarray
+    vol_level: np.ndarray
+    slot: Dict[str, int] = field(init=False, repr=False)
+    day_high: np.ndarray = field(init=False, repr=False)
+    fired: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.slot = {s: i for i, s in enumerate(self.symbols.tolist())}
+        self.reset_day()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @classmethod
+    def from_levels(cls, levels: CloseLevels, theta: float, vol_mult: float) -> TriggerIndex:
+        """Trigger levels for the session `levels` were prepared for."""
+        order = np.argsort(levels.symbols.astype(str), kind="stable")
+        enough = levels.n_bars[order] + 1 >= MIN_BARS  # assuming today's bar prints
+        level = np.where(enough, levels.prev_high[order] * (1 + float(theta)), np.inf)
+        m = 0.0 if vol_mult is None else float(vol_mult)
+        if m <= 0:
+            vol_level = np.full(len(order), -np.inf)
+        elif m >= MIN_VOL_WINDOW:
+            vol_level = np.full(len(order), np.inf)  # the session's own volume can never clear it
+        else:
+            vol_level = m * levels.vol_sum[order] / (MIN_VOL_WINDOW - m)
+        return cls(levels.symbols[order], level, vol_level)
+
+    # --- Quotes ---
+
+    def reset_day(self) -> None:
+        self.day_high = np.full(len(self.symbols), -np.inf)
+        self.fired = np.zeros(len(self.symbols), dtype=bool)
+
+    def on_quote(self, i: int, high: float, volume: float) -> bool:
+        """
+        Fold one quote for slot `i` (session high so far, cumulative session volume) into the
+        running high; True the first time the symbol clears both levels. NaN inputs never fire.
+        """
+        if high > self.day_high[i]:
+            self.day_high[i] = high
+        if self.fired[i] or not (self.day_high[i] > self.level[i] and volume > self.vol_level[i]):
+            return False
+        self.fired[i] = True
+        return True
+
+    def triggered(self) -> List[str]:
+        return self.symbols[self.fired].tolist()
+
+    def targets(self, slots: np.ndarray, px: np.ndarray, nav_gbp: float, fx_gbp_per_usd: float, **sizing) -> TargetBatch:
+        """Brackets for triggered `slots`, sized at their trigger prices `px` (see `size_batch`)."""
+        slots = np.asarray(slots, dtype=np.int64)
+        return size_batch(
+            self.symbols[slots], np.ones(len(slots), dtype=bool), np.asarray(px, dtype=float),
+            nav_gbp, fx_gbp_per_usd, **sizing,
+        )
+
+    # --- Persistence ---
+
+    def save(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, symbols=self.symbols.astype(str), level=self.level, vol_level=self.vol_level)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> TriggerIndex:
+        with np.load(path) as z:
+            return cls(z["symbols"].astype(object), z["level"], z["vol_level"])
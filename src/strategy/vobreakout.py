@@ -29,6 +29,54 @@ def breakout_long(df: pd.DataFrame, theta: float, vol_mult: float) -> pd.Series:
     vol_ok = df["volume"] > float(vol_mult) * df["volume"].rolling(20).mean()
     return (broke & vol_ok).fillna(False)
 
+
+# --- Array kernels (1-D series or 2-D date x symbol panels, time on axis 0) ---
+
+def rolling_mean_arr(x: np.ndarray, n: int) -> np.ndarray:
+    """Trailing n-bar mean along axis 0; NaN until n bars are available or if any is NaN."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < n:
+        return out
+    win = np.lib.stride_tricks.sliding_window_view(x, n, axis=0)
+    out[n - 1:] = win.sum(axis=-1) / n
+    return out
+
+
+def shift_arr(x: np.ndarray, k: int = 1) -> np.ndarray:
+    """Lag along axis 0 by k bars, padding with NaN (like pd.Series.shift)."""
+    out = np.full(x.shape, np.nan)
+    if k < x.shape[0]:
+        out[k:] = x[:-k]
+    return out
+
+
+def atr_pct_arr(high: np.ndarray, low: np.ndarray, close: np.ndarray, n: int = 20) -> np.ndarray:
+    """Array version of `atr_pct` (same true range, n-bar mean, 0.0 where undefined)."""
+    prev_close = shift_arr(close)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # fmax skips NaN like the row-wise max in atr_pct
+        tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+        out = rolling_mean_arr(tr, n) / close
+    return np.where(np.isnan(out), 0.0, out)
+
+
+def breakout_long_arr(high: np.ndarray, volume: np.ndarray, theta: float, vol_mult: float) -> np.ndarray:
+    """
+    Array version of `breakout_long` on float arrays; returns a bool array of the same shape.
+    """
+    return breakout_from_levels(high, volume, shift_arr(high), rolling_mean_arr(volume, 20), theta, vol_mult)
+
+
+def breakout_from_levels(
+    high: np.ndarray, volume: np.ndarray, prev_high: np.ndarray, vol_mean: np.ndarray, theta: float, vol_mult: float
+) -> np.ndarray:
+    """`breakout_long_arr` given precomputed prior highs and 20-day volume means."""
+    with np.errstate(invalid="ignore"):
+        broke = high > prev_high * (1 + float(theta))
+        if vol_mult is None or float(vol_mult) <= 0:
+            return broke
+        return broke & (volume > float(vol_mult) * vol_mean)
+
 # --- Sizing ---
 
 def risk_sized_qty(nav: float, price: float, per_trade_risk: float, stop_pct: float) -> int:
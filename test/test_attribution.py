@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.apps.report import render_markdown
+from src.data.panel import Panel
+from src.data.store import BarStore
+from src.research.attribution import attribution, daily_returns, save_positions, update_attribution
+from src.research.backtest import BTConfig
+from src.research.panel_backtest import backtest_panel
+
+from test_panel_backtest import _universe
+
+CFG = BTConfig(breakout_threshold=0.0, vol_multiplier=0.5)
+RISK = dict(nav_usd=100_000.0, per_trade_risk=0.015, max_positions=5, max_gross_exposure=0.7)
+
+
+def _store(tmp_path, n_sym: int = 12, n_days: int = 260) -> BarStore:
+    store = BarStore(tmp_path / "bars")
+    for s, df in _universe(n_sym, n_days).items():
+        df = df.assign(timestamp=df.index.tz_localize("America/New_York").tz_convert("UTC"), symbol=s)
+        store.write(s, df.reset_index(drop=True))
+    return store
+
+
+def test_sql_attribution_matches_panel_backtest_and_updates_incrementally(tmp_path):
+    store = _store(tmp_path)
+    panel = Panel.from_store(store)
+    kw = dict(store=store, positions_root=tmp_path / "pos", root=tmp_path / "attr")
+
+    # First 150 sessions, then the full history: the second update only resolves the new days
+    head = panel.rows(0, 151)
+    save_positions(backtest_panel(head, CFG, **RISK), head, tmp_path / "pos")
+    n1 = update_attribution(CFG, **kw)
+    full = backtest_panel(panel, CFG, **RISK)
+    save_positions(full, panel, tmp_path / "pos")
+    n2 = update_attribution(CFG, **kw)
+    assert n1 > 0 and n2 > 0
+    assert n1 + n2 == int((full.positions.to_numpy() != 0).sum())
+    assert update_attribution(CFG, **kw) == 0
+
+    r = daily_returns(CFG, nav_usd=RISK["nav_usd"], root=tmp_path / "attr")
+    np.testing.assert_allclose(r.reindex(full.returns.index, fill_value=0.0), full.returns, atol=1e-12)
+
+    by_sym = attribution(CFG, by="symbol", nav_usd=RISK["nav_usd"], root=tmp_path / "attr")
+    by_month = attribution(CFG, by="month", nav_usd=RISK["nav_usd"], root=tmp_path / "attr")
+    assert np.isclose(by_sym["contribution"].sum(), full.returns.sum())
+    assert np.isclose(by_month["pnl"].sum(), by_sym["pnl"].sum())
+    assert by_sym["trades"].sum() == n1 + n2
+    assert ((by_sym["hit_rate"] >= 0) & (by_sym["hit_rate"] <= 1)).all()
+    assert by_month["exposure"].max() <= RISK["max_gross_exposure"] + 1e-9
+
+    attr = {by: attribution(CFG, by=by, nav_usd=RISK["nav_usd"], root=tmp_path / "attr") for by in ("symbol", "month", "year")}
+    md = render_markdown(str(r.index[-1].date()), r, n_resamples=200, attr=attr)
+    assert "## Attribution — Top 10 Symbols" in md and "| S0" in md
+
+
+def test_rewritten_positions_rebuild_the_trade_cache(tmp_path):
+    store = _store(tmp_path)
+    panel = Panel.from_store(store)
+    kw = dict(store=store, positions_root=tmp_path / "pos", root=tmp_path / "attr")
+
+    # Same exit rule (same cache), different signal settings
+    save_positions(backtest_panel(panel, CFG, **RISK), panel, tmp_path / "pos")
+    update_attribution(CFG, **kw)
+    strict = BTConfig(breakout_threshold=0.02, vol_multiplier=1.5)
+    res = backtest_panel(panel, strict, **RISK)
+    save_positions(res, panel, tmp_path / "pos")
+    assert update_attribution(strict, **kw) == int((res.positions.to_numpy() != 0).sum())
+
+    r = daily_returns(strict, nav_usd=RISK["nav_usd"], root=tmp_path / "attr")
+    np.testing.assert_allclose(r.reindex(res.returns.index, fill_value=0.0), res.returns, atol=1e-12)
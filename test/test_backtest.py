@@ -0,0 +1,41 @@
+from __future__ import annotations
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.research.backtest import BTConfig, backtest_breakout, backtest_breakout_loop
+
+
+def _random_walk(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 20.0 * np.exp(np.cumsum(rng.normal(0, 0.03, size=n)))
+    high = close * (1 + np.abs(rng.normal(0, 0.03, size=n)))
+    low = close * (1 - np.abs(rng.normal(0, 0.03, size=n)))
+    vol = rng.lognormal(13, 0.6, size=n)
+    return pd.DataFrame(
+        {"open": close, "high": high, "low": low, "close": close, "volume": vol},
+        index=pd.bdate_range("2005-01-03", periods=n),
+    )
+
+
+def test_vectorized_backtest_matches_loop():
+    df = _random_walk(1500)
+    df.iloc[100, df.columns.get_loc("low")] = np.nan  # NaN bars must behave like the loop
+    for cfg in (BTConfig(), BTConfig(breakout_threshold=0.0, vol_multiplier=0.0, trail_pct=0.01)):
+        fast = backtest_breakout(df, cfg)
+        ref = backtest_breakout_loop(df, cfg)
+        assert (fast != 0).sum() > 10
+        pd.testing.assert_series_equal(fast, ref, check_freq=False)
+
+
+def test_vectorized_backtest_speedup():
+    df = _random_walk(252 * 20)
+    cfg = BTConfig(breakout_threshold=0.0, vol_multiplier=0.0)
+    t0 = time.perf_counter()
+    backtest_breakout_loop(df, cfg)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    backtest_breakout(df, cfg)
+    t_vec = time.perf_counter() - t0
+    assert t_vec * 20 < t_loop
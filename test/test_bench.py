@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from bench.hotpaths import regressions
+
+
+def _run(seconds: float, peak_mb: float) -> dict:
+    return {"results": {"stage@100": {"seconds": seconds, "peak_mb": peak_mb}}}
+
+
+def test_regressions_against_history_median():
+    history = [_run(1.0, 50.0), _run(1.1, 52.0), _run(0.9, 48.0), _run(5.0, 500.0)]  # one outlier
+    assert regressions(history, _run(1.2, 55.0)["results"], 0.25, mem_threshold=0.25) == []
+
+    slow = regressions(history, _run(1.6, 50.0)["results"], 0.25, mem_threshold=0.25)
+    assert len(slow) == 1 and slow[0].startswith("stage@100: 1.6000s")
+
+    fat = regressions(history, _run(1.0, 80.0)["results"], 0.25, mem_threshold=0.25)
+    assert len(fat) == 1 and "MB" in fat[0]
+    assert regressions(history, _run(1.0, 80.0)["results"], 0.25) == []  # memory gate off
+
+    # Only the last `window` runs count; stages without history and tiny allocations never fail
+    assert regressions(history + [_run(3.0, 50.0)] * 5, _run(2.9, 50.0)["results"], 0.25) == []
+    assert regressions(history, {"other@100": {"seconds": 9.0, "peak_mb": 900.0}}, 0.25, mem_threshold=0.25) == []
+    tiny = [_run(1.0, 0.1)] * 3
+    assert regressions(tiny, _run(1.0, 0.5)["results"], 0.25, mem_threshold=0.25) == []
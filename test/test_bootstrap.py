@@ -0,0 +1,44 @@
+from __future__ import annotations
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.apps.report import render_markdown
+from src.research.bootstrap import block_indices, confidence_intervals, resample_performance
+from src.research.metrics import performance
+
+
+def test_block_indices_are_circular_runs():
+    idx = block_indices(50, 200, 7, np.random.default_rng(0))
+    assert idx.shape == (200, 50) and idx.min() >= 0 and idx.max() < 50
+    steps = np.diff(idx[:, :7], axis=1) % 50
+    assert (steps == 1).all()
+
+
+def test_resamples_are_deterministic_and_score_like_performance():
+    r = pd.Series(np.random.default_rng(1).normal(0.0005, 0.01, 500))
+    a = resample_performance(r, 1200, chunk=300, n_jobs=1, seed=3)
+    b = resample_performance(r, 1200, chunk=300, n_jobs=4, seed=3)
+    np.testing.assert_array_equal(a.sharpe, b.sharpe)
+    assert len(a) == 1200
+
+    # block == len(r): every resample is a rotation of the series, so the mean is unchanged
+    rot = resample_performance(r, 50, block=len(r), n_jobs=1)
+    np.testing.assert_allclose(rot.ann_ret, performance(r).ann_ret)
+
+
+def test_ten_years_ten_thousand_resamples_in_seconds():
+    rng = np.random.default_rng(2)
+    r = pd.Series(np.where(rng.random(2520) < 0.3, rng.normal(0.002, 0.02, 2520), 0.0))
+    t0 = time.perf_counter()
+    ci = confidence_intervals(r, 10_000)
+    assert time.perf_counter() - t0 < 10.0
+    assert (ci["lo"] <= ci["point"]).all() and (ci["point"] <= ci["hi"]).all()
+
+
+def test_report_shows_intervals():
+    idx = pd.date_range("2025-01-01", periods=120, freq="B")
+    r = pd.Series(np.random.default_rng(4).normal(0.001, 0.01, len(idx)), index=idx)
+    md = render_markdown("2025-06-30", r, n_resamples=500)
+    assert "## Confidence Intervals" in md and "| Sharpe |" in md
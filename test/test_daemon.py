@@ -0,0 +1,122 @@
+from __future__ import annotations
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.apps.daemon import Daemon
+from src.broker.reconciliation import plan_from_targets
+from src.core.config import load_settings
+from src.core.types import Target
+from src.data import polygon as poly
+from src.data.panel import Panel
+from src.strategy.pipeline import CloseLevels, build_targets_batch
+from src.strategy.triggers import TriggerIndex
+
+from test_ibkr_exec import FakeIB
+from test_panel_backtest import _universe
+
+KW = dict(
+    breakout_threshold=0.0, vol_multiplier=1.0, per_trade_risk=0.015,
+    stop_loss_pct=0.03, trail_start_pct=0.05, trail_pct=0.04, entry_limit_pct=0.005,
+)
+
+
+def _final(bars: dict[str, pd.DataFrame], day: pd.Timestamp) -> pd.DataFrame:
+    rows = [df.loc[[day]].assign(symbol=s) for s, df in bars.items() if day in df.index]
+    return pd.concat(rows).reset_index(drop=True)
+
+
+def test_close_levels_match_batch_targets():
+    bars = _universe(40, 60)
+    bars["S03"] = bars["S03"].iloc[:-1]  # no final bar
+    panel = Panel.from_frames(bars)
+    expected = build_targets_batch(panel, nav_gbp=40_000.0, fx_gbp_per_usd=0.8, **KW)
+
+    levels = CloseLevels.from_panel(panel.rows(0, panel.shape[0] - 1))
+    got = levels.targets(panel.high[-1], panel.close[-1], panel.volume[-1], 40_000.0, 0.8, **KW)
+    assert 0 < len(got) < 40 and "S03" not in got.symbols
+    assert got.to_targets() == expected.to_targets()
+
+
+def test_close_levels_look_past_gaps_in_the_dates():
+    bars = _universe(40, 60)
+    for s in list(bars)[::2]:
+        bars[s] = bars[s].drop(bars[s].index[-2])  # no bar on the levels' own last date
+    panel = Panel.from_frames(bars)
+    expected = build_targets_batch(panel, nav_gbp=40_000.0, fx_gbp_per_usd=0.8, **KW)
+
+    levels = CloseLevels.from_panel(panel.rows(0, panel.shape[0] - 1))
+    assert np.isfinite(levels.prev_high).all() and np.isfinite(levels.vol_sum).all()
+    got = levels.targets(panel.high[-1], panel.close[-1], panel.volume[-1], 40_000.0, 0.8, **KW)
+    assert got.to_targets() == expected.to_targets()
+
+
+class _Client:
+    def __init__(self):
+        self.ib = FakeIB()
+        self.ib.isConnected = lambda: True
+        self.ib.positions = lambda: []
+        self.ib.fills = lambda: []
+        self.ib.openTrades = lambda: [t for t in self.ib.trades if t.isActive()]
+
+
+def test_daemon_decides_from_warm_state(tmp_path, monkeypatch):
+    cfg = load_settings()
+    bars = _universe(40, 60)
+    day = next(iter(bars.values())).index[-1]
+    monkeypatch.chdir(tmp_path)  # journal + run profile
+
+    d = Daemon(nav_gbp=40_000.0, poll=0.0, client=_Client())
+    d.prepare(day, bars)  # a bar of `day` itself must not leak into the levels
+    assert np.array_equal(d.warm.levels.prev_high, Panel.from_frames(bars).high[-2])
+
+    published = iter([_final(bars, day).iloc[:0], _final(bars, day)])
+
+    async def grouped(date):
+        assert date == day.strftime("%Y-%m-%d")
+        return next(published)
+
+    monkeypatch.setattr(poly, "grouped_daily", grouped)
+    subs = asyncio.run(d.decide(day))
+
+    panel = Panel.from_frames(bars)
+    kw = {**KW, "breakout_threshold": cfg.strat.signal["breakout_threshold"],
+          "vol_multiplier": cfg.strat.signal["vol_multiplier"]}
+    batch = build_targets_batch(panel, nav_gbp=40_000.0, fx_gbp_per_usd=d.warm.fx_gbp_per_usd, **kw)
+    last = dict(zip(panel.symbols, panel.close[-1]))
+    plan = plan_from_targets(
+        batch.to_targets(), {}, last, max_positions=cfg.default.risk["max_positions"],
+        max_gross_exposure=cfg.default.risk["max_gross_exposure"], nav_usd=d.warm.nav_usd,
+    )
+    assert len(plan) > 0
+    assert [s.symbol for s in subs] == [t.symbol for t in plan]
+    assert list((tmp_path / "artifacts" / "journal" / "orders").glob("month=*/*.parquet"))
+
+
+def test_triggers_and_close_share_one_daily_risk_budget(tmp_path, monkeypatch):
+    bars = _universe(40, 60)
+    day = next(iter(bars.values())).index[-1]
+    monkeypatch.chdir(tmp_path)
+    d = Daemon(nav_gbp=40_000.0, client=_Client())
+    d.cfg = d.cfg.model_copy(deep=True)
+    risk = d.cfg.default.risk
+    risk.update(max_positions=4, max_gross_exposure=1.5)  # each entry is ~half of NAV: names bind first
+    d.prepare(day, {s: df.iloc[:-1] for s, df in bars.items()})
+    d.triggers = TriggerIndex.from_levels(d.warm.levels, 0.0, 0.0)
+    # An entry still open from another process takes a name too
+    d.ex.place_brackets([Target(symbol="ZZZ", side="BUY", qty=100, entry_limit=10.0, stop_loss=9.7, trail_start=10.5, trail_pct=0.04)])
+
+    # Two triggers at a time, well past max_positions in total
+    live = np.flatnonzero(np.isfinite(d.triggers.level))[: 2 * risk["max_positions"]]
+    sent = [s for pair in live.reshape(-1, 2) for s in d.on_trigger(pair, d.triggers.level[pair] * 1.01)]
+    assert len(sent) == risk["max_positions"] - 1
+    assert len({s.symbol for s in sent}) == len(sent)
+    assert sum(d.committed().values()) <= risk["max_gross_exposure"] * d.warm.nav_usd + 1e-6
+    assert d.on_trigger(live[-2:], d.triggers.level[live[-2:]] * 1.01) == []
+
+    # Filled entries leave IB's open orders but still count; the close adds nothing past the budget
+    for t in d.client.ib.trades:
+        t.orderStatus.status = "Filled"
+    assert set(d.committed()) == {s.symbol for s in sent}
+    assert len(sent) + len(d.act(_final(bars, day))) <= risk["max_positions"]
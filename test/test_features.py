@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from src.data.features import FeatureCache, compute_features
+from src.research.backtest import BTConfig, backtest_breakout
+from src.strategy.pipeline import build_targets
+
+from test_panel_backtest import _universe
+
+
+def _bars(n_days: int = 300) -> pd.DataFrame:
+    df = _universe(1, n_days)["S00"]
+    return df.rename_axis("timestamp").reset_index()
+
+
+def test_cache_hits_extends_tail_and_matches_full_compute(tmp_path):
+    bars = _bars()
+    cache = FeatureCache(tmp_path)
+    first = cache.get("S00", bars.iloc[:250])
+    pd.testing.assert_frame_equal(first, compute_features(bars.iloc[:250]))
+
+    # Fresh instance: served from disk, tail appended from 20 bars of context
+    cache = FeatureCache(tmp_path)
+    revised = bars.copy()
+    revised.loc[249, "close"] *= 1.01  # the previously last (partial) bar was revised
+    grown = cache.get("S00", revised)
+    pd.testing.assert_frame_equal(grown, compute_features(revised))
+
+    # Unchanged bars come back from memory without touching the file
+    cache.path("S00").unlink()
+    pd.testing.assert_frame_equal(cache.get("S00", revised), grown)
+
+    # Rewritten history rebuilds the entry
+    edited = revised.copy()
+    edited.loc[10, "high"] *= 2
+    pd.testing.assert_frame_equal(cache.get("S00", edited), compute_features(edited))
+
+
+def test_lru_eviction_bounds_memory_and_disk(tmp_path):
+    bars = _bars(120)
+    cache = FeatureCache(tmp_path, max_memory=2)
+    for s in ("A", "B", "C"):
+        cache.get(s, bars)
+    assert [s for s, _ in cache._mem] == ["B", "C"]
+
+    size = cache.path("A").stat().st_size
+    cache.get("A", bars)  # A becomes most recently used on disk
+    cache.max_bytes = 2 * size
+    assert cache.evict() == 1
+    assert not cache.path("B").exists() and cache.path("A").exists() and cache.path("C").exists()
+    assert cache.disk_bytes() <= cache.max_bytes
+
+
+def test_consumers_accept_cached_features(tmp_path):
+    bars = _bars()
+    feats = FeatureCache(tmp_path).get("S00", bars)
+    df = bars.set_index("timestamp")
+    cfg = BTConfig(breakout_threshold=0.0, vol_multiplier=0.5)
+    pd.testing.assert_series_equal(backtest_breakout(df, cfg, features=feats.set_axis(df.index)), backtest_breakout(df, cfg))
+
+    kw = dict(
+        breakout_threshold=0.0, vol_multiplier=0.5, per_trade_risk=0.01, stop_loss_pct=0.05,
+        trail_start_pct=0.05, trail_pct=0.03, entry_limit_pct=0.002,
+    )
+    hits = 0
+    for end in range(30, len(df)):
+        a = build_targets("S00", df.iloc[:end], 10_000, 0.8, features=feats.iloc[:end], **kw)
+        b = build_targets("S00", df.iloc[:end], 10_000, 0.8, **kw)
+        assert a == b
+        hits += bool(a)
+    assert hits > 0
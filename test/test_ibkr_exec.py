@@ -0,0 +1,105 @@
+from __future__ import annotations
+import itertools
+import time
+
+import pytest
+from ib_insync import OrderStatus, Trade
+
+from src.broker.ibkr_exec import Executor
+from src.core.types import Target
+
+
+class FakeClient:
+    def __init__(self):
+        self._ids = itertools.count(100)
+
+    def getReqId(self) -> int:
+        return next(self._ids)
+
+
+class FakeIB:
+    """Records placed orders; TWS acknowledges parents only when events are pumped."""
+
+    def __init__(self, ack_delay: float = 0.0):
+        self.client = FakeClient()
+        self.placed: list[tuple] = []
+        self.trades: list[Trade] = []
+        self.ack_delay = ack_delay
+
+    def placeOrder(self, contract, order) -> Trade:
+        trade = Trade(contract, order, OrderStatus(orderId=order.orderId, status=OrderStatus.PendingSubmit))
+        self.placed.append((contract.symbol, order))
+        self.trades.append(trade)
+        return trade
+
+    def waitOnUpdate(self, timeout: float = 0) -> bool:
+        time.sleep(self.ack_delay)
+        for tr in self.trades:
+            if tr.orderStatus.status == OrderStatus.PendingSubmit:
+                tr.orderStatus.status = OrderStatus.PreSubmitted
+                tr.statusEvent.emit(tr)
+        return True
+
+    def sleep(self, *_):  # pragma: no cover - must not be called on the submit path
+        raise AssertionError("blocking sleep in submit path")
+
+
+def _targets(n: int) -> list[Target]:
+    return [
+        Target(symbol=f"S{i}", side="BUY", qty=10 + i, entry_limit=10.0, stop_loss=9.7, trail_start=10.5, trail_pct=0.04)
+        for i in range(n)
+    ]
+
+
+def test_place_brackets_pipelines_and_tracks_acks():
+    ib = FakeIB(ack_delay=0.01)
+    ex = Executor(ib)
+    t0 = time.perf_counter()
+    subs = ex.place_brackets(_targets(200))
+    assert time.perf_counter() - t0 < 0.5
+    assert len(subs) == 200 and not any(s.acked for s in subs)
+
+    # Parent/stop pairs: parent held back, stop transmits the pair under the parent's pre-allocated id
+    parents = [o for _, o in ib.placed[0::2]]
+    stops = [o for _, o in ib.placed[1::2]]
+    assert all(p.transmit is False and p.orderType == "LMT" for p in parents)
+    assert all(s.transmit is True and s.parentId == p.orderId for p, s in zip(parents, stops))
+    assert len({o.orderId for _, o in ib.placed}) == 400
+
+    assert ex.wait_acks(subs, timeout=1.0) == []
+    assert all(s.status == OrderStatus.PreSubmitted and s.latency_ms >= 0 for s in subs)
+
+
+def test_wait_acks_times_out_on_silent_gateway():
+    class Silent(FakeIB):
+        def waitOnUpdate(self, timeout: float = 0) -> bool:
+            time.sleep(min(timeout, 0.01))
+            return False
+
+    ex = Executor(Silent())
+    subs = ex.place_brackets(_targets(3))
+    assert len(ex.wait_acks(subs, timeout=0.05)) == 3
+
+
+def test_failed_stop_cancels_parent_and_place_bracket_raises():
+    class StopFails(FakeIB):
+        def __init__(self):
+            super().__init__()
+            self.cancelled: list[int] = []
+
+        def placeOrder(self, contract, order):
+            if order.orderType == "STP":
+                raise ConnectionError("socket closed")
+            return super().placeOrder(contract, order)
+
+        def cancelOrder(self, order):
+            self.cancelled.append(order.orderId)
+
+    ib = StopFails()
+    ex = Executor(ib)
+    assert ex.place_brackets(_targets(2)) == []
+    assert ib.cancelled == [o.orderId for _, o in ib.placed]  # both orphaned parents cancelled
+
+    with pytest.raises(ConnectionError, match="socket closed"):
+        ex.place_bracket(_targets(1)[0])
+    assert len(ib.cancelled) == 3
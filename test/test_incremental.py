@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.strategy.incremental import IndicatorBook
+from src.strategy.vobreakout import atr_pct, breakout_long
+
+from test_backtest import _random_walk
+
+
+def test_incremental_state_matches_batch_indicators(tmp_path):
+    df = _random_walk(400)
+    sig = breakout_long(df, 0.005, 1.2).to_numpy()
+    atr = atr_pct(df).to_numpy()
+
+    book = IndicatorBook()
+    path = tmp_path / "ind.json"
+    for i in range(len(df)):
+        if i % 97 == 0:  # survive a save/load round trip mid-stream
+            book.save(path)
+            book = IndicatorBook.load(path)
+        st = book.sync("X", df.iloc[: i + 1])
+        assert st.breakout_long(0.005, 1.2) == sig[i]
+        assert np.isclose(st.atr_pct(), atr[i], rtol=1e-12, atol=0)
+
+
+def test_sync_skips_seen_bars_and_rebuilds_on_gap():
+    df = _random_walk(120)
+    book = IndicatorBook()
+    book.sync("X", df.iloc[:60])
+    st = book.sync("X", df.iloc[30:80])  # overlapping window: only 20 new bars applied
+    assert st.count == 80
+    st = book.sync("X", df.iloc[100:])   # gap: state rebuilt from the frame
+    assert st.count == 20
+    assert st.last_date == pd.Timestamp(df.index[-1]).strftime("%Y-%m-%d")
+
+
+def test_partial_last_bar_is_replaced_and_single_new_bar_appends():
+    df = _random_walk(80)
+    sig = breakout_long(df, 0.0, 1.0).to_numpy()
+    atr = atr_pct(df).to_numpy()
+    for k in (10, 20, 45):  # filling, just full, wrapped ring
+        partial = df.iloc[: k + 1].copy()
+        partial.iloc[-1, partial.columns.get_indexer(["high", "low", "close", "volume"])] = [1.0, 0.5, 0.8, 1.0]
+        book = IndicatorBook()
+        book.sync("X", partial)
+        st = book.sync("X", df.iloc[k:k + 1])  # the settled bar for the same session
+        assert st.count == k + 1 and st.breakout_long(0.0, 1.0) == sig[k]
+        assert np.isclose(st.atr_pct(), atr[k], rtol=1e-12, atol=0)
+        assert np.isclose(st.vol_sum, df["volume"].iloc[max(0, k - 19): k + 1].sum(), rtol=1e-12)
+
+        st = book.sync("X", df.iloc[k + 1:k + 2])  # only the next session's bar
+        assert st.count == k + 2 and st.breakout_long(0.0, 1.0) == sig[k + 1]
+        assert np.isclose(st.atr_pct(), atr[k + 1], rtol=1e-12, atol=0)
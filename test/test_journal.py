@@ -0,0 +1,73 @@
+from __future__ import annotations
+from datetime import datetime, timedelta, UTC
+
+import numpy as np
+
+from src.broker.ibkr_exec import Submission
+from src.core.journal import Journal, register_journal, slippage_by_symbol, sync_fills
+from src.core.storage import get_con
+from src.core.types import Fill, RunMeta, Target
+from src.strategy.pipeline import TargetBatch
+
+
+def _run(root, run_id: str, asof: datetime, fill_px: float) -> None:
+    meta = RunMeta(run_id=run_id, asof=asof, mode="paper")
+    targets = [
+        Target(symbol=s, side="BUY", qty=100, entry_limit=10.2, stop_loss=9.5, trail_start=10.5, trail_pct=0.04)
+        for s in ("AAA", "BBB")
+    ]
+    batch = TargetBatch(np.array(["AAA", "BBB"], dtype=object), np.array([100, 100]), np.full(2, 10.2), np.full(2, 9.5), np.full(2, 10.5), 0.04)
+    subs = [Submission("AAA", 1, 2, 0.0, "Submitted", 0.004), Submission("BBB", 3, 4, 0.0, "Submitted", 0.002)]
+    with Journal(meta, root) as j:
+        j.run(dry_run=False, nav_usd=50_000.0, fx_gbp_per_usd=0.78)
+        j.universe(["AAA", "BBB", "CCC"])
+        j.signals(batch)
+        j.targets(targets, {"AAA": 10.0, "BBB": 20.0})
+        j.orders(subs)
+        j.acks(subs)
+        j.fills([
+            Fill(order_id="1", symbol="AAA", qty=100, avg_price=fill_px, ts=asof),
+            Fill(order_id="3", symbol="BBB", qty=50, avg_price=20.0, ts=asof),
+            Fill(order_id="4", symbol="BBB", qty=-50, avg_price=19.0, ts=asof),  # stop, not an entry
+        ])
+
+
+def test_journal_partitions_runs_and_answers_slippage(tmp_path):
+    now = datetime.now(UTC)
+    _run(tmp_path, "r1", now - timedelta(days=400), fill_px=11.0)
+    _run(tmp_path, "r2", now - timedelta(days=1), fill_px=10.1)
+    assert len(list((tmp_path / "fills").glob("month=*/*.parquet"))) == 2
+
+    assert "journal_universe" in register_journal(tmp_path)
+    n, runs = get_con().execute("SELECT count(*), count(DISTINCT run_id) FROM journal_universe").fetchone()
+    assert (n, runs) == (6, 2)
+
+    slip = slippage_by_symbol(root=tmp_path)
+    assert slip.loc["AAA", "fills"] == 1  # the older run is outside the window
+    assert np.isclose(slip.loc["AAA", "slippage_bps"], 100.0)
+    assert np.isclose(slip.loc["BBB", "slippage_bps"], 0.0) and slip.loc["BBB", "shares"] == 50
+
+
+def test_flush_writes_nothing_when_empty(tmp_path):
+    j = Journal(RunMeta(run_id="r", asof=datetime.now(UTC), mode="paper"), tmp_path)
+    assert j.flush() == 0 and not any(tmp_path.iterdir())
+    assert register_journal(tmp_path) == []
+    assert slippage_by_symbol(root=tmp_path).empty
+
+
+def test_late_fills_join_the_run_that_sent_them(tmp_path):
+    asof = datetime.now(UTC) - timedelta(days=1)
+    _run(tmp_path, "r1", asof, fill_px=10.1)
+    later = asof + timedelta(hours=20)
+    executions = [
+        Fill(order_id="1", symbol="AAA", qty=100, avg_price=10.1, ts=asof),  # journaled with the run
+        Fill(order_id="2", symbol="AAA", qty=-100, avg_price=9.5, ts=later),  # stop hit the next day
+        Fill(order_id="99", symbol="ZZZ", qty=10, avg_price=5.0, ts=later),  # not ours
+    ]
+    assert sync_fills(executions, tmp_path) == 1
+    assert sync_fills(executions, tmp_path) == 0
+
+    register_journal(tmp_path)
+    rows = get_con().execute("SELECT run_id, order_id, qty FROM journal_fills ORDER BY ts, order_id").fetchall()
+    assert rows == [("r1", "1", 100), ("r1", "3", 50), ("r1", "4", -50), ("r1", "2", -100)]
+    assert len(list((tmp_path / "fills").glob("month=*/*.parquet"))) == 1
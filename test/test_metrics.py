@@ -0,0 +1,42 @@
+from __future__ import annotations
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from src.research.metrics import PerfAccumulator, performance, performance_batch
+
+
+def _close(a, b):
+    for f, x in asdict(a).items():
+        y = getattr(b, f)
+        assert (np.isnan(x) and np.isnan(y)) or abs(x - y) <= 1e-9 * max(1.0, abs(x)), (f, x, y)
+
+
+def _returns(rng, t=600, k=40):
+    r = rng.normal(0.0005, 0.01, (t, k))
+    r[rng.random(r.shape) < 0.6] = 0.0  # flat days, like a rarely-trading strategy
+    r[rng.random(r.shape) < 0.02] = np.nan
+    r[:, 0] = np.nan   # empty series
+    r[:, 1] = 0.0      # never trades
+    r[1:, 2] = 0.0     # a single trade
+    return r
+
+
+def test_batch_matches_per_series_performance():
+    r = _returns(np.random.default_rng(7))
+    batch = performance_batch(pd.DataFrame(r))
+    assert len(batch) == r.shape[1]
+    for k in range(r.shape[1]):
+        _close(performance(pd.Series(r[:, k])), batch[k])
+    assert list(batch.to_frame().columns) == list(asdict(batch[0]))
+
+
+def test_accumulator_matches_and_round_trips(tmp_path):
+    r = _returns(np.random.default_rng(8))[:, 5]
+    acc = PerfAccumulator()
+    acc.update_many(r[:300])
+    acc = PerfAccumulator.load(acc.save(tmp_path / "perf.json"))
+    acc.update_many(r[300:])
+    _close(performance(pd.Series(r)), acc.perf())
+    _close(performance(pd.Series([], dtype=float)), PerfAccumulator().perf())
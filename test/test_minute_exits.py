@@ -0,0 +1,78 @@
+from __future__ import annotations
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.timeutils import sessions_between
+from src.data.minute import MinuteStore
+from src.research.backtest import BTConfig, simulate_day
+from src.research.minute_exits import EXIT_STOP, EXIT_TRAIL, backtest_breakout_minute, path_exits, resolve_exits
+
+
+def _exit_loop(entry, o, h, lo, c, cfg):
+    """Bar-by-bar reference: stop in force before the bar, then arm / ratchet the trail."""
+    stop, armed, peak = entry * (1 - cfg.stop_loss_pct), False, entry
+    for j in range(len(c)):
+        if lo[j] <= stop:
+            return min(o[j], stop) / entry - 1
+        armed |= h[j] >= entry * (1 + cfg.trail_start_pct)
+        peak = max(peak, h[j])
+        if armed:
+            stop = max(stop, peak * (1 - cfg.trail_pct))
+    return c[-1] / entry - 1
+
+
+def _paths(n, m, rng, vol=0.003):
+    c = 10 * np.exp(np.cumsum(rng.normal(0, vol, (n, m)), axis=1))
+    o = np.concatenate([np.full((n, 1), 10.0), c[:, :-1]], axis=1)
+    h = np.maximum(o, c) * (1 + np.abs(rng.normal(0, 0.001, (n, m))))
+    lo = np.minimum(o, c) * (1 - np.abs(rng.normal(0, 0.001, (n, m))))
+    return o, h, lo, c
+
+
+def test_vectorized_exits_match_bar_loop():
+    rng = np.random.default_rng(3)
+    cfg = BTConfig(stop_loss_pct=0.02, trail_start_pct=0.02, trail_pct=0.01)
+    o, h, lo, c = _paths(400, 390, rng)
+    entry = np.full(400, 10.0)
+    ret, why, _ = resolve_exits(entry, o, h, lo, c, np.full(400, 390), cfg)
+    ref = [_exit_loop(10.0, o[k], h[k], lo[k], c[k], cfg) for k in range(400)]
+    np.testing.assert_allclose(ret, ref, rtol=0, atol=1e-12)
+    assert (why == EXIT_STOP).any() and (why == EXIT_TRAIL).any()
+
+
+def test_path_beats_daily_ordering_guess(tmp_path):
+    # Next session rallies through the trail start first, then gives it all back
+    cfg = BTConfig(stop_loss_pct=0.03, trail_start_pct=0.05, trail_pct=0.04)
+    px = np.r_[np.linspace(10, 10.8, 100), np.linspace(10.8, 9.5, 290)]
+    day = pd.Timestamp("2024-03-05")
+    ts = (day + pd.to_timedelta(np.arange(570, 960), unit="min")).tz_localize("America/New_York").tz_convert("UTC")
+    store = MinuteStore(tmp_path)
+    store.write("A", pd.DataFrame({"timestamp": ts, "open": px, "high": px, "low": px, "close": px, "volume": 1.0}))
+
+    ret, why = path_exits(store, "A", np.array([10.0]), pd.DatetimeIndex([day]), cfg)
+    assert why[0] == EXIT_TRAIL and abs(ret[0] - (10.8 * 0.96 / 10 - 1)) < 2e-3
+    assert simulate_day(10.0, 10.8, 9.5, 9.5, cfg) == -0.03  # the daily guess books the stop
+
+
+def test_minute_backtest_scans_a_symbol_year_in_milliseconds(tmp_path):
+    days = sessions_between("2023-01-03", "2023-12-29")
+    rng = np.random.default_rng(0)
+    o, h, lo, c = _paths(len(days), 390, rng, vol=0.002)
+    ts = (days.repeat(390) + pd.to_timedelta(np.tile(np.arange(570, 960), len(days)), unit="min"))
+    store = MinuteStore(tmp_path)
+    store.write("A", pd.DataFrame({
+        "timestamp": ts.tz_localize("America/New_York").tz_convert("UTC"),
+        "open": o.ravel(), "high": h.ravel(), "low": lo.ravel(), "close": c.ravel(), "volume": 1e3,
+    }))
+    daily = pd.DataFrame(
+        {"open": o[:, 0], "high": h.max(1), "low": lo.min(1), "close": c[:, -1], "volume": rng.lognormal(13, 1, len(days))},
+        index=days,
+    )
+    cfg = BTConfig(breakout_threshold=0.0, vol_multiplier=0.5)  # many trades
+    backtest_breakout_minute(daily, cfg, store, "A")  # warm the page cache
+    t0 = time.perf_counter()
+    r = backtest_breakout_minute(daily, cfg, store, "A")
+    assert time.perf_counter() - t0 < 0.25
+    assert (r != 0).sum() > 20 and r.index.equals(days[:-1])
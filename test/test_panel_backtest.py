@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.broker.reconciliation import plan_from_targets
+from src.data.panel import Panel
+from src.research.backtest import BTConfig
+from src.research.panel_backtest import backtest_panel
+from src.strategy.pipeline import build_targets, build_targets_batch
+
+
+def _universe(n_sym: int, n_days: int, seed: int = 11) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2020-01-01", periods=n_days)
+    out = {}
+    for k in range(n_sym):
+        close = rng.uniform(3, 80) * np.exp(np.cumsum(rng.normal(0, 0.03, size=n_days)))
+        high = close * (1 + np.abs(rng.normal(0, 0.02, size=n_days)))
+        low = close * (1 - np.abs(rng.normal(0, 0.02, size=n_days)))
+        vol = rng.lognormal(13, 0.5, size=n_days)
+        df = pd.DataFrame({"open": close, "high": high, "low": low, "close": close, "volume": vol}, index=idx)
+        out[f"S{k:02d}"] = df.iloc[k:]  # staggered listings
+    return out
+
+
+def test_panel_positions_match_live_planning():
+    bars = _universe(30, 120)
+    panel = Panel.from_frames(bars)
+    cfg = BTConfig(breakout_threshold=0.0, vol_multiplier=1.0)
+    risk = dict(max_positions=5, max_gross_exposure=0.7, per_name_cap=0.2)
+    nav = 50_000.0
+    res = backtest_panel(panel, cfg, nav_usd=nav, per_trade_risk=0.015, **risk)
+
+    assert res.positions.shape == (119, 30)
+    assert res.returns.abs().sum() > 0
+    for t in (30, 61, 90, 118):
+        asof = panel.dates[t]
+        targets, last = [], {}
+        for sym, df in bars.items():
+            hist = df.loc[:asof]
+            targets += build_targets(
+                sym, hist, nav_gbp=nav, fx_gbp_per_usd=1.0,
+                breakout_threshold=cfg.breakout_threshold, vol_multiplier=cfg.vol_multiplier,
+                per_trade_risk=0.015, stop_loss_pct=cfg.stop_loss_pct,
+                trail_start_pct=cfg.trail_start_pct, trail_pct=cfg.trail_pct, entry_limit_pct=0.005,
+            )
+            if len(hist):
+                last[sym] = float(hist["close"].iloc[-1])
+        child = plan_from_targets(targets, {}, last, nav_usd=nav, **risk)
+        expected = {c.symbol: c.qty for c in child}
+        row = res.positions.loc[asof]
+        assert row[row != 0].to_dict() == expected
+
+
+def test_batch_targets_match_per_symbol_builder():
+    bars = _universe(40, 60)
+    kw = dict(
+        breakout_threshold=0.0, vol_multiplier=1.0, per_trade_risk=0.015,
+        stop_loss_pct=0.03, trail_start_pct=0.05, trail_pct=0.04, entry_limit_pct=0.005,
+    )
+    batch = build_targets_batch(Panel.from_frames(bars), nav_gbp=40_000.0, fx_gbp_per_usd=0.8, **kw)
+    expected = [t for s, df in bars.items() for t in build_targets(s, df, 40_000.0, 0.8, **kw)]
+    assert 0 < len(batch) < 40
+    assert batch.to_targets() == expected
+
+    empty = build_targets_batch(Panel.from_frames({}), nav_gbp=40_000.0, fx_gbp_per_usd=0.8, **kw)
+    assert empty.to_targets() == []
+
+
+def test_batch_targets_look_past_gaps_in_the_dates():
+    bars = _universe(40, 60)
+    for s in list(bars)[::2]:  # a halt inside the volume window of every other symbol
+        bars[s] = bars[s].drop(bars[s].index[-5])
+    kw = dict(
+        breakout_threshold=0.0, vol_multiplier=1.0, per_trade_risk=0.015,
+        stop_loss_pct=0.03, trail_start_pct=0.05, trail_pct=0.04, entry_limit_pct=0.005,
+    )
+    batch = build_targets_batch(Panel.from_frames(bars), nav_gbp=40_000.0, fx_gbp_per_usd=0.8, **kw)
+    expected = [t for s, df in bars.items() for t in build_targets(s, df, 40_000.0, 0.8, **kw)]
+    assert any(t.symbol in list(bars)[::2] for t in expected)
+    assert batch.to_targets() == expected
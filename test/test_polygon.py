@@ -0,0 +1,143 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import polygon as poly
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    lock = threading.Lock()
+    inflight = 0
+    peak = 0
+    hits: list[tuple[float, str]] = []
+    ports: set[int] = set()
+    throttled: set[str] = set()
+
+    def do_GET(self):
+        cls = type(self)
+        sym = self.path.split("/ticker/")[1].split("/")[0]
+        with cls.lock:
+            cls.inflight += 1
+            cls.peak = max(cls.peak, cls.inflight)
+            cls.hits.append((time.monotonic(), sym))
+            cls.ports.add(self.client_address[1])
+            first = sym.startswith("RL") and sym not in cls.throttled
+            cls.throttled.add(sym)
+        time.sleep(0.02)
+        if first:
+            self._send(429, b"{}", {"Retry-After": "0.3"})
+        else:
+            body = json.dumps({"results": [{"t": 1704171600000, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10}]})
+            self._send(200, body.encode())
+        with cls.lock:
+            cls.inflight -= 1
+
+    def _send(self, code, body, headers=None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(poly, "BASE", f"http://127.0.0.1:{srv.server_address[1]}")
+    monkeypatch.setattr(poly, "API_KEY", "test")
+    _Stub.hits, _Stub.ports, _Stub.throttled, _Stub.peak = [], set(), set(), 0
+    yield _Stub
+    srv.shutdown()
+
+
+def test_shared_client_respects_rate_concurrency_and_retry_after(stub, monkeypatch):
+    cfg = poly.load_settings().model_copy(deep=True)  # settings are memoized; don't mutate the shared copy
+    cfg.polygon.rate_per_sec, cfg.polygon.burst = 100.0, 5
+    cfg.polygon.max_concurrency, cfg.polygon.min_concurrency = 4, 1
+    monkeypatch.setattr(poly, "load_settings", lambda: cfg)
+
+    async def run():
+        out = await poly.agg_daily_many([f"S{i}" for i in range(40)] + ["RL1"], "2024-01-01", "2024-01-05")
+        first = poly._session()
+        await poly.agg_daily("S0", "2024-01-01", "2024-01-05")
+        assert poly._session() is first
+        await poly.aclose()
+        return out
+
+    t0 = time.monotonic()
+    out = asyncio.run(run())
+    assert all(len(df) == 1 for df in out.values())
+
+    # Token bucket: 42 requests at 100/s with a burst of 5 need at least ~0.35s
+    assert time.monotonic() - t0 >= 0.3
+    assert stub.peak <= 4
+    assert len(stub.ports) <= 4  # one pooled client, connections reused
+
+    # 429 + Retry-After: the retry waits for the server's cool-down
+    rl = [t for t, s in stub.hits if s == "RL1"]
+    assert len(rl) == 2 and rl[1] - rl[0] >= 0.3
+
+
+def test_aimd_concurrency_backs_off_and_recovers():
+    from src.core.ratelimit import AdaptiveConcurrency
+
+    async def run():
+        c = AdaptiveConcurrency(16, 2, 16)
+        for _ in range(8):
+            await c.acquire()
+        for _ in range(8):
+            await c.release(False)  # one wave of errors -> a single halving
+        assert int(c.limit) == 8
+        for _ in range(200):
+            await c.acquire()
+            await c.release(True)
+        assert int(c.limit) == 16
+
+    asyncio.run(run())
+
+
+def test_decode_aggs_is_typed_and_columnar():
+    import pyarrow as pa
+
+    rows = [
+        {"t": 1704171600000, "o": 1, "h": 2.5, "l": 0.5, "c": 2, "v": 1000, "vw": 1.7, "n": 12},
+        {"t": 1704258000000, "o": 2, "h": 3.0, "l": 1.5, "c": 2.5, "v": None},
+    ]
+    batch = poly.decode_aggs({"results": rows}, "ABC")
+    assert batch.schema.field("timestamp").type == pa.int64()
+    assert batch.schema.field("volume").type == pa.float64()
+    assert pa.types.is_dictionary(batch.schema.field("symbol").type)
+    assert batch.column("timestamp").to_pylist() == [1704171600000, 1704258000000]
+
+    df = poly._normalize({"results": rows}, "ABC")
+    assert list(df.columns) == ["timestamp", "open", "high", "low", "close", "volume", "symbol"]
+    assert str(df["timestamp"].dt.tz) == "UTC" and df["timestamp"].iloc[0] == pd.Timestamp("2024-01-02 05:00", tz="UTC")
+    assert df["close"].tolist() == [2.0, 2.5] and np.isnan(df["volume"].iloc[1])
+    assert df["symbol"].dtype == "category" and (df["symbol"] == "ABC").all()
+
+
+def test_decode_grouped_daily():
+    js = {"results": [
+        {"T": "AAA", "t": 1704229200000, "o": 1, "h": 2, "l": 0.5, "c": 1.5, "v": 10, "vw": 1.4},
+        {"T": "BBB", "t": 1704229200000, "o": 3, "h": 4, "l": 2.5, "c": 3.5, "v": 20},
+    ]}
+    df = poly.decode_grouped(js)
+    assert df["symbol"].tolist() == ["AAA", "BBB"]
+    assert df["high"].tolist() == [2.0, 4.0] and df["timestamp"].dt.tz is not None
+    # Stamped at the 16:00 close by Polygon, restamped to the session's 00:00 New York like aggs
+    assert (df["timestamp"] == pd.Timestamp("2024-01-02 05:00", tz="UTC")).all()
+    assert poly.decode_grouped({"resultsCount": 0}).empty
@@ -0,0 +1,75 @@
+from __future__ import annotations
+import asyncio
+import time
+
+import pytest
+from ib_insync import Ticker
+
+from src.broker.prices import PriceSnapshots
+
+
+class SlowIB:
+    """reqTickersAsync with injected latency: `latency` per call, `slow` symbols never answer in time."""
+
+    def __init__(self, latency: float = 0.05, slow: set[str] = frozenset(), lines: int = 100):
+        self.latency, self.slow, self.lines = latency, set(slow), lines
+        self.calls = self.inflight = self.peak_lines = 0
+
+    async def reqTickersAsync(self, *contracts):
+        self.calls += 1
+        self.inflight += len(contracts)
+        self.peak_lines = max(self.peak_lines, self.inflight)
+        assert self.inflight <= self.lines, "market-data line limit exceeded"
+        try:
+            await asyncio.sleep(60 if any(c.symbol in self.slow for c in contracts) else self.latency)
+        finally:
+            self.inflight -= len(contracts)
+        return [Ticker(contract=c, last=10.0 + int(c.symbol[1:]), close=9.0) for c in contracts]
+
+
+def test_chunked_snapshots_stay_flat_and_within_line_limit():
+    times = {}
+    for n in (20, 500):
+        ib = SlowIB(latency=0.05)
+        snap = PriceSnapshots(ib, chunk=10, inflight=10, timeout=5.0, cache={})
+        t0 = time.perf_counter()
+        prices = asyncio.run(snap.fetch_async([f"S{i}" for i in range(n)]))
+        times[n] = time.perf_counter() - t0
+        assert len(prices) == n and prices["S7"] == 17.0
+        assert ib.peak_lines <= 100
+    # 500 names = 5 waves of 0.05s; nowhere near 25x the 20-name time
+    assert times[500] < 0.6
+
+
+def test_deadline_fallback_and_cache():
+    ib = SlowIB(latency=0.01, slow={"S3"})
+    cache: dict = {}
+    snap = PriceSnapshots(ib, chunk=2, inflight=4, timeout=0.3, ttl=60, cache=cache)
+    syms = [f"S{i}" for i in range(8)]
+
+    t0 = time.perf_counter()
+    prices = asyncio.run(snap.fetch_async(syms, fallback={"S2": 5.0, "S3": 6.0}))
+    assert time.perf_counter() - t0 < 1.0
+    # S2 and S3 share the slow chunk: both fall back to their last close
+    assert prices["S2"] == 5.0 and prices["S3"] == 6.0 and prices["S0"] == 10.0
+    calls = ib.calls
+
+    again = asyncio.run(snap.fetch_async(["S0", "S1"]))
+    assert again == {"S0": 10.0, "S1": 11.0} and ib.calls == calls  # served from cache
+
+    snap.ttl = 0.0
+    asyncio.run(snap.fetch_async(["S0"]))
+    assert ib.calls == calls + 1
+
+
+def test_blocking_fetch_refuses_to_run_inside_a_loop():
+    snap = PriceSnapshots(SlowIB(latency=0.0), cache={})
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    assert snap.fetch(["S2"]) == {"S2": 12.0}  # fine from synchronous code
+
+    async def on_loop():
+        with pytest.raises(RuntimeError, match="fetch_async"):
+            snap.fetch(["S1"])
+        return await snap.fetch_async(["S1"])
+
+    assert asyncio.get_event_loop().run_until_complete(on_loop()) == {"S1": 11.0}
@@ -1,10 +1,12 @@
 # tests/test_smoke.py
 from __future__ import annotations
 import os
+import subprocess
+import sys
 import pandas as pd
 import numpy as np
 
-from src.core.config import load_settings
+from src.core.config import load_settings, reload_settings
 from src.broker.fx import gbp_per_usd
 from src.strategy.vobreakout import breakout_long
 from src.strategy.pipeline import build_targets
@@ -21,6 +23,20 @@ def test_config_loads():
     assert cfg.ibkr.host and isinstance(cfg.ibkr.port, int)
 
 
+def test_settings_memoized():
+    assert load_settings() is load_settings()
+    assert reload_settings() is load_settings()
+
+
+def test_eod_app_imports_broker_and_http_stacks_lazily():
+    code = (
+        "import sys, src.apps.eod_rebalance; "
+        "print(','.join(m for m in ('ib_insync', 'httpx', 'duckdb', 'pandas_market_calendars') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.strip()
+    assert out == ""
+
+
 def test_fx_env_and_default(monkeypatch):
     # Default path (no env)
     monkeypatch.delenv("FX_GBP_PER_USD", raising=False)
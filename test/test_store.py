@@ -0,0 +1,172 @@
+from __future__ import annotations
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from src.data import polygon as poly
+from src.data.store import BarStore, session_dates
+
+
+def _js(days: list[str]) -> dict:
+    ts = pd.to_datetime(days).tz_localize("America/New_York").tz_convert("UTC")
+    return {
+        "results": [
+            {"t": int(t.value // 1_000_000), "o": 10.0, "h": 11.0, "l": 9.0, "c": 10.5, "v": 1e6}
+            for t in ts
+        ]
+    }
+
+
+def test_store_fetches_only_missing_tail(tmp_path, monkeypatch):
+    calls: list[str] = []
+
+    async def fake_get(client, url, **kw):
+        calls.append(url)
+        lo, hi = url.split("/range/1/day/")[1].split("?")[0].split("/")
+        days = pd.bdate_range(lo, hi).strftime("%Y-%m-%d").tolist()
+        return _js(days)
+
+    monkeypatch.setattr(poly, "API_KEY", "test")
+    monkeypatch.setattr(poly, "_get_with_retries", fake_get)
+    store = BarStore(tmp_path)
+
+    out = asyncio.run(poly.agg_daily_many(["AAA"], "2024-01-01", "2024-01-31", store=store))
+    assert len(out["AAA"]) == 23
+    assert "/2024-01-01/2024-01-31?" in calls[-1]
+
+    # Fully covered past window: served from disk, no HTTP call
+    out = asyncio.run(poly.agg_daily_many(["AAA"], "2024-01-10", "2024-01-31", store=store))
+    assert len(calls) == 1
+    assert len(out["AAA"]) == 16
+
+    # Extending the window only requests the tail (re-fetching the last covered day and the one before)
+    out = asyncio.run(poly.agg_daily_many(["AAA"], "2024-01-01", "2024-02-09", store=store))
+    assert "/2024-01-30/2024-02-09?" in calls[-1]
+    assert len(out["AAA"]) == 30
+    assert out["AAA"]["timestamp"].is_monotonic_increasing
+    assert not out["AAA"]["timestamp"].duplicated().any()
+
+
+
+def test_restated_history_is_refetched_in_full(tmp_path, monkeypatch):
+    calls: list[str] = []
+    split = {"on": False}
+
+    async def fake_get(client, url, **kw):
+        calls.append(url)
+        lo, hi = url.split("/range/1/day/")[1].split("?")[0].split("/")
+        js = _js(pd.bdate_range(lo, hi).strftime("%Y-%m-%d").tolist())
+        if split["on"]:  # a 2:1 split: the vendor now serves every earlier bar halved
+            for r in js["results"]:
+                r.update(o=r["o"] / 2, h=r["h"] / 2, l=r["l"] / 2, c=r["c"] / 2)
+        return js
+
+    monkeypatch.setattr(poly, "API_KEY", "test")
+    monkeypatch.setattr(poly, "_get_with_retries", fake_get)
+    store = BarStore(tmp_path)
+    asyncio.run(poly.agg_daily_many(["AAA"], "2024-01-01", "2024-01-31", store=store))
+
+    # Unchanged history: the tail alone is fetched
+    asyncio.run(poly.agg_daily_many(["AAA"], "2024-01-01", "2024-02-09", store=store))
+    assert len(calls) == 2
+
+    split["on"] = True
+    out = asyncio.run(poly.agg_daily_many(["AAA"], "2024-01-10", "2024-02-20", store=store))
+    assert "/2024-02-08/2024-02-20?" in calls[2] and "/2024-01-01/2024-02-20?" in calls[3]
+    assert (out["AAA"]["close"] == 5.25).all()
+    assert (store.read("AAA")["close"] == 5.25).all() and len(store.read("AAA")) == 37
+
+
+def test_store_never_marks_an_unfetched_gap_as_covered(tmp_path, monkeypatch):
+    calls: list[str] = []
+
+    async def fake_get(client, url, **kw):
+        calls.append(url)
+        lo, hi = url.split("/range/1/day/")[1].split("?")[0].split("/")
+        return _js(pd.bdate_range(lo, hi).strftime("%Y-%m-%d").tolist())
+
+    monkeypatch.setattr(poly, "API_KEY", "test")
+    monkeypatch.setattr(poly, "_get_with_retries", fake_get)
+    store = BarStore(tmp_path)
+    n = len(pd.bdate_range("2020-01-01", "2021-03-01"))
+
+    asyncio.run(poly.agg_daily_many(["AAA"], "2020-01-01", "2020-06-30", store=store))
+    asyncio.run(poly.agg_daily_many(["AAA"], "2021-01-01", "2021-03-01", store=store))
+    assert "/2020-06-29/2021-03-01?" in calls[-1]  # bridged from the coverage end
+    out = asyncio.run(poly.agg_daily_many(["AAA"], "2020-01-01", "2021-03-01", store=store))
+    assert len(calls) == 2 and len(out["AAA"]) == n
+
+    # Same before the coverage start
+    other = BarStore(tmp_path / "b")
+    asyncio.run(poly.agg_daily_many(["AAA"], "2021-01-01", "2021-03-01", store=other))
+    asyncio.run(poly.agg_daily_many(["AAA"], "2020-01-01", "2020-06-30", store=other))
+    assert "/2020-01-01/2021-01-01?" in calls[-1]
+    assert len(other.read("AAA", "2020-01-01", "2021-03-01")) == n
+
+
+def test_screen_universe_filters_and_ranks(tmp_path):
+    from src.data.universe import build_universe, screen_universe
+    from src.strategy.vobreakout import atr_pct
+
+    store = BarStore(tmp_path)
+    ts = pd.bdate_range("2024-01-01", periods=40).tz_localize("America/New_York").tz_convert("UTC")
+    spec = {"WILD": (20.0, 0.08, 2e6), "CALM": (20.0, 0.01, 2e6), "PENNY": (1.0, 0.08, 2e6), "THIN": (20.0, 0.08, 1e4)}
+    for sym, (px, rng, vol) in spec.items():
+        close = px * (1 + 0.01 * np.sin(np.arange(40)))
+        df = pd.DataFrame(
+            {"timestamp": ts, "open": close, "high": close * (1 + rng), "low": close * (1 - rng),
+             "close": close, "volume": vol, "symbol": sym}
+        )
+        store.write(sym, df)
+    stale = store.read("CALM").iloc[:-3].assign(symbol="OLD", high=lambda d: d["close"] * 1.2)
+    store.write("OLD", stale)
+
+    out = screen_universe(store, min_price=2.0, min_atr_pct=0.03, min_adv_usd=1e6, min_avg_vol=1e5)
+    assert out.index.tolist() == ["WILD"]
+    assert np.isclose(out.loc["WILD", "atr_pct"], atr_pct(store.read("WILD")).iloc[-1])
+
+    everything = screen_universe(store, min_price=0.0, min_atr_pct=0.0)
+    assert everything.index.tolist()[-1] == "CALM"  # ranked by ATR%, stale OLD excluded
+    assert "OLD" not in everything.index
+    assert build_universe(0.0, 0.0, store=store, max_names=2) == everything.index.tolist()[:2]
+
+
+def test_market_refresh_lets_a_rejected_name_back_in(tmp_path, monkeypatch):
+    from src.core.timeutils import sessions_back
+    from src.data.universe import _tail_bars, build_universe, refresh_market
+
+    day1 = pd.Timestamp("2024-03-14")
+    day2 = pd.Timestamp("2024-03-15")
+    calls: list[str] = []
+
+    async def grouped(date):
+        calls.append(date)
+        close = pd.Timestamp(f"{date} 16:00").tz_localize("America/New_York")  # as Polygon stamps them
+        rows = []
+        for sym, rng in (("WILD", 0.08), ("LATE", 0.01)):
+            if sym == "LATE" and date == "2024-03-15":
+                rng = 0.9  # one violent session lifts its 20-day ATR% over the bar
+            rows.append({"T": sym, "t": close.value // 1_000_000, "o": 20.0, "h": 20.0 * (1 + rng),
+                         "l": 20.0 * (1 - rng), "c": 20.0, "v": 2e6})
+        return poly.decode_grouped({"results": rows})
+
+    monkeypatch.setattr(poly, "grouped_daily", grouped)
+    store = BarStore(tmp_path)
+    kw = dict(min_price=2.0, min_atr_pct=0.03, store=store)
+    # WILD already has per-ticker aggs (stamped 00:00 New York) for the last sessions
+    days = pd.bdate_range(end=day1, periods=5)
+    aggs = pd.DataFrame({"timestamp": days.tz_localize("America/New_York").tz_convert("UTC"), "open": 20.0,
+                         "high": 21.6, "low": 18.4, "close": 20.0, "volume": 2e6, "symbol": "WILD"})
+    store.write("WILD", aggs)
+
+    asof = asyncio.run(refresh_market(store, asof=day1))
+    assert asof == "2024-03-14" and len(calls) == 21 and calls[0] == sessions_back(20, day1).strftime("%Y-%m-%d")
+    assert build_universe(asof=asof, **kw) == ["WILD"]
+    wild = _tail_bars(store, 30, asof).query("symbol == 'WILD'")
+    assert len(wild) == 21 and not session_dates(wild["timestamp"]).duplicated().any()
+    assert len(store.read("WILD")) == 5  # per-symbol history files are left alone
+
+    asof = asyncio.run(refresh_market(store, asof=day2))
+    assert calls[21:] == ["2024-03-15"]  # only the new session is requested
+    assert sorted(build_universe(asof=asof, **kw)) == ["LATE", "WILD"]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import timeutils as tu
+from src.data.panel import Panel
+
+
+def test_session_index_matches_exchange_calendar():
+    expect = tu.nyse().valid_days("2024-06-01", "2025-07-31").tz_localize(None)
+    assert tu.sessions().dtype == np.int32
+    pd.testing.assert_index_equal(tu.sessions_between("2024-06-01", "2025-07-31"), expect, check_names=False)
+
+    # Juneteenth, Independence Day, Christmas, the 2025-01-09 day of mourning
+    for d in ("2024-06-19", "2024-07-04", "2024-12-25", "2025-01-09"):
+        assert not tu.is_session(d)
+    assert tu.prev_session("2025-01-10") == pd.Timestamp("2025-01-08")
+    assert tu.next_session("2024-12-24") == pd.Timestamp("2024-12-26")
+    first, last = tu.sessions_between(tu.SESSION_START, tu.SESSION_END)[[0, -1]]
+    with pytest.raises(ValueError, match="No session before"):
+        tu.prev_session(first)  # used to wrap around to the last session
+    with pytest.raises(ValueError, match="No session after"):
+        tu.next_session(last)
+    assert tu.last_trading_day("2024-07-06") == pd.Timestamp("2024-07-05")
+    assert tu.sessions_back(0, "2024-07-04") == pd.Timestamp("2024-07-03")
+    assert tu.sessions_back(len(expect) - 1, "2025-07-31") == expect[0]
+
+    days = pd.date_range("2024-06-01", "2025-07-31")
+    np.testing.assert_array_equal(tu.session_mask(days), days.isin(expect))
+
+
+def test_calendar_panel_rows_are_sessions():
+    idx = pd.bdate_range("2024-12-20", "2025-01-10")  # includes Christmas, New Year and 2025-01-09
+    df = pd.DataFrame({f: np.arange(len(idx), dtype=float) + 1 for f in ("open", "high", "low", "close", "volume")}, index=idx)
+    thin = df.drop(pd.Timestamp("2024-12-30"))
+
+    p = Panel.from_frames({"A": thin, "B": thin}, calendar=True)
+    pd.testing.assert_index_equal(p.dates, tu.sessions_between("2024-12-20", "2025-01-10"))
+    assert np.isnan(p.close[p.dates.get_loc(pd.Timestamp("2024-12-30"))]).all()
+    assert len(Panel.from_frames({"A": thin}).dates) == len(thin)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import json
+import time
+
+from src.broker.ibkr_exec import Executor
+from src.core.tracing import TRACER, Tracer
+
+from test_ibkr_exec import FakeIB, _targets
+
+
+def test_span_summary_json_and_prometheus(tmp_path):
+    tr = Tracer()
+    for _ in range(20):
+        with tr.span("fetch.symbol"):
+            time.sleep(0.001)
+    try:
+        with tr.span("stage.submit"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    tr.count("bytes_fetched", 1500)
+    tr.count("bytes_fetched", 500)
+
+    s = tr.summary()
+    assert s["fetch.symbol"]["count"] == 20 and s["stage.submit"]["count"] == 1  # failed spans still recorded
+    assert 1.0 <= s["fetch.symbol"]["p50_ms"] <= s["fetch.symbol"]["p95_ms"] <= s["fetch.symbol"]["max_ms"]
+
+    prof = json.loads(tr.write_json(tmp_path / "run.json", run_id="r1").read_text())
+    assert prof["run_id"] == "r1" and prof["counters"]["bytes_fetched"] == 2000
+
+    text = tr.write_prometheus(tmp_path / "vbb.prom").read_text()
+    assert 'vbb_eod_span_seconds{span="fetch.symbol",quantile="0.95"}' in text
+    assert 'vbb_eod_span_seconds_count{span="stage.submit"} 1' in text
+    assert "vbb_eod_bytes_fetched 2000" in text
+    assert not (tmp_path / "vbb.prom.tmp").exists()
+
+
+def test_order_submission_is_traced_per_order():
+    TRACER.reset()
+    Executor(FakeIB()).place_brackets(_targets(5))
+    assert TRACER.summary()["submit.order"]["count"] == 5
+    TRACER.reset()
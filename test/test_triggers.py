@@ -0,0 +1,63 @@
+from __future__ import annotations
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.apps.daemon import Daemon
+from src.broker.quotes import QuoteStream
+from src.core.config import load_settings
+from src.data.panel import Panel
+from src.strategy.pipeline import CloseLevels
+from src.strategy.triggers import TriggerIndex
+
+from test_daemon import KW, _Client
+from test_panel_backtest import _universe
+
+
+def _ticker(sym: str, high: float, last: float, volume: float):
+    return SimpleNamespace(contract=SimpleNamespace(symbol=sym), high=high, last=last, volume=volume)
+
+
+def test_trigger_index_matches_close_rule_on_ticks(tmp_path):
+    bars = _universe(60, 60, seed=5)
+    panel = Panel.from_frames(bars)
+    levels = CloseLevels.from_panel(panel.rows(0, panel.shape[0] - 1))
+    theta, vm = 0.0, 1.2
+    expected = levels.targets(panel.high[-1], panel.close[-1], panel.volume[-1], 1e9, 1.0,
+                              **{**KW, "breakout_threshold": theta, "vol_multiplier": vm})
+
+    idx = TriggerIndex.from_levels(levels, theta, vm)
+    assert list(idx.symbols) == sorted(panel.symbols)
+    idx = TriggerIndex.load(idx.save(tmp_path / "t.npz"))
+    # The session arrives as three cumulative quotes; the running high and volume only reach the bar's at the end
+    j = [panel.symbols.index(s) for s in idx.symbols]
+    hi, vol = panel.high[-1][j], panel.volume[-1][j]
+    fired = []
+    for frac in (0.3, 0.7, 1.0):
+        for i in range(len(idx)):
+            h = hi[i] if frac == 1.0 else panel.close[-2][j][i]
+            if idx.on_quote(i, h, vol[i] * frac):
+                fired.append(idx.symbols[i])
+    assert sorted(fired) == sorted(expected.symbols) and len(fired) > 0
+    assert not idx.on_quote(idx.slot[fired[0]], np.inf, np.inf)  # fires once per day
+
+
+def test_quote_stream_routes_triggers_into_targets_path(tmp_path, monkeypatch):
+    bars = _universe(20, 60, seed=3)
+    day = next(iter(bars.values())).index[-1]
+    load_settings()
+    monkeypatch.chdir(tmp_path)
+    d = Daemon(nav_gbp=40_000.0, client=_Client())
+    d.prepare(day, {s: df.iloc[:-1] for s, df in bars.items()})
+    d.triggers = TriggerIndex.from_levels(d.warm.levels, 0.0, 0.0)
+
+    stream = QuoteStream(d.client.ib, d.triggers, d.on_trigger, volume_scale=100.0)
+    sym = d.triggers.symbols[np.isfinite(d.triggers.level)][0]
+    lvl = d.triggers.level[d.triggers.slot[sym]]
+    assert stream.on_tickers([_ticker(sym, lvl * 0.99, lvl * 0.99, 10.0)]) == []
+    assert stream.on_tickers([_ticker(sym, float("nan"), lvl * 1.01, 20.0)]) == [d.triggers.slot[sym]]
+    assert stream.on_tickers([_ticker(sym, lvl * 1.02, lvl * 1.02, 30.0)]) == []
+
+    (s, entry), _ = d.client.ib.placed
+    assert s == sym and entry.lmtPrice == pytest.approx(lvl * 1.01 * (1 + d.cfg.strat.execution["entry_limit_pct"]))  # sized at the trigger print
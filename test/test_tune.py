@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from src.data.panel import Panel
+from src.research.tune import load_shared_panel, share_panel, tune
+
+from test_panel_backtest import _universe
+
+
+def test_tune_runs_in_parallel_and_resumes(tmp_path):
+    panel = Panel.from_frames(_universe(8, 600))
+    shared = load_shared_panel(share_panel(panel, tmp_path / "p"))
+    assert not shared.close.flags.writeable
+    assert shared.symbols == panel.symbols
+
+    risk = dict(nav_usd=50_000.0, per_trade_risk=0.015, max_positions=3, max_gross_exposure=0.7)
+    st = tune(panel, study_name="t", n_trials=6, n_jobs=2, risk=risk, root=tmp_path)
+    assert len(st.trials) == 6
+    st = tune(panel, study_name="t", n_trials=2, n_jobs=1, risk=risk, root=tmp_path)
+    assert len(st.trials) == 8
+    assert set(st.best_params) == {
+        "breakout_threshold", "vol_multiplier", "stop_loss_pct", "trail_start_pct", "trail_pct"
+    }
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.data.panel import Panel
+from src.research.backtest import BTConfig
+from src.research.panel_backtest import PanelFeatures, backtest_panel
+from src.research.walkforward import load_shared_features, make_folds, share_features, walk_forward
+
+from test_panel_backtest import _universe
+
+RISK = dict(nav_usd=50_000.0, per_trade_risk=0.015, max_positions=3, max_gross_exposure=0.7)
+
+
+def test_make_folds_rolling_and_anchored():
+    rolling = make_folds(200, train=50, test=20, start=25)
+    assert [(f.train_lo, f.train_hi, f.test_lo, f.test_hi) for f in rolling[:2]] == [(25, 75, 75, 95), (45, 95, 95, 115)]
+    assert rolling[-1].test_hi <= 199
+    assert all(a.test_hi == b.test_lo for a, b in zip(rolling, rolling[1:]))
+    anchored = make_folds(200, train=50, test=20, anchored=True, start=25)
+    assert {f.train_lo for f in anchored} == {25}
+    assert [f.test_lo for f in anchored] == [f.test_lo for f in rolling]
+
+
+def test_cached_features_match_full_backtest(tmp_path):
+    panel = Panel.from_frames(_universe(8, 300))
+    feats = load_shared_features(share_features(PanelFeatures.from_panel(panel), tmp_path))
+    cfg = BTConfig(breakout_threshold=0.0, vol_multiplier=0.5)
+    full = backtest_panel(panel, cfg, **RISK).returns
+    part = backtest_panel(panel.rows(100, 201), cfg, features=feats.rows(100, 201), **RISK).returns
+    np.testing.assert_allclose(part.to_numpy(), full.loc[part.index].to_numpy())
+
+
+def test_walk_forward_stitches_oos_and_parallel_matches_serial(tmp_path):
+    panel = Panel.from_frames(_universe(8, 400))
+    serial = walk_forward(panel, train=150, test=60, n_trials=3, risk=RISK, root=tmp_path)
+    assert len(serial.folds) == 3
+    assert serial.returns.index.is_monotonic_increasing and serial.returns.index.is_unique
+    assert serial.returns.index[0] == panel.dates[175]
+    parallel = walk_forward(panel, train=150, test=60, n_trials=3, risk=RISK, n_jobs=2, root=tmp_path)
+    np.testing.assert_allclose(parallel.returns.to_numpy(), serial.returns.to_numpy())
+    assert parallel.folds["is_sharpe"].tolist() == serial.folds["is_sharpe"].tolist()